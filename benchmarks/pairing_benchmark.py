@@ -0,0 +1,63 @@
+# pairing_benchmark.py - Time Swiss pairing on a simulated tournament
+#
+# Usage: python benchmarks/pairing_benchmark.py [players] [rounds] [seed]
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chess_pairing import PairingHistory, pair_swiss
+
+
+def simulate(player_count, rounds, seed):
+    """Pair and play a random Swiss tournament, printing the cost of each round"""
+    rng = random.Random(seed)
+    players = [{"id": f"P{i}", "points": 0, "rating": rng.randint(800, 2600)} for i in range(player_count)]
+    by_id = {player["id"]: player for player in players}
+    history = PairingHistory()
+
+    timings = []
+    for round_number in range(1, rounds + 1):
+        started = time.perf_counter()
+        pairings = pair_swiss(players, history.opponents, history.byes, history.colours)
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+
+        rematches = 0
+        repeat_byes = 0
+        for white_id, black_id in pairings:
+            if black_id == "BYE":
+                repeat_byes += white_id in history.byes
+                history.add_match({"player1_id": white_id, "player2_id": black_id})
+                by_id[white_id]["points"] += 1
+                continue
+
+            rematches += history.played(white_id, black_id)
+            history.add_match({"player1_id": white_id, "player2_id": black_id})
+
+            # Higher rated players win a little more often
+            white, black = by_id[white_id], by_id[black_id]
+            expected = 1 / (1 + 10 ** ((black["rating"] - white["rating"]) / 400))
+            roll = rng.random()
+            if roll < 0.1:
+                white["points"] += 0.5
+                black["points"] += 0.5
+            elif roll < 0.1 + 0.9 * expected:
+                white["points"] += 1
+            else:
+                black["points"] += 1
+
+        worst_colour = max(abs(balance) for balance in history.colours.values())
+        print(f"Round {round_number}: {elapsed * 1000:.1f} ms, {len(pairings)} boards, "
+              f"{rematches} rematches, {repeat_byes} repeat byes, max colour imbalance {worst_colour}")
+
+    print(f"Total {sum(timings) * 1000:.1f} ms, slowest round {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    player_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    simulate(player_count, rounds, seed)
@@ -0,0 +1,50 @@
+# perft.py - Check move generation against known perft counts and time it
+#
+# Usage: python benchmarks/perft.py [max_depth]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chess_engine import START_FEN, Position, perft
+
+# FEN -> leaf counts for depth 1, 2, 3, ... (from the Chess Programming Wiki)
+POSITIONS = [
+    (START_FEN, [20, 400, 8902, 197281]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890]),
+]
+
+
+def main(max_depth):
+    failures = 0
+    for fen, counts in POSITIONS:
+        position = Position(fen)
+        for depth, expected in enumerate(counts[:max_depth], 1):
+            started = time.perf_counter()
+            nodes = perft(position, depth)
+            elapsed = time.perf_counter() - started
+            status = "ok" if nodes == expected else f"FAIL (expected {expected})"
+            failures += nodes != expected
+            print(f"{fen[:40]:40} depth {depth}: {nodes:>7} nodes in {elapsed:.3f}s {status}")
+        if position.fen() != fen:
+            print(f"FAIL: position changed to {position.fen()}")
+            failures += 1
+
+    # Time one move as the board view handles it: load FEN, parse, play, store FEN
+    fen = POSITIONS[-1][0]
+    started = time.perf_counter()
+    for _ in range(1000):
+        position = Position(fen)
+        position.push(position.parse_move("Nd5"))
+        position.fen()
+    print(f"Validate and play one move: {(time.perf_counter() - started) * 1000:.0f} us")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 3) else 0)
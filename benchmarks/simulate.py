@@ -0,0 +1,331 @@
+# simulate.py - Seeded tournament simulator and benchmark for the chess commands
+#
+# Builds synthetic tournaments, plays them through the real command
+# callbacks with fake Interaction objects and records the latency
+# percentiles and traced memory peak of each operation. Each scenario runs
+# in its own process and temporary data directory, and the combined
+# results are written as JSON so runs can be diffed between releases.
+#
+# Usage: python benchmarks/simulate.py [--players 100,1000]
+#            [--formats "Swiss,Round Robin,Single Elimination"] [--rounds 5]
+#            [--seed 1] [--persistence journal] [--output baseline.json]
+#            [--no-trace-memory]
+#
+# tracemalloc slows everything down several times over; the latencies are
+# still comparable between runs made the same way. 10,000 player runs
+# (--players 100,1000,10000) take tens of minutes.
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FORMATS = ["Swiss", "Round Robin", "Single Elimination"]
+PLAYER_COUNTS = [100, 1000]
+
+DIRECTOR_ID = 1
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeUser:
+    def __init__(self, user_id, name, roles=()):
+        self.id = user_id
+        self.display_name = name
+        self.name = name
+        self.mention = f"<@{user_id}>"
+        self.roles = [FakeRole(role) for role in roles]
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, *args, **kwargs):
+        self.done = True
+        self.interaction.messages += 1
+
+    async def defer(self, *args, **kwargs):
+        self.done = True
+
+    async def send_modal(self, modal):
+        self.done = True
+
+
+class FakeMessageable:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        self.interaction.messages += 1
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the command callbacks; replies are counted and dropped"""
+
+    def __init__(self, user):
+        self.user = user
+        self.guild = None
+        self.messages = 0
+        self.response = FakeResponse(self)
+        self.followup = FakeMessageable(self)
+        self.channel = FakeMessageable(self)
+
+
+class Recorder:
+    """Latency samples and traced memory peaks per operation"""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.samples = {}
+        self.peaks = {}
+        self.depth = 0
+
+    def start(self):
+        self.depth += 1
+        if self.trace_memory and self.depth == 1:
+            tracemalloc.reset_peak()
+            return time.perf_counter(), tracemalloc.get_traced_memory()[0]
+        return time.perf_counter(), None
+
+    def stop(self, name, started):
+        begin, memory = started
+        self.samples.setdefault(name, []).append(time.perf_counter() - begin)
+        self.depth -= 1
+        # Peaks are only taken for outermost operations; nested ones share them
+        if memory is not None:
+            peak = tracemalloc.get_traced_memory()[1] - memory
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    async def time_async(self, name, coroutine):
+        started = self.start()
+        try:
+            return await coroutine
+        finally:
+            self.stop(name, started)
+
+    def wrap(self, name, func):
+        """Time every call of func, sync or async"""
+        if asyncio.iscoroutinefunction(func):
+            async def timed(*args, **kwargs):
+                return await self.time_async(name, func(*args, **kwargs))
+        else:
+            def timed(*args, **kwargs):
+                started = self.start()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.stop(name, started)
+        return timed
+
+    def summary(self):
+        operations = {}
+        for name, samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+            entry = {
+                "count": len(samples),
+                "total_s": round(sum(samples), 6),
+                "p50_ms": round(percentile(samples, 50) * 1000, 4),
+                "p90_ms": round(percentile(samples, 90) * 1000, 4),
+                "p99_ms": round(percentile(samples, 99) * 1000, 4),
+                "max_ms": round(samples[-1] * 1000, 4),
+            }
+            if name in self.peaks:
+                entry["peak_kib"] = round(self.peaks[name] / 1024, 1)
+            operations[name] = entry
+        return operations
+
+
+def percentile(sorted_samples, percent):
+    """Nearest-rank percentile of already sorted samples"""
+    index = max(0, math.ceil(percent / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+def pick_result(rng, white_rating, black_rating):
+    """Random result with the Elo expectation deciding decisive games"""
+    if rng.random() < 0.3:
+        return "draw"
+    expected = 1 / (1 + 10 ** ((black_rating - white_rating) / 400))
+    return "player1" if rng.random() < expected else "player2"
+
+
+async def play(tournament_format, player_count, rounds, seed, trace_memory):
+    """Run one scenario in the current directory and return its results"""
+    import chess_commands
+    from chess_import import ImportPlan
+
+    rng = random.Random(seed)
+    random.seed(seed)  # Match ids use the module random for their suffix
+
+    recorder = Recorder(trace_memory)
+    chess_commands.save_data = recorder.wrap("save_data", chess_commands.save_data)
+    chess_commands.generate_pairings = recorder.wrap("generate_pairings", chess_commands.generate_pairings)
+
+    chess_commands.load_data()
+    if chess_commands.PERSISTENCE_MODE == "journal":
+        chess_commands.journal.start(chess_commands.data_files)
+
+    director = FakeUser(DIRECTOR_ID, "Director", roles=["Tournament Director"])
+    await recorder.time_async("create_tournament", chess_commands.create_tournament_command(
+        FakeInteraction(director), f"{tournament_format} {player_count}", tournament_format, min(rounds, 10)
+    ))
+    tournament = next(iter(chess_commands.tournaments["tournaments"].values()))
+    tournament_id = tournament["id"]
+
+    # Register everyone in one bulk import, as a league season would
+    plan = ImportPlan()
+    for index in range(player_count):
+        player_id = str(10 ** 17 + index)
+        rating = min(3000, max(100, round(rng.gauss(1500, 300))))
+        plan.players[player_id] = (f"Player {index}", rating)
+    started = recorder.start()
+    await chess_commands.apply_import(tournament, plan, str(DIRECTOR_ID))
+    recorder.stop("import_players", started)
+
+    await recorder.time_async("start_tournament", chess_commands.start_tournament_command(FakeInteraction(director), tournament_id))
+
+    players = chess_commands.players["players"]
+    matches = chess_commands.matches["matches"]
+    rounds_played = 0
+    while True:
+        round_number = tournament["current_round"]
+
+        # Elimination draws are replayed within the round, so keep going until it is done
+        while True:
+            open_match_ids = [
+                match_id for match_id in chess_commands.round_index.match_ids(tournament_id, round_number)
+                if matches[match_id]["status"] != "Completed"
+            ]
+            if not open_match_ids:
+                break
+            for match_id in open_match_ids:
+                match = matches[match_id]
+                result = pick_result(rng, players[match["player1_id"]]["rating"], players[match["player2_id"]]["rating"])
+                reporter = FakeUser(int(match["player1_id"]), match["player1_name"])
+                await recorder.time_async("report_match_result", chess_commands.report_match_result(FakeInteraction(reporter), match_id, result))
+
+        rounds_played += 1
+        await recorder.time_async("tournament_standings", chess_commands.tournament_standings_command(FakeInteraction(director), tournament_id))
+
+        # Elimination brackets are always played out to a winner
+        if round_number >= tournament["rounds"] or (rounds_played >= rounds and "bracket" not in tournament):
+            break
+        await recorder.time_async("next_round", chess_commands.next_round_command(FakeInteraction(director), tournament_id))
+        if tournament["current_round"] == round_number:
+            break
+
+    # Same seed, same games: the digest shows whether a change altered results
+    points = sorted((row["id"], row["points"]) for row in chess_commands.tournament_standings(tournament_id).rows.values())
+    digest = hashlib.sha256(json.dumps(points).encode()).hexdigest()[:16]
+
+    started = time.perf_counter()
+    chess_commands.compact_data()
+    drain_seconds = time.perf_counter() - started
+
+    return {
+        "format": tournament_format,
+        "players": player_count,
+        "rounds_played": rounds_played,
+        "matches": len(tournament["matches"]),
+        "standings_digest": digest,
+        "operations": recorder.summary(),
+        "persistence_drain_s": round(drain_seconds, 6),
+        "persistence": chess_commands.worker.metrics(),
+        "peak_traced_kib": round(tracemalloc.get_traced_memory()[1] / 1024, 1) if trace_memory else None,
+    }
+
+
+def run_scenario(arguments):
+    """Child process: play one scenario and print its results as JSON"""
+    tournament_format, player_count = arguments.scenario.rsplit(":", 1)
+    if arguments.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = asyncio.run(play(tournament_format, int(player_count), arguments.rounds, arguments.seed, arguments.trace_memory))
+    result["wall_s"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(result))
+
+
+def run_all(arguments):
+    """Run every scenario in a fresh process and data directory"""
+    formats = [name.strip() for name in arguments.formats.split(",")]
+    counts = [int(count) for count in arguments.players.split(",")]
+    baseline = {
+        "seed": arguments.seed,
+        "rounds": arguments.rounds,
+        "persistence": arguments.persistence,
+        "trace_memory": arguments.trace_memory,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": [],
+    }
+
+    for tournament_format in formats:
+        for player_count in counts:
+            name = f"{tournament_format}:{player_count}"
+            command = [sys.executable, os.path.abspath(__file__), "--scenario", name,
+                       "--rounds", str(arguments.rounds), "--seed", str(arguments.seed)]
+            if not arguments.trace_memory:
+                command.append("--no-trace-memory")
+            environment = dict(os.environ, CHESS_PERSISTENCE=arguments.persistence)
+            with tempfile.TemporaryDirectory(prefix="chess-simulate-") as directory:
+                finished = subprocess.run(command, cwd=directory, env=environment, capture_output=True, text=True)
+            if finished.returncode != 0:
+                print(f"{name}: failed\n{finished.stderr}")
+                baseline["scenarios"].append({"format": tournament_format, "players": player_count, "error": finished.stderr[-2000:]})
+                continue
+
+            result = json.loads(finished.stdout.strip().splitlines()[-1])
+            baseline["scenarios"].append(result)
+            print(f"{name}: {result['rounds_played']} rounds, {result['matches']} matches in {result['wall_s']}s")
+            for operation, stats in result["operations"].items():
+                peak = f", peak {stats['peak_kib']:.0f} KiB" if "peak_kib" in stats else ""
+                print(f"  {operation:22} n={stats['count']:<6} p50 {stats['p50_ms']:9.3f} ms  p99 {stats['p99_ms']:9.3f} ms  max {stats['max_ms']:9.3f} ms{peak}")
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Wrote {arguments.output}")
+    return 1 if any("error" in scenario for scenario in baseline["scenarios"]) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate chess tournaments and time the commands that run them")
+    parser.add_argument("--players", default=",".join(str(count) for count in PLAYER_COUNTS), help="comma separated player counts")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma separated tournament formats")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds to play (elimination plays until a winner)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--persistence", default=os.environ.get("CHESS_PERSISTENCE", "journal"), choices=["journal", "json", "sqlite"])
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="skip tracemalloc, which slows every operation down")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.scenario:
+        run_scenario(arguments)
+        return 0
+    return run_all(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,11 @@ import discord
 import pnw_commands
 import chess_commands
 import chess_activity
+from settings_store import SettingsStore
+from persistence import worker
+from bot_logger import BotLogger
+import warm_restart
+import command_sync
 from discord import app_commands
 from discord.ext import commands
 
@@ -18,27 +23,32 @@ os.makedirs('data', exist_ok=True)
 # Settings file path
 SETTINGS_FILE = 'data/settings.json'
 
+# How often (in seconds) pending settings changes are written to disk
+SETTINGS_FLUSH_INTERVAL = int(os.environ.get('SETTINGS_FLUSH_INTERVAL', 30))
+
+# Settings live in memory and are flushed in the background
+settings_store = SettingsStore(SETTINGS_FILE, flush_interval=SETTINGS_FLUSH_INTERVAL, worker=worker)
+
 # Function to load settings
 def load_settings():
-    try:
-        with open(SETTINGS_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Default settings
-        default_settings = {
-            'guilds': {}  # Store guild-specific settings here
-        }
-        save_settings(default_settings)
-        return default_settings
+    return settings_store.data
 
-# Function to save settings
+# Function to save settings (marks them dirty; the store flushes them later)
 def save_settings(settings):
-    with open(SETTINGS_FILE, 'w') as f:
-        json.dump(settings, f, indent=4)
+    settings_store.mark_dirty()
 
 # Load settings
 settings = load_settings()
 
+# Structured log, buffered in memory and written in batches by the persistence worker
+logger = BotLogger(
+    'data/logs/bot_log.jsonl',
+    flush_interval=int(os.environ.get('LOG_FLUSH_INTERVAL', 5)),
+    max_bytes=int(os.environ.get('LOG_MAX_BYTES', 1024 * 1024)),
+    backups=int(os.environ.get('LOG_BACKUPS', 5)),
+    worker=worker
+)
+
 # Set up intents
 intents = discord.Intents.default()
 intents.message_content = True  # Enable message content intent
@@ -64,24 +74,26 @@ async def check_runtime():
         
         # Log current status every hour
         if int(current_runtime) % 3600 < 10:  # Log within first 10 seconds of each hour
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{current_time}] Bot running for {int(current_runtime/60)} minutes")
-            
-            # Log to file
-            with open('data/bot_log.txt', 'a') as f:
-                f.write(f'[{current_time}] Bot running for {int(current_runtime/60)} minutes\n')
+            logger.log(f"Bot running for {int(current_runtime/60)} minutes", event="uptime", minutes=int(current_runtime/60))
         
         # If we're approaching the GitHub Actions timeout, exit gracefully
         if current_runtime >= MAX_RUNTIME:
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{current_time}] Maximum runtime reached ({MAX_RUNTIME/60} minutes). Shutting down...")
+            logger.log(f"Maximum runtime reached ({MAX_RUNTIME/60} minutes). Shutting down...", event="shutdown")
             
-            # Log to file
-            with open('data/bot_log.txt', 'a') as f:
-                f.write(f'[{current_time}] Maximum runtime reached. Shutting down...\n')
+            # Snapshot runtime state so the next run starts warm
+            sections = warm_restart.save_snapshot(bot)
+            logger.log(f"Saved warm restart snapshot ({sections} sections)", event="snapshot")
                 
-            # Exit the script - GitHub Actions will restart it according to schedule
+            # Write out any settings changes still held in memory
+            await settings_store.close()
+            chess_commands.compact_data()
+            logger.close()
             await bot.close()
+            
+            # Last, write whatever views and handlers queued while closing
+            worker.stop()
+            
+            # Exit the script - GitHub Actions will restart it according to schedule
             sys.exit(0)
             
         await asyncio.sleep(10)  # Check every 10 seconds
@@ -93,16 +105,10 @@ async def force_sync(ctx):
     await ctx.send("Syncing commands...")
     
     try:
-        # Clear all existing commands first
-        bot.tree.clear_commands(guild=None)
-        
-        # Re-register PnW commands
-        pnw_commands.setup(bot)
-        
-        # Sync commands
-        await bot.tree.sync()
+        # Sync even if the command tree fingerprint is unchanged
+        synced = await command_sync.sync_commands(bot, force=True)
         
-        await ctx.send("Commands synced successfully!")
+        await ctx.send(f"Commands synced successfully! ({synced} command(s))")
     except Exception as e:
         await ctx.send(f"Error syncing commands: {str(e)}")
 
@@ -111,13 +117,67 @@ async def force_sync(ctx):
 async def sync(ctx):
     """Sync slash commands with Discord"""
     try:
-        synced = await bot.tree.sync()
-        await ctx.send(f"Synced {len(synced)} command(s)")
-        print(f"Synced {len(synced)} command(s)")
+        synced = await command_sync.sync_commands(bot)
+        if synced is None:
+            await ctx.send("Commands are unchanged since the last sync. Use `!forcesync` to sync anyway.")
+            return
+        await ctx.send(f"Synced {synced} command(s)")
+        print(f"Synced {synced} command(s)")
     except Exception as e:
         await ctx.send(f"Failed to sync commands: {str(e)}")
         print(f"Failed to sync commands: {str(e)}")
 
+@bot.command(name="metrics")
+@commands.is_owner()
+async def metrics(ctx):
+    """Show persistence metrics"""
+    store_metrics = settings_store.metrics()
+    worker_metrics = worker.metrics()
+    log_metrics = logger.metrics()
+    
+    embed = discord.Embed(title="Persistence Metrics", color=discord.Color.blue())
+    embed.add_field(
+        name="Settings Store",
+        value=(
+            f"Flushes: {store_metrics['flushes']}\n"
+            f"Pending mutations: {store_metrics['pending_mutations']} ({store_metrics['dirty_guilds']} guilds)\n"
+            f"Coalescing ratio: {store_metrics['coalescing_ratio']:.1f} mutations/flush\n"
+            f"Flush latency: last {store_metrics['last_flush_ms']:.2f}ms, "
+            f"avg {store_metrics['avg_flush_ms']:.2f}ms, max {store_metrics['max_flush_ms']:.2f}ms"
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="Persistence Worker",
+        value=(
+            f"Queue depth: {worker_metrics['queue_depth']}/{worker_metrics['queue_capacity']} "
+            f"(max {worker_metrics['max_queue_depth']})\n"
+            f"Jobs: {worker_metrics['completed']} done, {worker_metrics['failed']} failed, "
+            f"{worker_metrics['coalesced']} coalesced, {worker_metrics['blocked_submits']} blocked\n"
+            f"Write latency: last {worker_metrics['last_write_ms']:.2f}ms, "
+            f"avg {worker_metrics['avg_write_ms']:.2f}ms, max {worker_metrics['max_write_ms']:.2f}ms"
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="Log",
+        value=(
+            f"Entries: {log_metrics['logged']} ({log_metrics['pending']} pending, {log_metrics['dropped']} dropped)\n"
+            f"Ring buffer: {log_metrics['buffered']} entries"
+        ),
+        inline=False
+    )
+    
+    await ctx.send(embed=embed)
+
+@bot.command(name="logs")
+@commands.is_owner()
+async def logs(ctx, count: int = 15):
+    """Show the most recent log entries from the in-memory buffer"""
+    lines = [f"[{entry['ts']}] {entry['msg']}" for entry in logger.recent(min(count, 50))]
+    text = "\n".join(lines) if lines else "No log entries yet."
+    await ctx.send(f"```{text[-1900:]}```")
+
 # Add this import at the top of the file with the other imports
 import chess_commands
 
@@ -128,6 +188,10 @@ async def setup_hook():
     # Start the runtime check task
     bot.loop.create_task(check_runtime())
     
+    # Start flushing settings changes and log entries in the background
+    settings_store.start()
+    logger.start()
+    
     # Register Politics & War commands
     pnw_commands.setup(bot)
     
@@ -138,20 +202,22 @@ async def setup_hook():
     chess_activity.setup(bot)
     chess_activity.initialize(bot)
     
-    # Sync commands with Discord
+    # Restore runtime state left by the previous run
+    restored = warm_restart.restore_snapshot(bot)
+    if restored:
+        logger.log(f"Restored {restored} section(s) from warm restart snapshot", event="warm_restart")
+    
+    # Sync commands with Discord, only if they changed since the last sync
     try:
-        print("Syncing commands with Discord...")
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
+        synced = await command_sync.sync_commands(bot)
+        if synced is None:
+            print("Commands unchanged since the last sync, skipping sync")
+        else:
+            print(f"Synced {synced} command(s)")
     except Exception as e:
         print(f"Failed to sync commands: {str(e)}")
     
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] Bot is setting up...")
-    
-    # Log to file
-    with open('data/bot_log.txt', 'a') as f:
-        f.write(f'[{current_time}] Bot is setting up...\n')
+    logger.log("Bot is setting up...", event="setup")
 
 @bot.event
 async def on_ready():
@@ -170,26 +236,17 @@ async def on_ready():
         if hasattr(command, 'commands'):
             for subcommand in command.commands:
                 print(f"  - {subcommand.name}")
-                
-    # Sync commands with Discord
-    try:
-        synced = await bot.tree.sync()
-        print(f'[{current_time}] Synced {len(synced)} command(s)')
-    except Exception as e:
-        print(f'[{current_time}] Failed to sync commands: {e}')
     
     # Set bot status
     await bot.change_presence(activity=discord.Game(name="Use /help for commands"))
     
     # Log to a file that can be accessed in GitHub Actions logs
-    with open('data/bot_log.txt', 'a') as f:
-        f.write(f'[{current_time}] Bot started successfully\n')
+    logger.log("Bot started successfully", event="ready", echo=False, guilds=len(bot.guilds))
 
 @bot.event
 async def on_guild_join(guild):
     """Called when the bot joins a new guild"""
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f'[{current_time}] Joined new guild: {guild.name} (ID: {guild.id})')
+    logger.log(f"Joined new guild: {guild.name} (ID: {guild.id})", event="guild_join", guild_id=str(guild.id))
     
     # Initialize settings for this guild
     guild_id = str(guild.id)
@@ -201,15 +258,8 @@ async def on_guild_join(guild):
         }
         save_settings(settings)
     
-    # Log to file
-    with open('data/bot_log.txt', 'a') as f:
-        f.write(f'[{current_time}] Joined new guild: {guild.name} (ID: {guild.id})\n')
-    
-    # Sync commands with the new guild
-    try:
-        await bot.tree.sync(guild=guild)
-    except Exception as e:
-        print(f'[{current_time}] Failed to sync commands to new guild: {e}')
+    # All commands are global, so the new guild already has them; there is
+    # nothing guild-specific to sync
 
 # Settings command group
 @bot.tree.command(name="settings", description="View or change bot settings")
@@ -228,12 +278,7 @@ async def settings_cmd(interaction: discord.Interaction):
         }
     
     # Update settings viewed count
-    if 'settings_viewed' in settings['guilds'][guild_id]:
-        settings['guilds'][guild_id]['settings_viewed'] += 1
-    else:
-        settings['guilds'][guild_id]['settings_viewed'] = 1
-    
-    save_settings(settings)
+    settings_store.increment(guild_id, 'settings_viewed')
     
     # Create embed with settings info
     embed = discord.Embed(
@@ -344,13 +389,7 @@ async def test(interaction: discord.Interaction):
 async def hello(interaction: discord.Interaction):
     """Greets the user who invoked the command"""
     # Track command usage in settings
-    guild_id = str(interaction.guild.id)
-    if guild_id in settings['guilds']:
-        if 'hello_count' in settings['guilds'][guild_id]:
-            settings['guilds'][guild_id]['hello_count'] += 1
-        else:
-            settings['guilds'][guild_id]['hello_count'] = 1
-        save_settings(settings)
+    settings_store.increment(interaction.guild.id, 'hello_count')
     
     await interaction.response.send_message(f'Hello, {interaction.user.mention}!')
 
@@ -476,13 +515,7 @@ async def uptime(interaction: discord.Interaction):
         restart_msg = "\nRestart imminent"
     
     # Track command usage
-    guild_id = str(interaction.guild.id)
-    if guild_id in settings['guilds']:
-        if 'uptime_checks' in settings['guilds'][guild_id]:
-            settings['guilds'][guild_id]['uptime_checks'] += 1
-        else:
-            settings['guilds'][guild_id]['uptime_checks'] = 1
-        save_settings(settings)
+    settings_store.increment(interaction.guild.id, 'uptime_checks')
     
     await interaction.response.send_message(f"Bot has been online for: **{hours}h {minutes}m {seconds}s**{restart_msg}")
 
@@ -569,12 +602,7 @@ async def on_member_join(member):
             await channel.send(welcome_message)
     
     # Track member joins
-    if guild_id in settings['guilds']:
-        if 'member_joins' in settings['guilds'][guild_id]:
-            settings['guilds'][guild_id]['member_joins'] += 1
-        else:
-            settings['guilds'][guild_id]['member_joins'] = 1
-        save_settings(settings)
+    settings_store.increment(guild_id, 'member_joins')
 
 # Stats command to see usage statistics
 @bot.tree.command(name="stats", description="View bot usage statistics for this server")
@@ -632,15 +660,16 @@ if __name__ == "__main__":
         print("Error: No bot token provided. Please set the BOT_TOKEN environment variable.")
         sys.exit(1)
     
-    # Start the bot
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] Starting bot...")
-    
     # Ensure data directory exists
     os.makedirs('data', exist_ok=True)
     
-    # Log to file
-    with open('data/bot_log.txt', 'a') as f:
-        f.write(f'[{current_time}] Starting bot...\n')
+    # Start the bot
+    logger.log("Starting bot...", event="start")
         
     bot.run(TOKEN)
+    
+    # Flush settings and chess data changed since the last background flush
+    settings_store.flush()
+    chess_commands.compact_data()
+    logger.close()
+    worker.stop()
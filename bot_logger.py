@@ -0,0 +1,174 @@
+# bot_logger.py - Buffered, rotating JSON lines logger
+import os
+import json
+import time
+import asyncio
+import datetime
+from collections import deque
+
+
+class BotLogger:
+    """Collect log entries in a ring buffer and write them out in batches"""
+
+    def __init__(self, path='data/logs/bot_log.jsonl', buffer_size=2000, batch_size=200,
+                 flush_interval=5, max_bytes=1024 * 1024, max_age=24 * 3600, backups=5, worker=None):
+        self.path = path
+        self.batch_size = batch_size  # Pending entries that trigger an early flush
+        self.flush_interval = flush_interval  # Seconds between background flushes
+        self.max_bytes = max_bytes  # Rotate once the file reaches this size...
+        self.max_age = max_age  # ...or once its first entry is this old (seconds)
+        self.backups = backups  # Rotated files to keep (bot_log.jsonl.1 ... .N)
+        self.worker = worker  # PersistenceWorker that performs the writes, if any
+
+        # Ring buffer of recent entries as (sequence, line); entries that fall
+        # off the end before being flushed are counted as dropped
+        self.buffer = deque(maxlen=buffer_size)
+        self.sequence = 0
+        self.flushed_sequence = 0
+        self.dropped = 0
+        self.file_started = None
+        self._task = None
+        self._wake = None  # Set to have the background task flush early
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def log(self, message, level="info", echo=True, **fields):
+        """Record a log entry; extra keyword arguments become JSON fields"""
+        now = datetime.datetime.now()
+        entry = {"ts": now.isoformat(timespec="seconds"), "level": level, "msg": message}
+        entry.update(fields)
+
+        if echo:
+            # Keep the console output GitHub Actions shows in the run logs
+            print(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+        if len(self.buffer) == self.buffer.maxlen and self.buffer[0][0] > self.flushed_sequence:
+            self.dropped += 1
+
+        self.sequence += 1
+        self.buffer.append((self.sequence, json.dumps(entry, default=str)))
+
+        if self.sequence - self.flushed_sequence >= self.batch_size:
+            if self._task is not None and not self._task.done():
+                # Let the background task write the batch so a full worker
+                # queue never blocks the event loop
+                self._wake.set()
+            else:
+                self.flush()
+
+    def recent(self, count=20):
+        """Return the most recent entries as dicts"""
+        return [json.loads(line) for _, line in list(self.buffer)[-count:]]
+
+    def flush(self):
+        """Write every entry logged since the last flush in one batch
+
+        Blocks while the worker queue is full; coroutines use flush_async().
+        """
+        lines = self._take_pending()
+        if not lines:
+            return False
+
+        if self.worker is None:
+            self.write_batch(lines)
+        else:
+            self.worker.submit(self.write_batch, lines)
+        return True
+
+    async def flush_async(self):
+        """flush() without blocking the event loop on a full worker queue"""
+        lines = self._take_pending()
+        if not lines:
+            return False
+
+        if self.worker is None:
+            self.write_batch(lines)
+        else:
+            await self.worker.submit_async(self.write_batch, lines)
+        return True
+
+    def _take_pending(self):
+        """Lines logged since the last flush, which now count as flushed"""
+        lines = [line for sequence, line in self.buffer if sequence > self.flushed_sequence]
+        self.flushed_sequence = self.sequence
+        return lines
+
+    def write_batch(self, lines):
+        """Append a batch of lines, rotating the file first if needed"""
+        if self.should_rotate():
+            self.rotate()
+
+        with open(self.path, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+
+        if self.file_started is None:
+            self.file_started = time.time()
+
+    def should_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+
+        if self.file_started is None:
+            self.file_started = self._first_entry_time()
+
+        if size >= self.max_bytes:
+            return True
+        return self.file_started is not None and time.time() - self.file_started >= self.max_age
+
+    def _first_entry_time(self):
+        """Timestamp of the first entry in the current file, if any"""
+        try:
+            with open(self.path, 'r') as f:
+                first = json.loads(f.readline())
+            return datetime.datetime.fromisoformat(first["ts"]).timestamp()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def rotate(self):
+        """Shift bot_log.jsonl -> .1 -> .2 ... dropping the oldest backup"""
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file_started = None
+
+    async def run(self):
+        """Flush buffered entries every flush_interval seconds, or sooner when a batch fills up"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush_async()
+            except OSError as e:
+                print(f"Failed to flush log: {e}")
+
+    def start(self):
+        """Start the background flush task"""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def close(self):
+        """Stop the background task and flush what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+
+    def metrics(self):
+        return {
+            'buffered': len(self.buffer),
+            'pending': self.sequence - self.flushed_sequence,
+            'logged': self.sequence,
+            'dropped': self.dropped,
+        }
@@ -6,6 +6,7 @@ import random
 import datetime
 import asyncio
 from discord import app_commands
+import warm_restart
 
 # Constants for Discord Activity
 CHESS_ACTIVITY_ID = "832012774040141894"  # Discord's Chess in the Park activity ID
@@ -204,46 +205,8 @@ class ChessActivityManager:
             
             # Find the match in the matches data
             if match_id in chess_commands.matches["matches"]:
-                match = chess_commands.matches["matches"][match_id]
-                
-                # Update match status
-                match["status"] = "Completed"
-                match["result"] = game["result"]
-                match["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Update player stats
-                player1_id = match["player1_id"]
-                player2_id = match["player2_id"]
-                
-                # Skip updating stats for bye matches
-                if player2_id != "BYE":
-                    # Update player1 stats
-                    if player1_id in chess_commands.players["players"]:
-                        if match_id not in chess_commands.players["players"][player1_id]["matches"]:
-                            chess_commands.players["players"][player1_id]["matches"].append(match_id)
-                        
-                        if game["result"] == "player1":
-                            chess_commands.players["players"][player1_id]["wins"] += 1
-                        elif game["result"] == "player2":
-                            chess_commands.players["players"][player1_id]["losses"] += 1
-                        elif game["result"] == "draw":
-                            chess_commands.players["players"][player1_id]["draws"] += 1
-                    
-                    # Update player2 stats
-                    if player2_id in chess_commands.players["players"]:
-                        if match_id not in chess_commands.players["players"][player2_id]["matches"]:
-                            chess_commands.players["players"][player2_id]["matches"].append(match_id)
-                        
-                        if game["result"] == "player2":
-                            chess_commands.players["players"][player2_id]["wins"] += 1
-                        elif game["result"] == "player1":
-                            chess_commands.players["players"][player2_id]["losses"] += 1
-                        elif game["result"] == "draw":
-                            chess_commands.players["players"][player2_id]["draws"] += 1
-                
-                # Save data
-                chess_commands.save_data(chess_commands.MATCHES_FILE, chess_commands.matches)
-                chess_commands.save_data(chess_commands.PLAYERS_FILE, chess_commands.players)
+                # Record the result and update player stats
+                match = await chess_commands.complete_match(match_id, game["result"])
                 
                 # Try to send a message to the channel
                 if match_id in self.match_channels:
@@ -624,6 +587,21 @@ def add_chess_button_to_match_panel():
     except Exception as e:
         print(f"Error adding chess button to match control panel: {e}")
 
+# Warm restart hooks for the chess activity manager
+def dump_activity_state(bot):
+    """Snapshot active chess activities and their channels"""
+    manager = bot.chess_activity_manager
+    return {
+        "active_games": manager.active_games,
+        "match_channels": manager.match_channels
+    }
+
+def restore_activity_state(bot, state):
+    """Restore active chess activities from a warm restart snapshot"""
+    manager = bot.chess_activity_manager
+    manager.active_games.update(state.get("active_games", {}))
+    manager.match_channels.update({match_id: int(channel_id) for match_id, channel_id in state.get("match_channels", {}).items()})
+
 # Function to initialize the chess activity system
 def initialize(bot):
     """Initialize the chess activity system"""
@@ -637,6 +615,9 @@ def initialize(bot):
         # Try to add the chess button to match panels
         add_chess_button_to_match_panel()
         
+        # Carry active games across restarts
+        warm_restart.register("chess_activity", dump_activity_state, restore_activity_state)
+        
         # Log initialization
         print("Chess activity system initialized")
     except Exception as e:
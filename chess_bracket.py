@@ -0,0 +1,206 @@
+# chess_bracket.py - Elimination brackets as a graph of match nodes
+#
+# A bracket is a plain dict stored in the tournament record:
+#   {"final": node_id, "champion": player_id or None}
+# and a {node_id: node} dict of its nodes, which the owner stores as
+# records of their own so a result only rewrites the nodes it changed
+# (Bracket.changed). Each node is one pairing:
+#   {"id", "section", "stage", "round", "slots": [player1, player2],
+#    "sources": [label, label], "winner_to": [node_id, slot] or None,
+#    "loser_to": [node_id, slot] or None, "match_id", "winner", "loser"}
+# section is "W" (winners), "L" (losers), "GF" (grand final) or "3P"
+# (third place), stage is the round inside that section and round is the
+# tournament round the node is played in. Empty slots are None; "BYE"
+# fills a slot that will never get a player.
+
+
+def seed_order(size):
+    """Bracket positions of seeds 1..size so the top seeds meet last"""
+    order = [1]
+    while len(order) < size:
+        count = len(order) * 2
+        order = [seed for position in order for seed in (position, count + 1 - position)]
+    return order
+
+
+class Bracket:
+    """Operations on a bracket dict; winners move on in O(1) per result"""
+
+    def __init__(self, data, nodes):
+        self.data = data
+        self.nodes = nodes
+        self.changed = set()  # Ids of nodes changed since the owner last saved them
+        self.by_match = {node["match_id"]: node_id for node_id, node in self.nodes.items() if node["match_id"]}
+
+    @classmethod
+    def build(cls, seeds, double=False, third_place=False):
+        """Build a bracket for seeds (best first)"""
+        size = 1
+        while size < len(seeds):
+            size *= 2
+        stages = max(1, size.bit_length() - 1)  # Rounds in the winners bracket
+
+        nodes = {}
+
+        def add(section, stage, round_number, index, sources):
+            node_id = f"{section}{stage}-{index + 1}" if section in ("W", "L") else section
+            nodes[node_id] = {
+                "id": node_id,
+                "section": section,
+                "stage": stage,
+                "round": round_number,
+                "slots": [None, None],
+                "sources": sources,
+                "winner_to": None,
+                "loser_to": None,
+                "match_id": None,
+                "winner": None,
+                "loser": None
+            }
+            return node_id
+
+        def link(source_id, kind, target_id, slot):
+            nodes[source_id][kind] = [target_id, slot]
+            nodes[target_id]["sources"][slot] = f"{kind.split('_')[0].capitalize()} of {source_id}"
+
+        # Winners bracket; stage k is played in tournament round k
+        winners = []
+        for stage in range(1, stages + 1):
+            winners.append([add("W", stage, stage, index, [None, None]) for index in range(size >> stage)])
+        for stage in range(1, stages):
+            for index, node_id in enumerate(winners[stage - 1]):
+                link(node_id, "winner_to", winners[stage][index // 2], index % 2)
+
+        positions = seed_order(size)
+        for index, node_id in enumerate(winners[0]):
+            nodes[node_id]["sources"] = [f"Seed {positions[2 * index]}", f"Seed {positions[2 * index + 1]}"]
+
+        final_id = winners[-1][0]
+
+        if third_place and not double and stages >= 2:
+            third_id = add("3P", 1, stages, 0, [None, None])
+            for slot, node_id in enumerate(winners[-2]):
+                link(node_id, "loser_to", third_id, slot)
+
+        if double:
+            # Losers bracket: odd stages pair survivors among themselves (or the
+            # first round's losers), even stages bring in the next winners
+            # round's losers. Stage s is played in tournament round s + 1.
+            previous = None
+            for j in range(1, stages):
+                count = size >> (j + 1)
+                odd = [add("L", 2 * j - 1, 2 * j, index, [None, None]) for index in range(count)]
+                feeders = winners[0] if j == 1 else previous
+                kind = "loser_to" if j == 1 else "winner_to"
+                for index, node_id in enumerate(feeders):
+                    link(node_id, kind, odd[index // 2], index % 2)
+
+                even = [add("L", 2 * j, 2 * j + 1, index, [None, None]) for index in range(count)]
+                for index, node_id in enumerate(odd):
+                    link(node_id, "winner_to", even[index], 0)
+                # Reverse the drop-in order to delay rematches
+                for index, node_id in enumerate(winners[j]):
+                    link(node_id, "loser_to", even[count - 1 - index], 1)
+                previous = even
+
+            grand_final = add("GF", 1, 2 * stages, 0, [None, None])
+            link(final_id, "winner_to", grand_final, 0)
+            if previous:
+                link(previous[0], "winner_to", grand_final, 1)
+            else:
+                link(final_id, "loser_to", grand_final, 1)
+            final_id = grand_final
+
+        bracket = cls({"final": final_id, "champion": None}, nodes)
+        bracket.changed.update(nodes)
+
+        # Place the seeds; byes resolve straight away
+        for index, node_id in enumerate(winners[0]):
+            for slot in range(2):
+                seed = positions[2 * index + slot]
+                bracket._place([node_id, slot], seeds[seed - 1] if seed <= len(seeds) else "BYE", [])
+        return bracket
+
+    def rounds(self):
+        """Tournament rounds needed to finish the bracket"""
+        return max(node["round"] for node in self.nodes.values())
+
+    def ready_nodes(self, round_number):
+        """Nodes of a round whose players are both known and have no match yet"""
+        return [
+            node for node in self.nodes.values()
+            if node["round"] == round_number and node["match_id"] is None and node["winner"] is None
+            and None not in node["slots"]
+        ]
+
+    def node_for_match(self, match_id):
+        node_id = self.by_match.get(match_id)
+        return self.nodes[node_id] if node_id else None
+
+    def assign(self, node, match_id):
+        """Attach a (new) match to a node; a replay replaces the drawn match"""
+        if node["match_id"]:
+            self.by_match.pop(node["match_id"], None)
+        node["match_id"] = match_id
+        self.by_match[match_id] = node["id"]
+        self.changed.add(node["id"])
+
+    def record_result(self, match_id, winner, loser):
+        """Move the winner and loser of a match on; returns nodes that became ready"""
+        node = self.node_for_match(match_id)
+        if node is None or node["winner"] is not None:
+            return []
+        ready = []
+        self._resolve(node, winner, loser, ready)
+        return ready
+
+    def _resolve(self, node, winner, loser, ready):
+        node["winner"] = winner
+        node["loser"] = loser
+        self.changed.add(node["id"])
+        if node["id"] == self.data["final"]:
+            self.data["champion"] = winner
+        if node["winner_to"]:
+            self._place(node["winner_to"], winner, ready)
+        if node["loser_to"]:
+            self._place(node["loser_to"], loser, ready)
+
+    def _place(self, target, player, ready):
+        node = self.nodes[target[0]]
+        node["slots"][target[1]] = player
+        self.changed.add(node["id"])
+        if None in node["slots"]:
+            return
+        if "BYE" in node["slots"]:
+            # Whoever faces a bye (or nobody, for two byes) goes through without a game
+            other = node["slots"][1] if node["slots"][0] == "BYE" else node["slots"][0]
+            self._resolve(node, other, "BYE", ready)
+        else:
+            ready.append(node)
+
+    def export_layout(self):
+        """Sections, stages and nodes in display order, for rendering"""
+        order = {"W": 0, "L": 1, "3P": 2, "GF": 3}
+        sections = {}
+        for node in self.nodes.values():
+            stages = sections.setdefault(node["section"], {})
+            stages.setdefault(node["stage"], []).append({
+                "id": node["id"],
+                "round": node["round"],
+                "players": list(node["slots"]),
+                "sources": list(node["sources"]),
+                "winner": node["winner"],
+                "match_id": node["match_id"],
+                "winner_to": node["winner_to"][0] if node["winner_to"] else None,
+                "loser_to": node["loser_to"][0] if node["loser_to"] else None
+            })
+        return {
+            "sections": [
+                {
+                    "name": section,
+                    "stages": [{"stage": stage, "nodes": stages[stage]} for stage in sorted(stages)]
+                }
+                for section, stages in sorted(sections.items(), key=lambda item: order[item[0]])
+            ],
+            "champion": self.data["champion"]
+        }
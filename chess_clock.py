@@ -0,0 +1,254 @@
+# chess_clock.py - Chess clocks whose expiries run off one hierarchical timer wheel
+#
+# A clock is a plain dict stored in the match record:
+#   {"mode", "base", "increment", "remaining": {"w": seconds, "b": seconds},
+#    "turn": "w", "b" or None when stopped, "started_at": wall time the turn began}
+# mode is "fischer" (increment added after each move), "bronstein" (up to
+# the increment of the time used is given back), "delay" (the clock waits
+# for the increment before running) or "correspondence" (base seconds for
+# every move). Running turns are timed with time.monotonic(); started_at
+# only carries them across a restart.
+import asyncio
+import math
+import re
+import time
+
+TICK = 0.5  # Seconds per timer wheel slot
+
+MODES = ["fischer", "bronstein", "delay", "correspondence"]
+
+
+def parse_time_control(text):
+    """Parse "10+5", "10+5 bronstein", "10+5 delay" or "3 days"; raises ValueError"""
+    text = text.strip().lower()
+    found = re.match(r"^(\d+(?:\.\d+)?)\s*(?:days?|d)$", text)
+    if found:
+        return {"mode": "correspondence", "base": float(found.group(1)) * 86400, "increment": 0}
+    found = re.match(r"^(\d+(?:\.\d+)?)\s*\+\s*(\d+)\s*(fischer|bronstein|delay)?$", text)
+    if not found:
+        raise ValueError(f"Unknown time control: {text}")
+    return {"mode": found.group(3) or "fischer", "base": float(found.group(1)) * 60, "increment": int(found.group(2))}
+
+
+def describe_time_control(control):
+    if control["mode"] == "correspondence":
+        return f"{control['base'] / 86400:g} days per move"
+    text = f"{control['base'] / 60:g}+{control['increment']}"
+    return text if control["mode"] == "fischer" else f"{text} {control['mode']}"
+
+
+def new_clock(control):
+    """A stopped clock with the full base time on both sides"""
+    return {
+        "mode": control["mode"],
+        "base": control["base"],
+        "increment": control["increment"],
+        "remaining": {"w": control["base"], "b": control["base"]},
+        "turn": None,
+        "started_at": None
+    }
+
+
+def time_left(clock, elapsed):
+    """Time left for the side to move after elapsed seconds of its turn"""
+    remaining = clock["remaining"][clock["turn"]]
+    if clock["mode"] == "delay":
+        return remaining - max(0, elapsed - clock["increment"])
+    return remaining - elapsed
+
+
+def format_time(seconds):
+    seconds = max(0, math.ceil(seconds))
+    if seconds >= 86400:
+        return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class TimerWheel:
+    """Hierarchical timing wheel: O(1) schedule and cancel, and advancing only
+    touches the slots that come due (plus an occasional cascade from the
+    coarser levels). With 64 slots and 4 levels of 0.5 s ticks it covers
+    about 97 days before timers wait in the overflow list."""
+
+    def __init__(self, tick=TICK, slots=64, levels=4, now=None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.overflow = set()
+        self.timers = {}  # key -> (expiry tick, level, slot); level None for overflow
+        self.current = int((time.monotonic() if now is None else now) // tick)
+
+    def __len__(self):
+        return len(self.timers)
+
+    def schedule(self, key, deadline):
+        """(Re)schedule key to expire at monotonic time deadline"""
+        self.cancel(key)
+        self._insert(key, max(math.ceil(deadline / self.tick), self.current + 1))
+
+    def cancel(self, key):
+        entry = self.timers.pop(key, None)
+        if entry is None:
+            return
+        _, level, slot = entry
+        if level is None:
+            self.overflow.discard(key)
+        else:
+            self.wheels[level][slot].discard(key)
+
+    def _insert(self, key, expires):
+        delta = expires - self.current
+        span = self.slots
+        for level in range(self.levels):
+            if delta < span:
+                slot = expires * self.slots // span % self.slots
+                self.wheels[level][slot].add(key)
+                self.timers[key] = (expires, level, slot)
+                return
+            span *= self.slots
+        self.overflow.add(key)
+        self.timers[key] = (expires, None, None)
+
+    def advance(self, now):
+        """Move the wheel to monotonic time now; returns the keys that expired"""
+        target = int(now // self.tick)
+        expired = []
+        while self.current < target:
+            self.current += 1
+
+            # Each time a level wraps, the next slot of the level above moves down
+            span = self.slots
+            for level in range(1, self.levels):
+                if self.current % span:
+                    break
+                slot = self.current // span % self.slots
+                bucket, self.wheels[level][slot] = self.wheels[level][slot], set()
+                for key in bucket:
+                    self._insert(key, self.timers[key][0])
+                span *= self.slots
+            else:
+                if self.current % span == 0 and self.overflow:
+                    waiting, self.overflow = self.overflow, set()
+                    for key in waiting:
+                        self._insert(key, self.timers[key][0])
+
+            slot = self.current % self.slots
+            bucket, self.wheels[0][slot] = self.wheels[0][slot], set()
+            for key in bucket:
+                del self.timers[key]
+                expired.append(key)
+        return expired
+
+
+class ClockManager:
+    """Runs the clocks of all live matches off one timer wheel and one task"""
+
+    def __init__(self):
+        self.wheel = TimerWheel()
+        self.clocks = {}  # match_id -> clock dict (shared with the match record)
+        self.started = {}  # match_id -> monotonic time the running turn began
+        self._task = None
+
+    def reset(self):
+        self.wheel = TimerWheel()
+        self.clocks.clear()
+        self.started.clear()
+
+    def start(self, match_id, clock, turn="w"):
+        """Start timing a side's turn"""
+        clock["turn"] = turn
+        clock["started_at"] = time.time()
+        self.clocks[match_id] = clock
+        self.started[match_id] = time.monotonic()
+        self._schedule(match_id)
+
+    def restore(self, match_id, clock):
+        """Pick up a running clock loaded from storage"""
+        if clock.get("turn") is None:
+            return
+        self.clocks[match_id] = clock
+        self.started[match_id] = time.monotonic() - max(0, time.time() - clock["started_at"])
+        self._schedule(match_id)
+
+    def _schedule(self, match_id):
+        clock = self.clocks[match_id]
+        # time_left() falls by at most one second per second, so it hits zero
+        # no earlier than this
+        deadline = self.started[match_id] + clock["remaining"][clock["turn"]]
+        if clock["mode"] == "delay":
+            deadline += clock["increment"]
+        self.wheel.schedule(match_id, deadline)
+
+    def elapsed(self, match_id):
+        return time.monotonic() - self.started[match_id]
+
+    def remaining(self, match_id):
+        """Live time left for both sides"""
+        clock = self.clocks[match_id]
+        remaining = dict(clock["remaining"])
+        remaining[clock["turn"]] = time_left(clock, self.elapsed(match_id))
+        return remaining
+
+    def press(self, match_id):
+        """End the running side's turn after a move; returns False if its flag had already fallen"""
+        clock = self.clocks.get(match_id)
+        if clock is None:
+            return True
+        elapsed = self.elapsed(match_id)
+        left = time_left(clock, elapsed)
+        if left <= 0:
+            return False
+
+        mover = clock["turn"]
+        if clock["mode"] == "fischer":
+            left += clock["increment"]
+        elif clock["mode"] == "bronstein":
+            left += min(clock["increment"], elapsed)
+        elif clock["mode"] == "correspondence":
+            left = clock["base"]
+        clock["remaining"][mover] = left
+        self.start(match_id, clock, "b" if mover == "w" else "w")
+        return True
+
+    def stop(self, match_id):
+        """Stop a clock, keeping the time left on it"""
+        clock = self.clocks.pop(match_id, None)
+        if clock is None:
+            return
+        clock["remaining"][clock["turn"]] = max(0, time_left(clock, self.elapsed(match_id)))
+        clock["turn"] = None
+        clock["started_at"] = None
+        self.started.pop(match_id, None)
+        self.wheel.cancel(match_id)
+
+    def expired(self, now=None):
+        """Match ids whose running side is out of time"""
+        now = time.monotonic() if now is None else now
+        flagged = []
+        for match_id in self.wheel.advance(now):
+            if match_id not in self.clocks:
+                continue
+            if time_left(self.clocks[match_id], now - self.started[match_id]) <= 0:
+                flagged.append(match_id)
+            else:
+                self._schedule(match_id)
+        return flagged
+
+    async def run(self, on_flag):
+        """Advance the wheel every tick and await on_flag(match_id) for each flag fall"""
+        while True:
+            await asyncio.sleep(TICK)
+            for match_id in self.expired():
+                try:
+                    await on_flag(match_id)
+                except Exception as e:
+                    print(f"Error handling flag fall for match {match_id}: {e}")
+
+    def start_task(self, on_flag):
+        """Start the background task that drives every clock"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(on_flag))
+        return self._task
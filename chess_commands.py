@@ -1,5 +1,6 @@
 import asyncio
 import discord
+import io
 from discord import app_commands
 from discord.ext import commands
 import datetime
@@ -7,65 +8,208 @@ import json
 import os
 import random
 import string
+import tempfile
+import time
+from collections import Counter
 from typing import Optional, List, Dict, Any
 
+from chess_journal import ChessJournal
+from chess_storage import ChessRepository
+from chess_index import RoundIndex, TicketIndex
+from chess_standings import StandingsEngine
+from chess_pairing import PairingHistory, berger_round, berger_rounds, pair_swiss
+from chess_bracket import Bracket
+from chess_tiebreaks import TIEBREAKS, DEFAULT_TIEBREAKS, parse_tiebreaks
+from chess_ratings import period_id, rate_period
+from chess_leaderboard import Leaderboard, PAGE_SIZE
+from chess_engine import (
+    START_FEN, IllegalMoveError, Position, decode_move, encode_move, movetext, pack_codes, pack_hashes, pack_moves,
+    san_moves, unpack_codes, unpack_hashes
+)
+from chess_render import render_board
+from chess_clock import ClockManager, describe_time_control, format_time, new_clock, parse_time_control
+from chess_export import pgn_game, pgn_games, trf_lines, write_export
+from chess_import import read_import
+from persistence import worker, snapshot_json, write_atomic
+import warm_restart
+
 # File paths for data storage
 DATA_DIR = "data"
 TOURNAMENTS_FILE = 'data/chess/tournaments.json'
 MATCHES_FILE = 'data/chess/matches.json'
 PLAYERS_FILE = 'data/chess/players.json'
 TICKETS_FILE = 'data/chess/tickets.json'
+BRACKET_NODES_FILE = 'data/chess/bracket_nodes.json'
+
+# Persistence mode: "journal" appends changed records and compacts in the
+# background, "json" rewrites the whole file on every save and "sqlite"
+# stores records in an indexed SQLite database (see chess_storage.py)
+PERSISTENCE_MODE = os.environ.get('CHESS_PERSISTENCE', 'journal')
+DB_FILE = os.environ.get('CHESS_DB_FILE', 'data/chess/chess.db')
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
+os.makedirs(os.path.dirname(TOURNAMENTS_FILE), exist_ok=True)
 
 # Initialize data structures
 tournaments = {"tournaments": {}}
 matches = {"matches": {}}
 players = {"players": {}}
 tickets = {"tickets": {}}
+bracket_nodes = {"bracket_nodes": {}}  # "tournament_id/node_id" -> bracket node
 
-# Load data from files
-def load_data():
-    """Load data from JSON files"""
-    global tournaments, matches, players, tickets
+# SQLite repository, opened by load_data() in sqlite mode
+repository = None
+
+# (tournament_id, round) -> match ids and status counts, rebuilt by load_data()
+round_index = RoundIndex()
+
+# match_id / channel_id -> ticket_id, rebuilt by load_data()
+ticket_index = TicketIndex()
+
+# Per-tournament standings, built on first use and updated by complete_match()
+standings_engine = StandingsEngine()
+
+# tournament_id -> PairingHistory, built on first use and updated as matches are created
+pairing_histories = {}
+
+# tournament_id -> Bracket over the tournament's bracket record and nodes
+brackets = {}
+
+# match_id -> array('H') of move codes, loaded from the match on first use;
+# pack_history() writes it back to the record when the match is saved
+move_codes = {}
+
+# match_id -> [SAN, ...], derived when move text is shown
+move_sans = {}
+
+# match_id -> [array of position hashes, Counter of the hashes since the
+# last pawn move or capture], loaded from the match on first use and
+# written back by pack_history()
+position_histories = {}
+
+# Running chess clocks, restored from the match records by load_data()
+clocks = ClockManager()
+
+# Formats played as a bracket (see chess_bracket.py)
+ELIMINATION_FORMATS = ["Single Elimination", "Double Elimination"]
+
+# Journal for record-level writes
+journal = ChessJournal(
+    compact_threshold=int(os.environ.get('CHESS_JOURNAL_COMPACT_THRESHOLD', 500)),
+    compact_interval=int(os.environ.get('CHESS_JOURNAL_COMPACT_INTERVAL', 60)),
+    worker=worker
+)
+
+def data_files():
+    """Map each data file to the structure stored in it"""
+    return {
+        TOURNAMENTS_FILE: tournaments,
+        MATCHES_FILE: matches,
+        PLAYERS_FILE: players,
+        TICKETS_FILE: tickets,
+        BRACKET_NODES_FILE: bracket_nodes
+    }
+
+def load_file(file_path, key):
+    """Load a snapshot file and replay its journal on top"""
+    if PERSISTENCE_MODE == "sqlite":
+        return {key: repository.load_all(key)}
     
-    # Load tournaments
+    missing = False
     try:
-        with open(TOURNAMENTS_FILE, 'r') as f:
-            tournaments = json.load(f)
+        with open(file_path, 'r') as f:
+            data = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
-        tournaments = {"tournaments": {}}
-        save_data(TOURNAMENTS_FILE, tournaments)
+        data = {key: {}}
+        missing = True
     
-    # Load matches
-    try:
-        with open(MATCHES_FILE, 'r') as f:
-            matches = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        matches = {"matches": {}}
-        save_data(MATCHES_FILE, matches)
+    data.setdefault(key, {})
+    if PERSISTENCE_MODE == "journal":
+        journal.replay(file_path, data[key])
     
-    # Load players
-    try:
-        with open(PLAYERS_FILE, 'r') as f:
-            players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        players = {"players": {}}
-        save_data(PLAYERS_FILE, players)
+    if missing:
+        save_data_blocking(file_path, data)
     
-    # Load tickets
-    try:
-        with open(TICKETS_FILE, 'r') as f:
-            tickets = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        tickets = {"tickets": {}}
-        save_data(TICKETS_FILE, tickets)
+    return data
+
+# Load data from files
+def load_data():
+    """Load data from JSON files"""
+    global tournaments, matches, players, tickets, bracket_nodes, repository
+    
+    if PERSISTENCE_MODE == "sqlite" and repository is None:
+        repository = ChessRepository(DB_FILE)
+    
+    tournaments = load_file(TOURNAMENTS_FILE, "tournaments")
+    matches = load_file(MATCHES_FILE, "matches")
+    players = load_file(PLAYERS_FILE, "players")
+    tickets = load_file(TICKETS_FILE, "tickets")
+    bracket_nodes = load_file(BRACKET_NODES_FILE, "bracket_nodes")
+    
+    round_index.rebuild(matches["matches"])
+    ticket_index.rebuild(tickets["tickets"])
+    standings_engine.reset()
+    pairing_histories.clear()
+    brackets.clear()
+    leaderboard.rebuild(players["players"])
+    move_codes.clear()
+    move_sans.clear()
+    position_histories.clear()
+    clocks.reset()
+    for match_id, match in matches["matches"].items():
+        if match.get("clock") and match["status"] != "Completed":
+            clocks.restore(match_id, match["clock"])
+    
+    upgraded_match_ids = [match_id for match_id, match in matches["matches"].items() if upgrade_moves(match)]
+    if upgraded_match_ids:
+        save_data_blocking(MATCHES_FILE, matches, upgraded_match_ids)
 
 # Save data to files
-def save_data(file_path, data):
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=4)
+def save_jobs(file_path, data, keys=None):
+    """Persistence worker jobs as (func, args, coalescing key) that write data"""
+    # Serialization and writes run on the persistence worker thread. Anything
+    # it iterates over is copied here first because the event loop keeps
+    # mutating the live dicts.
+    collection_name = next(iter(data))
+    collection = data[collection_name]
+    
+    if PERSISTENCE_MODE == "sqlite":
+        if keys is None:
+            return [(repository.replace_all, (collection_name, dict(collection)), None)]
+        records = {key: collection[key] for key in keys if key in collection}
+        return [(repository.save, (collection_name, records, list(keys)), None)]
+    elif PERSISTENCE_MODE == "journal":
+        if keys is None:
+            return [(journal.write_snapshot, (file_path, data), ("snapshot", file_path))]
+        return [(journal.append, (file_path, collection, list(keys)), None)]
+    return [(write_json, (file_path, data), ("snapshot", file_path))]
+
+async def save_data(file_path, data, keys=None):
+    """Queue data to be persisted; with keys, only those records are written"""
+    for func, args, key in save_jobs(file_path, data, keys):
+        await worker.submit_async(func, *args, key=key)
+
+def save_data_blocking(file_path, data, keys=None):
+    """save_data() for synchronous code; waits on a full worker queue
+
+    Only load_data() uses it, before the bot connects and anything else is
+    queued, so the queue always has room.
+    """
+    for func, args, key in save_jobs(file_path, data, keys):
+        worker.submit(func, *args, key=key)
+
+def write_json(file_path, data):
+    """Rewrite a whole data file (runs on the persistence worker)"""
+    write_atomic(file_path, snapshot_json(data, indent=4))
+
+def compact_data():
+    """Fold all pending journal records into the snapshot files and wait for pending writes"""
+    if PERSISTENCE_MODE == "journal":
+        worker.submit(journal.close, data_files())
+    elif PERSISTENCE_MODE == "sqlite" and repository is not None:
+        worker.submit(repository.checkpoint)
+    worker.drain()
 
 # Load all data
 #tournaments = load_data(TOURNAMENTS_FILE, tournaments)
@@ -98,6 +242,309 @@ def get_rating_tier(rating):
     else:
         return "Beginner"
 
+# Players by rating, rebuilt by load_data() and updated as ratings change
+leaderboard = Leaderboard(get_rating_tier)
+
+# Get the standings table for a tournament
+def tournament_standings(tournament_id):
+    """Return the cached standings for a tournament, building them if needed"""
+    table = standings_engine.get(tournament_id)
+    if table is None:
+        table = standings_engine.build(tournaments["tournaments"][tournament_id], matches["matches"], players["players"])
+    return table
+
+# Get the pairing history for a tournament
+def pairing_history(tournament_id):
+    """Return the cached pairing history for a tournament, building it if needed"""
+    if tournament_id not in pairing_histories:
+        pairing_histories[tournament_id] = PairingHistory().build(tournaments["tournaments"][tournament_id], matches["matches"])
+    return pairing_histories[tournament_id]
+
+# Get the bracket for an elimination tournament
+def bracket_node_key(tournament_id, node_id):
+    return f"{tournament_id}/{node_id}"
+
+def tournament_bracket(tournament_id):
+    """Return the Bracket of a tournament, or None if it has none"""
+    if tournament_id not in brackets:
+        tournament = tournaments["tournaments"][tournament_id]
+        if "bracket" not in tournament:
+            return None
+        prefix = bracket_node_key(tournament_id, "")
+        nodes = {
+            node["id"]: node for key, node in bracket_nodes["bracket_nodes"].items()
+            if key.startswith(prefix)
+        }
+        brackets[tournament_id] = Bracket(tournament["bracket"], nodes)
+    return brackets[tournament_id]
+
+async def save_bracket(tournament_id):
+    """Persist the bracket nodes changed since the last save"""
+    bracket = brackets.get(tournament_id)
+    if bracket is None or not bracket.changed:
+        return
+    keys = [bracket_node_key(tournament_id, node_id) for node_id in bracket.changed]
+    bracket.changed.clear()
+    await save_data(BRACKET_NODES_FILE, bracket_nodes, keys)
+
+# Move an elimination result through the bracket
+async def advance_bracket(match):
+    """Send the winner and loser of a bracket match on, or replay it if drawn"""
+    tournament = tournaments["tournaments"].get(match.get("tournament_id"))
+    if not tournament or "bracket" not in tournament:
+        return
+    
+    bracket = tournament_bracket(tournament["id"])
+    node = bracket.node_for_match(match["id"])
+    if node is None or node["winner"] is not None:
+        return
+    
+    champion = bracket.data["champion"]
+    created_match_ids = []
+    if match["result"] == "draw":
+        # Elimination games need a winner; replay with colours reversed
+        replay_id = create_match(tournament, match["round"], match["player2_id"], match["player1_id"])
+        bracket.assign(node, replay_id)
+        created_match_ids.append(replay_id)
+    else:
+        if match["result"] == "player1":
+            winner_id, loser_id = match["player1_id"], match["player2_id"]
+        else:
+            winner_id, loser_id = match["player2_id"], match["player1_id"]
+        
+        for ready in bracket.record_result(match["id"], winner_id, loser_id):
+            # Pairings for rounds already under way are played straight away
+            if ready["round"] <= tournament["current_round"]:
+                match_id = create_match(tournament, tournament["current_round"], *ready["slots"])
+                bracket.assign(ready, match_id)
+                created_match_ids.append(match_id)
+    
+    # Only the nodes the result touched are written; the tournament record
+    # itself changes only when it gains matches or a champion
+    await save_data(MATCHES_FILE, matches, created_match_ids)
+    await save_bracket(tournament["id"])
+    if created_match_ids or bracket.data["champion"] != champion:
+        await save_data(TOURNAMENTS_FILE, tournaments, [tournament["id"]])
+
+# Look up the ticket for a match
+def ticket_for_match(match_id):
+    """Return the ticket for a match, or None if it has none"""
+    ticket_id = ticket_index.for_match(match_id)
+    return tickets["tickets"].get(ticket_id) if ticket_id else None
+
+# Render the board of a match
+async def board_image(fen, last_move=None):
+    """Board PNG as a Discord attachment, shown from the side to move"""
+    png = await render_board(fen, orientation=fen.split()[1], last_move=last_move)
+    return discord.File(io.BytesIO(png), filename="board.png")
+
+# Board move history
+def upgrade_moves(match):
+    """Pack a match's old list of move strings; returns True if the match changed"""
+    if "moves" not in match:
+        return False
+    if not match["moves"]:
+        del match["moves"]
+        match.setdefault("packed_moves", "")
+        return True
+    
+    # Lists recorded before moves were validated may not replay; keep those as they are
+    position = Position(match.get("start_fen", START_FEN))
+    moves = []
+    try:
+        for text in match["moves"]:
+            move = position.parse_san(text.split(". ")[-1])
+            position.push(move)
+            moves.append(move)
+    except (IllegalMoveError, ValueError):
+        return False
+    match["packed_moves"] = pack_moves(moves)
+    del match["moves"]
+    return True
+
+def match_codes(match):
+    """A match's move codes, decoded from the record once and then kept in memory"""
+    codes = move_codes.get(match["id"])
+    if codes is None:
+        codes = move_codes[match["id"]] = unpack_codes(match.get("packed_moves", ""))
+    return codes
+
+def record_move(match, move, san):
+    """Append a played move to a match's move history (packed into the record by pack_history())"""
+    codes = match_codes(match)
+    codes.append(encode_move(move))
+    
+    # Keep derived SAN in step if it was already built
+    sans = move_sans.get(match["id"])
+    if sans is not None and len(sans) == len(codes) - 1:
+        sans.append(san)
+
+def pack_history(match):
+    """Write a match's in-memory move and position history back to its record, before it is saved"""
+    codes = move_codes.get(match["id"])
+    if codes is not None:
+        match["packed_moves"] = pack_codes(codes)
+    entry = position_histories.get(match["id"])
+    if entry is not None:
+        match["position_hashes"] = pack_hashes(entry[0])
+
+def match_movetext(match):
+    """Numbered SAN move text of a match (e.g. "1. e4 e5"), or "" before any move"""
+    if "packed_moves" not in match:
+        return " ".join(match.get("moves", []))
+    
+    codes = match_codes(match)
+    start_fen = match.get("start_fen", START_FEN)
+    sans = move_sans.get(match["id"])
+    if sans is None or len(sans) != len(codes):
+        sans = move_sans[match["id"]] = san_moves([decode_move(code) for code in codes], start_fen)
+    return movetext(sans, start_fen)
+
+def position_history(match, reversible):
+    """[hashes, counts] of a match's positions; counts start from the last reversible stored hashes"""
+    entry = position_histories.get(match["id"])
+    if entry is None:
+        hashes = unpack_hashes(match.get("position_hashes", ""))
+        counts = Counter(hashes[max(0, len(hashes) - reversible):] if reversible else [])
+        entry = position_histories[match["id"]] = [hashes, counts]
+    return entry
+
+def record_position(match, position):
+    """Add the position after a move to the match's hash history; returns how often it has occurred"""
+    hashes, counts = position_history(match, position.halfmove)
+    if position.halfmove == 0:
+        # Nothing before a pawn move or capture can come back
+        counts.clear()
+    hashes.append(position.hash)
+    counts[position.hash] += 1
+    return counts[position.hash]
+
+def position_repetitions(match, position):
+    """How often the current position of a match has occurred"""
+    _, counts = position_history(match, position.halfmove + 1)
+    return max(counts[position.hash], 1)
+
+# Record the result of a match
+def result_stats(match, result):
+    """The win/loss/draw counter each player of a match gets for a result"""
+    player1_id = match["player1_id"]
+    player2_id = match["player2_id"]
+    
+    if player2_id == "BYE":
+        # A bye counts as a win for the player who received it
+        return {player1_id: "wins"}
+    elif result == "draw":
+        return {player1_id: "draws", player2_id: "draws"}
+    elif result == "player1":
+        return {player1_id: "wins", player2_id: "losses"}
+    return {player1_id: "losses", player2_id: "wins"}
+
+async def complete_match(match_id, result, reported_by=None, save=True):
+    """Mark a match completed, update player stats and the round index, and save unless save is False
+
+    Re-reporting a completed match replaces its result rather than counting it twice.
+    """
+    match = matches["matches"][match_id]
+    previous = match.get("result") if match["status"] == "Completed" else None
+    
+    match["status"] = "Completed"
+    match["result"] = result
+    match["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if reported_by is not None:
+        match["reported_by"] = reported_by
+    round_index.set_status(match_id, "Completed")
+    standings_engine.record(match)
+    clocks.stop(match_id)
+    
+    # Take back the counters of the result being replaced
+    if previous is not None:
+        for player_id, stat in result_stats(match, previous).items():
+            if player_id in players["players"]:
+                player = players["players"][player_id]
+                player[stat] = max(0, player[stat] - 1)
+    
+    updated_player_ids = []
+    for player_id, stat in result_stats(match, result).items():
+        if player_id in players["players"]:
+            player = players["players"][player_id]
+            player[stat] += 1
+            if match_id not in player["matches"]:
+                player["matches"].append(match_id)
+            updated_player_ids.append(player_id)
+    
+    # Ratings change once per round, when its last result comes in; a
+    # re-reported result re-rates the round
+    if round_index.is_round_complete(match["tournament_id"], match["round"]):
+        updated_player_ids += rate_round(match["tournament_id"], match["round"])
+    
+    if save:
+        await save_data(MATCHES_FILE, matches, [match_id])
+        await save_data(PLAYERS_FILE, players, list(dict.fromkeys(updated_player_ids)))
+    
+    # The bracket already moved on from an unchanged result
+    if result != previous:
+        await advance_bracket(match)
+    
+    return match
+
+# Rate a finished round
+def rate_round(tournament_id, round_number):
+    """Apply one Glicko-2 rating period for the games of a round; returns updated player ids"""
+    scores = {"player1": 1, "player2": 0, "draw": 0.5}
+    games = []
+    for match_id in round_index.match_ids(tournament_id, round_number):
+        match = matches["matches"][match_id]
+        if match["player2_id"] != "BYE" and match.get("result") in scores:
+            games.append((match["player1_id"], match["player2_id"], scores[match["result"]]))
+    
+    updated_player_ids = rate_period(period_id(tournament_id, round_number), games, players["players"])
+    for player_id in updated_player_ids:
+        player = players["players"][player_id]
+        player["tier"] = get_rating_tier(player["rating"])
+        leaderboard.update(player)
+    return updated_player_ids
+
+# Chess clocks
+def clock_text(match_id):
+    """Remaining time of both sides, or None if the match has no clock"""
+    clock = matches["matches"][match_id].get("clock")
+    if not clock:
+        return None
+    remaining = clocks.remaining(match_id) if match_id in clocks.clocks else clock["remaining"]
+    text = f"White {format_time(remaining['w'])} | Black {format_time(remaining['b'])}"
+    if clock["mode"] == "correspondence":
+        text += " (to move)"
+    return text
+
+async def flag_fall(bot, match_id):
+    """End a match whose side to move ran out of time"""
+    match = matches["matches"].get(match_id)
+    if not match or match["status"] == "Completed":
+        return
+
+    # The side out of time loses, unless the opponent could never mate
+    flagged = match["clock"]["turn"]
+    position = Position(match.get("current_fen", START_FEN))
+    if not position.has_mating_material("b" if flagged == "w" else "w"):
+        result = "draw"
+        message = "⏱ **Time!** The opponent cannot checkmate, so the match is drawn."
+    else:
+        result = "player2" if flagged == "w" else "player1"
+        loser_name = match["player1_name"] if flagged == "w" else match["player2_name"]
+        winner_name = match["player2_name"] if flagged == "w" else match["player1_name"]
+        if match["clock"]["mode"] == "correspondence":
+            message = f"⏱ **{loser_name}** missed the move deadline. **{winner_name}** wins the match!"
+        else:
+            message = f"⏱ **{loser_name}** ran out of time. **{winner_name}** wins the match!"
+
+    await complete_match(match_id, result, str(bot.user.id) if bot.user else None)
+
+    ticket = ticket_for_match(match_id)
+    channel = bot.get_channel(int(ticket["channel_id"])) if ticket else None
+    if channel:
+        await channel.send(message)
+        await MatchTicketSystem.close_match_ticket(channel.guild, match_id)
+
 # Match ticket system
 class MatchTicketSystem:
     @staticmethod
@@ -108,6 +555,13 @@ class MatchTicketSystem:
             
         match = matches["matches"][match_id]
         
+        # Reuse the existing ticket channel for this match
+        ticket = ticket_for_match(match_id)
+        if ticket:
+            channel = guild.get_channel(int(ticket["channel_id"]))
+            if channel:
+                return channel
+        
         # Get player objects
         player1_id = match["player1_id"]
         player2_id = match["player2_id"]
@@ -176,8 +630,9 @@ class MatchTicketSystem:
                 "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "status": "Open"
             }
+            ticket_index.add(ticket_id, tickets["tickets"][ticket_id])
             
-            save_data(TICKETS_FILE, tickets)
+            await save_data(TICKETS_FILE, tickets, [ticket_id])
             
             # Send welcome message
             tournament_name = "Unknown Tournament"
@@ -223,7 +678,7 @@ class MatchTicketSystem:
     async def create_chess_board(channel, match_id):
         """Create an interactive chess board in the channel"""
         # Initial chess board state (FEN: starting position)
-        initial_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+        initial_fen = START_FEN
         
         # Create the board message
         board_embed = discord.Embed(
@@ -232,36 +687,48 @@ class MatchTicketSystem:
             color=discord.Color.green()
         )
         
-        # Add the chess board image (using an external API)
-        board_embed.set_image(url=f"https://chessboardimage.com/{initial_fen}.png")
+        # Add the chess board image
+        board_file = await board_image(initial_fen)
+        board_embed.set_image(url="attachment://board.png")
+        
+        # Start White's clock if the tournament plays with one
+        match = matches["matches"].get(match_id)
+        tournament = tournaments["tournaments"].get(match["tournament_id"]) if match else None
+        if tournament and tournament.get("time_control"):
+            match["clock"] = new_clock(tournament["time_control"])
+            clocks.start(match_id, match["clock"], "w")
+            board_embed.add_field(name="Clock", value=clock_text(match_id), inline=False)
         
         # Create the chess board view
         view = ChessBoardView(match_id, initial_fen)
         
         # Send the board
-        board_message = await channel.send(embed=board_embed, view=view)
+        board_message = await channel.send(embed=board_embed, file=board_file, view=view)
+        view.message_id = board_message.id
+        board_views[match_id] = view
         
         # Store the message ID for future updates
         if match_id in matches["matches"]:
             matches["matches"][match_id]["board_message_id"] = str(board_message.id)
             matches["matches"][match_id]["current_fen"] = initial_fen
-            matches["matches"][match_id]["moves"] = []
-            save_data(MATCHES_FILE, matches)
+            matches["matches"][match_id]["start_fen"] = initial_fen
+            matches["matches"][match_id]["last_move"] = None
+            matches["matches"][match_id]["packed_moves"] = ""
+            matches["matches"][match_id]["position_hashes"] = pack_hashes([Position(initial_fen).hash])
+            matches["matches"][match_id].pop("moves", None)
+            move_codes.pop(match_id, None)
+            move_sans.pop(match_id, None)
+            position_histories.pop(match_id, None)
+            await save_data(MATCHES_FILE, matches, [match_id])
     
     @staticmethod
     async def close_match_ticket(guild, match_id):
         """Close a match ticket when the match is completed"""
         # Find the ticket for this match
-        ticket_id = None
-        for tid, ticket in tickets["tickets"].items():
-            if ticket["match_id"] == match_id:
-                ticket_id = tid
-                break
-                
-        if not ticket_id:
+        ticket = ticket_for_match(match_id)
+        if not ticket:
             return
-            
-        ticket = tickets["tickets"][ticket_id]
+        ticket_id = ticket["id"]
         
         # Get the channel
         try:
@@ -271,7 +738,7 @@ class MatchTicketSystem:
                 
             # Update ticket status
             ticket["status"] = "Closed"
-            save_data(TICKETS_FILE, tickets)
+            await save_data(TICKETS_FILE, tickets, [ticket_id])
             
             # Send closing message
             match = matches["matches"][match_id]
@@ -293,8 +760,8 @@ class MatchTicketSystem:
             embed.add_field(name="Reported By", value=f"<@{match['reported_by']}>", inline=True)
             embed.add_field(name="Completed At", value=match["completed_at"], inline=True)
             
-            if "moves" in match and match["moves"]:
-                pgn = " ".join(match["moves"])
+            pgn = match_movetext(match)
+            if pgn:
                 embed.add_field(name="Game Moves (PGN)", value=f"```{pgn}```", inline=False)
             
             await channel.send(embed=embed)
@@ -316,7 +783,7 @@ class MatchTicketSystem:
                 # Schedule channel for deletion (in a real bot, you'd use a task for this)
                 # For now, we'll just mark it for deletion
                 ticket["scheduled_for_deletion"] = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
-                save_data(TICKETS_FILE, tickets)
+                await save_data(TICKETS_FILE, tickets, [ticket_id])
                 
             except discord.HTTPException as e:
                 print(f"Error archiving channel: {e}")
@@ -324,17 +791,21 @@ class MatchTicketSystem:
         except Exception as e:
             print(f"Error closing match ticket: {e}")
 
+# Live chess board views by match ID, carried across restarts by warm_restart
+board_views = {}
+
 # Chess Board View for interactive play
 class ChessBoardView(discord.ui.View):
-    def __init__(self, match_id, fen):
+    def __init__(self, match_id, fen, message_id=None):
         super().__init__(timeout=None)  # No timeout for the chess board
         self.match_id = match_id
         self.current_fen = fen
         self.move_input = ""
-        self.white_to_move = "w" in fen
+        self.white_to_move = fen.split()[1] == "w"
         self.last_move = None
+        self.message_id = message_id
     
-    @discord.ui.button(label="Make Move", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="Make Move", style=discord.ButtonStyle.primary, custom_id="chess_board:make_move")
     async def make_move_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Open a modal to input a chess move"""
         # Create a modal for move input
@@ -354,79 +825,108 @@ class ChessBoardView(discord.ui.View):
                 # Get the match
                 match = matches["matches"][self.match_id]
                 
+                if match["status"] == "Completed":
+                    await interaction.response.send_message("This match is already over.", ephemeral=True)
+                    return
+                
+                # The position is stored with the match as FEN
+                position = Position(match.get("current_fen", self.board_view.current_fen))
+                
                 # Determine whose turn it is
                 player1_id = match["player1_id"]
                 player2_id = match["player2_id"]
-                current_player_id = player1_id if self.white_to_move else player2_id
+                white_to_move = position.turn == "w"
+                current_player_id = player1_id if white_to_move else player2_id
                 
                 # Check if it's the player's turn
                 if str(interaction.user.id) != current_player_id:
                     await interaction.response.send_message("It's not your turn to move.", ephemeral=True)
                     return
                 
-                # In a real implementation, you would validate the move against chess rules
-                # For now, we'll just accept any move and update the board
-                
-                # Add the move to the match history
-                if "moves" not in match:
-                    match["moves"] = []
-                
-                move_number = len(match["moves"]) // 2 + 1
-                if self.white_to_move:
-                    formatted_move = f"{move_number}. {move_text}"
-                else:
-                    formatted_move = move_text
+                # Validate the move against the rules
+                try:
+                    move = position.parse_move(move_text)
+                except IllegalMoveError as e:
+                    await interaction.response.send_message(f"{e}. Enter a legal move in SAN (e.g., Nf3) or UCI (e.g., g1f3).", ephemeral=True)
+                    return
                 
-                match["moves"].append(formatted_move)
+                # A move made after the flag fell does not count
+                if not clocks.press(self.match_id):
+                    await interaction.response.send_message("Your time has run out.", ephemeral=True)
+                    await flag_fall(interaction.client, self.match_id)
+                    return
                 
-                # Toggle whose turn it is
-                self.white_to_move = not self.white_to_move
+                uci = position.uci(move)
+                san = position.push(move)
                 
-                # Update the last move
-                self.last_move = move_text
+                # Add the move and the new position to the match history
+                record_move(match, move, san)
+                repetitions = record_position(match, position)
+                match["current_fen"] = position.fen()
+                match["last_move"] = uci
                 
-                # In a real implementation, you would update the FEN based on the move
-                # For now, we'll just use a placeholder update
+                # Update the board view
+                self.board_view.current_fen = match["current_fen"]
+                self.board_view.white_to_move = not white_to_move
+                self.board_view.last_move = san
                 
                 # Save the match data
-                save_data(MATCHES_FILE, matches)
+                pack_history(match)
+                await save_data(MATCHES_FILE, matches, [self.match_id])
                 
                 # Update the chess board
-                await self.update_chess_board(interaction)
+                outcome = position.outcome(repetitions)
+                await self.update_chess_board(interaction, position, outcome)
+                
+                # Checkmate, stalemate and automatic draws end the game
+                if outcome is None:
+                    return
+                
+                if outcome == "checkmate":
+                    result = "player1" if white_to_move else "player2"
+                    winner_name = match["player1_name"] if white_to_move else match["player2_name"]
+                    message = f"♚ **Checkmate!** **{winner_name}** wins the match!"
+                else:
+                    result = "draw"
+                    message = f"🤝 **{outcome.capitalize()}!** The match has ended in a draw."
+                
+                await complete_match(self.match_id, result, str(interaction.user.id))
+                await interaction.channel.send(message)
+                await MatchTicketSystem.close_match_ticket(interaction.guild, self.match_id)
             
-            async def update_chess_board(self, interaction):
+            async def update_chess_board(self, interaction, position, outcome=None):
                 """Update the chess board after a move"""
-                # In a real implementation, you would calculate the new FEN based on the move
-                # For now, we'll use an external API to get a new board image
-                
                 # Get the match
                 match = matches["matches"][self.match_id]
                 
-                # Create a PGN string from the moves
-                pgn = " ".join(match["moves"])
-                
                 # Update the board embed
+                last_move = self.board_view.last_move
                 board_embed = discord.Embed(
                     title="Chess Board",
-                    description=f"Last move: {self.last_move}" if self.last_move else "Game in progress",
+                    description=f"Last move: {last_move}" if last_move else "Game in progress",
                     color=discord.Color.green()
                 )
                 
-                # For a real implementation, you would update the FEN based on the move
-                # and generate a new board image. For now, we'll use a placeholder.
-                
-                # We'll use lichess.org's API to generate a board image from the PGN
-                # This is a simplified approach - in a real implementation you'd track the FEN properly
-                board_embed.set_image(url=f"https://lichess1.org/game/export/gif/placeholder?theme=brown&piece=cburnett")
+                # Board image for the current position
+                board_file = await board_image(match["current_fen"], match.get("last_move"))
+                board_embed.set_image(url="attachment://board.png")
                 
                 # Add turn indicator
-                turn_text = f"**White** ({match['player1_name']})" if self.white_to_move else f"**Black** ({match['player2_name']})"
-                board_embed.add_field(name="Current Turn", value=turn_text, inline=False)
+                turn_text = f"**White** ({match['player1_name']})" if position.turn == "w" else f"**Black** ({match['player2_name']})"
+                if outcome:
+                    board_embed.add_field(name="Game Over", value=outcome.capitalize(), inline=False)
+                else:
+                    board_embed.add_field(name="Current Turn", value=turn_text, inline=False)
+                
+                # Add the clock
+                remaining = clock_text(self.match_id)
+                if remaining:
+                    board_embed.add_field(name="Clock", value=remaining, inline=False)
                 
                 # Add move history
-                if match["moves"]:
+                move_history = match_movetext(match)
+                if move_history:
                     # Format the moves nicely
-                    move_history = " ".join(match["moves"])
                     if len(move_history) > 1024:  # Discord field value limit
                         move_history = move_history[-1020:] + "..."
                     board_embed.add_field(name="Move History", value=f"```{move_history}```", inline=False)
@@ -434,30 +934,39 @@ class ChessBoardView(discord.ui.View):
                 # Update the message
                 try:
                     message = await interaction.channel.fetch_message(int(match["board_message_id"]))
-                    await message.edit(embed=board_embed, view=self)
-                    await interaction.response.send_message(f"Move {self.last_move} played. It's now {turn_text}'s turn.", ephemeral=True)
+                    await message.edit(embed=board_embed, attachments=[board_file], view=self.board_view)
+                    if outcome:
+                        await interaction.response.send_message(f"Move {last_move} played. {outcome.capitalize()}!", ephemeral=True)
+                    else:
+                        await interaction.response.send_message(f"Move {last_move} played. It's now {turn_text}'s turn.", ephemeral=True)
                 except discord.NotFound:
                     await interaction.response.send_message("Could not update the chess board. The message may have been deleted.", ephemeral=True)
         
-        # Create the modal with the match_id and white_to_move attributes
+        # Create the modal for this board
         modal = MoveInputModal(title="Enter Chess Move")
         modal.match_id = self.match_id
-        modal.white_to_move = self.white_to_move
+        modal.board_view = self
         
         await interaction.response.send_modal(modal)
     
-    @discord.ui.button(label="View PGN", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="View PGN", style=discord.ButtonStyle.secondary, custom_id="chess_board:view_pgn")
     async def view_pgn_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """View the PGN notation of the game"""
         # Get the match
         match = matches["matches"][self.match_id]
         
-        if "moves" not in match or not match["moves"]:
+        # Format the PGN
+        if not match_movetext(match):
             await interaction.response.send_message("No moves have been played yet.", ephemeral=True)
             return
+        tournament = tournaments["tournaments"].get(match.get("tournament_id"), {"name": "?"})
+        pgn = pgn_game(match, tournament, interaction.guild.name if interaction.guild else "Discord")
         
-        # Format the PGN
-        pgn = " ".join(match["moves"])
+        # Long games go out as a file rather than being cut off
+        if len(pgn) > 4000:
+            file = discord.File(io.BytesIO(pgn.encode("utf-8")), filename=f"{self.match_id}.pgn")
+            await interaction.response.send_message("Game PGN:", file=file, ephemeral=True)
+            return
         
         # Create an embed with the PGN
         embed = discord.Embed(
@@ -468,7 +977,7 @@ class ChessBoardView(discord.ui.View):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
-    @discord.ui.button(label="Claim Victory", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="Claim Victory", style=discord.ButtonStyle.success, custom_id="chess_board:claim_victory")
     async def claim_victory_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Claim victory in the game"""
         # Get the match
@@ -480,6 +989,10 @@ class ChessBoardView(discord.ui.View):
             await interaction.response.send_message("Only players in this match can claim victory.", ephemeral=True)
             return
         
+        if match["status"] == "Completed":
+            await interaction.response.send_message("This match is already over.", ephemeral=True)
+            return
+        
         # Create a confirmation view
         class ConfirmationView(discord.ui.View):
             def __init__(self, match_id, claimer_id):
@@ -492,36 +1005,14 @@ class ChessBoardView(discord.ui.View):
                 # Get the match
                 match = matches["matches"][self.match_id]
                 
-                # Determine the result
-                if self.claimer_id == match["player1_id"]:
-                    match["result"] = "player1"
-                else:
-                    match["result"] = "player2"
-                
-                # Update match status
-                match["status"] = "Completed"
-                match["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                match["reported_by"] = self.claimer_id
-                
-                # Save the match data
-                save_data(MATCHES_FILE, matches)
+                if match["status"] == "Completed":
+                    await interaction.response.edit_message(content="This match is already over.", view=None)
+                    return
                 
-                # Update player stats
+                # Record the result and update player stats
                 winner_id = self.claimer_id
-                loser_id = match["player2_id"] if winner_id == match["player1_id"] else match["player1_id"]
-                
-                if winner_id in players["players"]:
-                    players["players"][winner_id]["wins"] += 1
-                    if self.match_id not in players["players"][winner_id]["matches"]:
-                        players["players"][winner_id]["matches"].append(self.match_id)
-                
-                if loser_id in players["players"]:
-                    players["players"][loser_id]["losses"] += 1
-                    if self.match_id not in players["players"][loser_id]["matches"]:
-                        players["players"][loser_id]["matches"].append(self.match_id)
-                
-                # Save player data
-                save_data(PLAYERS_FILE, players)
+                result = "player1" if winner_id == match["player1_id"] else "player2"
+                await complete_match(self.match_id, result, self.claimer_id)
                 
                 # Close the match ticket
                 await MatchTicketSystem.close_match_ticket(interaction.guild, self.match_id)
@@ -551,7 +1042,7 @@ class ChessBoardView(discord.ui.View):
             ephemeral=True
         )
     
-    @discord.ui.button(label="Offer Draw", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="Offer Draw", style=discord.ButtonStyle.secondary, custom_id="chess_board:offer_draw")
     async def offer_draw_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Offer a draw to the opponent"""
         # Get the match
@@ -563,6 +1054,21 @@ class ChessBoardView(discord.ui.View):
             await interaction.response.send_message("Only players in this match can offer a draw.", ephemeral=True)
             return
         
+        if match["status"] == "Completed":
+            await interaction.response.send_message("This match is already over.", ephemeral=True)
+            return
+        
+        # A threefold repetition or 50-move draw can be claimed without the opponent's agreement
+        if "current_fen" in match:
+            position = Position(match["current_fen"])
+            claim = position.claimable_draw(position_repetitions(match, position))
+            if claim:
+                await complete_match(self.match_id, "draw", user_id)
+                claimer_name = match["player1_name"] if user_id == match["player1_id"] else match["player2_name"]
+                await interaction.response.send_message(f"🤝 **{claimer_name}** claimed a draw by {claim}. The match has ended in a draw.")
+                await MatchTicketSystem.close_match_ticket(interaction.guild, self.match_id)
+                return
+        
         # Determine the opponent
         opponent_id = match["player2_id"] if user_id == match["player1_id"] else match["player1_id"]
         opponent_name = match["player2_name"] if user_id == match["player1_id"] else match["player1_name"]
@@ -581,30 +1087,14 @@ class ChessBoardView(discord.ui.View):
                     await interaction.response.send_message("Only the opponent can accept this draw offer.", ephemeral=True)
                     return
                 
-                # Get the match
+                # The game may have ended while the offer was open
                 match = matches["matches"][self.match_id]
+                if match["status"] == "Completed":
+                    await interaction.response.edit_message(content="This match is already over.", view=None)
+                    return
                 
-                # Update match status
-                match["result"] = "draw"
-                match["status"] = "Completed"
-                match["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                match["reported_by"] = str(interaction.user.id)
-                
-                # Save the match data
-                save_data(MATCHES_FILE, matches)
-                
-                # Update player stats
-                player1_id = match["player1_id"]
-                player2_id = match["player2_id"]
-                
-                for player_id in [player1_id, player2_id]:
-                    if player_id in players["players"]:
-                        players["players"][player_id]["draws"] += 1
-                        if self.match_id not in players["players"][player_id]["matches"]:
-                            players["players"][player_id]["matches"].append(self.match_id)
-                
-                # Save player data
-                save_data(PLAYERS_FILE, players)
+                # Record the draw and update player stats
+                await complete_match(self.match_id, "draw", str(interaction.user.id))
                 
                 # Close the match ticket
                 await MatchTicketSystem.close_match_ticket(interaction.guild, self.match_id)
@@ -638,7 +1128,7 @@ class ChessBoardView(discord.ui.View):
             view=view
         )
     
-    @discord.ui.button(label="Resign", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="Resign", style=discord.ButtonStyle.danger, custom_id="chess_board:resign")
     async def resign_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Resign from the game"""
         # Get the match
@@ -650,6 +1140,10 @@ class ChessBoardView(discord.ui.View):
             await interaction.response.send_message("Only players in this match can resign.", ephemeral=True)
             return
         
+        if match["status"] == "Completed":
+            await interaction.response.send_message("This match is already over.", ephemeral=True)
+            return
+        
         # Create a confirmation view
         class ConfirmationView(discord.ui.View):
             def __init__(self, match_id, resigner_id):
@@ -662,36 +1156,16 @@ class ChessBoardView(discord.ui.View):
                 # Get the match
                 match = matches["matches"][self.match_id]
                 
-                # Determine the result
+                if match["status"] == "Completed":
+                    await interaction.response.edit_message(content="This match is already over.", view=None)
+                    return
+                
+                # Record the result and update player stats
                 if self.resigner_id == match["player1_id"]:
-                    match["result"] = "player2"  # Player 1 resigned, so Player 2 wins
+                    result = "player2"  # Player 1 resigned, so Player 2 wins
                 else:
-                    match["result"] = "player1"  # Player 2 resigned, so Player 1 wins
-                
-                # Update match status
-                match["status"] = "Completed"
-                match["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                match["reported_by"] = self.resigner_id
-                
-                # Save the match data
-                save_data(MATCHES_FILE, matches)
-                
-                # Update player stats
-                loser_id = self.resigner_id
-                winner_id = match["player2_id"] if loser_id == match["player1_id"] else match["player1_id"]
-                
-                if winner_id in players["players"]:
-                    players["players"][winner_id]["wins"] += 1
-                    if self.match_id not in players["players"][winner_id]["matches"]:
-                        players["players"][winner_id]["matches"].append(self.match_id)
-                
-                if loser_id in players["players"]:
-                    players["players"][loser_id]["losses"] += 1
-                    if self.match_id not in players["players"][loser_id]["matches"]:
-                        players["players"][loser_id]["matches"].append(self.match_id)
-                
-                # Save player data
-                save_data(PLAYERS_FILE, players)
+                    result = "player1"  # Player 2 resigned, so Player 1 wins
+                await complete_match(self.match_id, result, self.resigner_id)
                 
                 # Close the match ticket
                 await MatchTicketSystem.close_match_ticket(interaction.guild, self.match_id)
@@ -717,7 +1191,7 @@ class ChessBoardView(discord.ui.View):
             ephemeral=True
         )
 
-    @discord.ui.button(label="Call Arbiter", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="Call Arbiter", style=discord.ButtonStyle.danger, custom_id="chess_board:call_arbiter")
     async def call_arbiter_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Call an arbiter for assistance"""
         # Get the match
@@ -782,7 +1256,7 @@ class ChessBoardView(discord.ui.View):
         await interaction.response.send_modal(IssueReportModal())
 
 # Create Tournament Command
-async def create_tournament_command(interaction: discord.Interaction, name: str, format: str = "Swiss", rounds: int = 3, description: str = ""):
+async def create_tournament_command(interaction: discord.Interaction, name: str, format: str = "Swiss", rounds: int = 3, description: str = "", third_place: bool = False, tiebreaks: str = "buchholz", time_control: str = ""):
     """Create a new chess tournament"""
     # Check if user has permission (Tournament Director or Moderator)
     has_permission = False
@@ -796,7 +1270,7 @@ async def create_tournament_command(interaction: discord.Interaction, name: str,
         return
     
     # Validate format
-    valid_formats = ["Swiss", "Round Robin", "Single Elimination"]
+    valid_formats = ["Swiss", "Round Robin"] + ELIMINATION_FORMATS
     if format not in valid_formats:
         await interaction.response.send_message(f"Invalid tournament format. Please choose from: {', '.join(valid_formats)}", ephemeral=True)
         return
@@ -806,6 +1280,22 @@ async def create_tournament_command(interaction: discord.Interaction, name: str,
         await interaction.response.send_message("Number of rounds must be between 1 and 10.", ephemeral=True)
         return
     
+    # Validate tiebreaks (comma separated, applied in order)
+    try:
+        tiebreak_names = parse_tiebreaks(tiebreaks)
+    except ValueError as e:
+        await interaction.response.send_message(f"Unknown tiebreak: {e}. Please choose from: {', '.join(TIEBREAKS)}", ephemeral=True)
+        return
+    
+    # Validate the time control (e.g. "10+5", "10+5 bronstein", "10+5 delay" or "3 days")
+    control = None
+    if time_control:
+        try:
+            control = parse_time_control(time_control)
+        except ValueError:
+            await interaction.response.send_message("Invalid time control. Use minutes+increment (e.g. `10+5`, `10+5 bronstein`, `10+5 delay`) or days per move (e.g. `3 days`).", ephemeral=True)
+            return
+    
     # Generate tournament ID
     tournament_id = generate_id("T")
     
@@ -815,6 +1305,9 @@ async def create_tournament_command(interaction: discord.Interaction, name: str,
         "name": name,
         "format": format,
         "rounds": rounds,
+        "third_place": third_place,
+        "tiebreaks": tiebreak_names,
+        "time_control": control,
         "description": description,
         "created_by": str(interaction.user.id),
         "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -825,7 +1318,7 @@ async def create_tournament_command(interaction: discord.Interaction, name: str,
     }
     
     # Save data
-    save_data(TOURNAMENTS_FILE, tournaments)
+    await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
     
     # Create embed
     embed = discord.Embed(
@@ -836,6 +1329,8 @@ async def create_tournament_command(interaction: discord.Interaction, name: str,
     
     embed.add_field(name="Format", value=format, inline=True)
     embed.add_field(name="Rounds", value=str(rounds), inline=True)
+    embed.add_field(name="Tiebreaks", value=", ".join(TIEBREAKS[name][0] for name in tiebreak_names), inline=True)
+    embed.add_field(name="Time Control", value=describe_time_control(control) if control else "None", inline=True)
     embed.add_field(name="Status", value="Registration Open", inline=True)
     embed.add_field(name="Tournament ID", value=tournament_id, inline=True)
     
@@ -927,6 +1422,8 @@ async def tournament_info_command(interaction: discord.Interaction, tournament_i
     embed.add_field(name="Format", value=tournament["format"], inline=True)
     embed.add_field(name="Rounds", value=str(tournament["rounds"]), inline=True)
     embed.add_field(name="Status", value=tournament["status"], inline=True)
+    if tournament.get("time_control"):
+        embed.add_field(name="Time Control", value=describe_time_control(tournament["time_control"]), inline=True)
     
     # Participants
     participant_count = len(tournament["participants"])
@@ -967,6 +1464,79 @@ async def tournament_info_command(interaction: discord.Interaction, tournament_i
     
     await interaction.response.send_message(embed=embed, view=view)
 
+# Tournament Bracket Command
+BRACKET_SECTIONS = {"W": "Winners", "L": "Losers", "3P": "Third Place", "GF": "Grand Final"}
+
+async def tournament_bracket_command(interaction: discord.Interaction, tournament_id: str, round: int = None):
+    """Show the bracket pairings of one round of an elimination tournament"""
+    if tournament_id not in tournaments["tournaments"]:
+        await interaction.response.send_message(f"Tournament with ID {tournament_id} not found.", ephemeral=True)
+        return
+    
+    tournament = tournaments["tournaments"][tournament_id]
+    if tournament["format"] not in ELIMINATION_FORMATS:
+        await interaction.response.send_message("Only elimination tournaments have a bracket.", ephemeral=True)
+        return
+    
+    bracket = tournament_bracket(tournament_id)
+    if bracket is None:
+        await interaction.response.send_message("The bracket is drawn when the tournament starts.", ephemeral=True)
+        return
+    
+    if round is None:
+        round = tournament["current_round"] or 1
+    if not 1 <= round <= tournament["rounds"]:
+        await interaction.response.send_message(f"Round must be between 1 and {tournament['rounds']}.", ephemeral=True)
+        return
+    
+    def name(player_id):
+        if player_id == "BYE":
+            return "BYE"
+        return players["players"].get(player_id, {}).get("username", "Unknown")
+    
+    layout = bracket.export_layout()
+    embed = discord.Embed(
+        title=f"Bracket: {tournament['name']}",
+        description=f"Round {round} of {tournament['rounds']}",
+        color=discord.Color.blue()
+    )
+    
+    for section in layout["sections"]:
+        for stage in section["stages"]:
+            lines = []
+            for node in stage["nodes"]:
+                if node["round"] != round:
+                    continue
+                slots = [
+                    name(player_id) if player_id else source
+                    for player_id, source in zip(node["players"], node["sources"])
+                ]
+                line = f"`{node['id']}` {slots[0]} vs {slots[1]}"
+                if node["winner"]:
+                    line += f" → **{name(node['winner'])}**"
+                lines.append(line)
+            if not lines:
+                continue
+            
+            # Embed fields hold at most 1024 characters
+            value = ""
+            for shown, line in enumerate(lines):
+                more = f"\n...and {len(lines) - shown} more"
+                if len(value) + len(line) + 1 + len(more) > 1024:
+                    value += more
+                    break
+                value += ("\n" if value else "") + line
+            
+            field_name = BRACKET_SECTIONS[section["name"]]
+            if section["name"] in ("W", "L"):
+                field_name += f" Round {stage['stage']}"
+            embed.add_field(name=field_name, value=value, inline=False)
+    
+    if layout["champion"]:
+        embed.add_field(name="Champion", value=f"🏆 **{name(layout['champion'])}**", inline=False)
+    
+    await interaction.response.send_message(embed=embed)
+
 # Tournament Players Command
 async def tournament_players_command(interaction: discord.Interaction, tournament_id: str):
     """Show players registered for a tournament"""
@@ -1049,102 +1619,11 @@ async def tournament_standings_command(interaction: discord.Interaction, tournam
         await interaction.followup.send(f"Tournament {tournament['name']} has not started yet. No standings available.")
         return
     
-    # Calculate standings
-    standings = {}
-    
-    # Initialize standings for all participants
-    for player_id in tournament["participants"]:
-        player_name = "Unknown Player"
-        if player_id in players["players"]:
-            player_name = players["players"][player_id]["username"]
-        
-        standings[player_id] = {
-            "id": player_id,
-            "name": player_name,
-            "matches_played": 0,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "points": 0,
-            "opponents": []  # For tiebreaks
-        }
-    
-    # Process all matches
-    for match_id in tournament["matches"]:
-        if match_id in matches["matches"]:
-            match = matches["matches"][match_id]
-            
-            # Skip matches that aren't completed
-            if match["status"] != "Completed":
-                continue
-            
-            player1_id = match["player1_id"]
-            player2_id = match["player2_id"]
-            
-            # Skip byes
-            if player2_id == "BYE":
-                if player1_id in standings:
-                    standings[player1_id]["wins"] += 1
-                    standings[player1_id]["matches_played"] += 1
-                    standings[player1_id]["points"] += 1
-                continue
-            
-            # Update standings based on result
-            if match["result"] == "player1":
-                # Player 1 won
-                if player1_id in standings:
-                    standings[player1_id]["wins"] += 1
-                    standings[player1_id]["matches_played"] += 1
-                    standings[player1_id]["points"] += 1
-                    standings[player1_id]["opponents"].append(player2_id)
-                
-                if player2_id in standings:
-                    standings[player2_id]["losses"] += 1
-                    standings[player2_id]["matches_played"] += 1
-                    standings[player2_id]["opponents"].append(player1_id)
-                
-            elif match["result"] == "player2":
-                # Player 2 won
-                if player2_id in standings:
-                    standings[player2_id]["wins"] += 1
-                    standings[player2_id]["matches_played"] += 1
-                    standings[player2_id]["points"] += 1
-                    standings[player2_id]["opponents"].append(player1_id)
-                
-                if player1_id in standings:
-                    standings[player1_id]["losses"] += 1
-                    standings[player1_id]["matches_played"] += 1
-                    standings[player1_id]["opponents"].append(player2_id)
-                
-            elif match["result"] == "draw":
-                # Draw
-                if player1_id in standings:
-                    standings[player1_id]["draws"] += 1
-                    standings[player1_id]["matches_played"] += 1
-                    standings[player1_id]["points"] += 0.5
-                    standings[player1_id]["opponents"].append(player2_id)
-                
-                if player2_id in standings:
-                    standings[player2_id]["draws"] += 1
-                    standings[player2_id]["matches_played"] += 1
-                    standings[player2_id]["points"] += 0.5
-                    standings[player2_id]["opponents"].append(player1_id)
-    
-    # Calculate tiebreaks (Buchholz score - sum of opponents' scores)
-    for player_id, player_data in standings.items():
-        buchholz = 0
-        for opponent_id in player_data["opponents"]:
-            if opponent_id in standings:
-                buchholz += standings[opponent_id]["points"]
-        
-        player_data["tiebreak"] = buchholz
-    
-    # Sort standings by points (descending), then tiebreak
-    sorted_standings = sorted(
-        standings.values(),
-        key=lambda p: (p["points"], p["tiebreak"]),
-        reverse=True
-    )
+    # Standings are kept up to date as results come in; tiebreaks are
+    # computed once per result and cached
+    tiebreak_names = tournament.get("tiebreaks", DEFAULT_TIEBREAKS)
+    ratings = {player_id: players["players"][player_id]["rating"] for player_id in tournament["participants"] if player_id in players["players"]}
+    sorted_standings = tournament_standings(tournament_id).ranked(tiebreak_names, ratings)
     
     # Create embed
     embed = discord.Embed(
@@ -1156,7 +1635,8 @@ async def tournament_standings_command(interaction: discord.Interaction, tournam
     # Add standings to embed
     standings_text = ""
     for i, player in enumerate(sorted_standings, 1):
-        standings_text += f"{i}. **{player['name']}** - {player['points']} pts ({player['wins']}-{player['losses']}-{player['draws']})\n"
+        tiebreak_text = ", ".join(f"{TIEBREAKS[name][1]} {value:g}" for name, value in player["tiebreaks"].items())
+        standings_text += f"{i}. **{player['name']}** - {player['points']} pts ({player['wins']}-{player['losses']}-{player['draws']}) {tiebreak_text}\n"
         
         # Split into multiple fields if too many players
         if i % 15 == 0 or i == len(sorted_standings):
@@ -1165,6 +1645,53 @@ async def tournament_standings_command(interaction: discord.Interaction, tournam
     
     await interaction.followup.send(embed=embed)
 
+# Export Tournament Command
+async def export_tournament_command(interaction: discord.Interaction, tournament_id: str, format: str = "PGN"):
+    """Export a tournament's games as PGN or its results as a TRF-16 report"""
+    await interaction.response.defer()
+    
+    if tournament_id not in tournaments["tournaments"]:
+        await interaction.followup.send(f"Tournament with ID {tournament_id} not found.")
+        return
+    
+    format = format.upper()
+    if format not in ["PGN", "TRF"]:
+        await interaction.followup.send("Invalid export format. Please choose from: PGN, TRF")
+        return
+    
+    tournament = tournaments["tournaments"][tournament_id]
+    if not tournament["matches"]:
+        await interaction.followup.send(f"Tournament {tournament['name']} has no matches to export yet.")
+        return
+    
+    # The export is written on a worker thread while the event loop keeps
+    # changing the live records, so it gets shallow copies of them
+    tournament_copy = dict(tournament, matches=list(tournament["matches"]), participants=list(tournament["participants"]))
+    match_copies = {match_id: dict(matches["matches"][match_id]) for match_id in tournament["matches"] if match_id in matches["matches"]}
+    if format == "PGN":
+        chunks = pgn_games(tournament_copy, match_copies, interaction.guild.name if interaction.guild else "Discord")
+    else:
+        player_copies = {player_id: dict(players["players"][player_id]) for player_id in tournament["participants"] if player_id in players["players"]}
+        ratings = {player_id: player["rating"] for player_id, player in player_copies.items()}
+        ranked = tournament_standings(tournament_id).ranked(tournament.get("tiebreaks", DEFAULT_TIEBREAKS), ratings)
+        standings = [{"id": row["id"], "points": row["points"]} for row in ranked]
+        chunks = trf_lines(tournament_copy, match_copies, player_copies, standings)
+    
+    handle, path = tempfile.mkstemp(suffix=f".{format.lower()}")
+    os.close(handle)
+    try:
+        size = await asyncio.get_running_loop().run_in_executor(None, write_export, path, chunks)
+        limit = interaction.guild.filesize_limit if interaction.guild else 8 * 1024 * 1024
+        if size > limit:
+            await interaction.followup.send(f"The export is {size // 1024} KB, which is over this server's upload limit.")
+            return
+        await interaction.followup.send(
+            f"{format} export of **{tournament['name']}**",
+            file=discord.File(path, filename=f"{tournament_id}.{format.lower()}")
+        )
+    finally:
+        os.remove(path)
+
 # Tournament Matches Command
 async def tournament_matches_command(interaction: discord.Interaction, tournament_id: str, round: int = None):
     """Show matches for a tournament"""
@@ -1189,12 +1716,7 @@ async def tournament_matches_command(interaction: discord.Interaction, tournamen
         return
     
     # Get matches for the specified round
-    round_matches = []
-    for match_id in tournament["matches"]:
-        if match_id in matches["matches"]:
-            match = matches["matches"][match_id]
-            if match["round"] == round:
-                round_matches.append(match)
+    round_matches = [matches["matches"][match_id] for match_id in round_index.match_ids(tournament_id, round)]
     
     if not round_matches:
         await interaction.followup.send(f"No matches found for round {round}.")
@@ -1265,11 +1787,10 @@ async def tournament_matches_command(interaction: discord.Interaction, tournamen
             
             # Get matches for the current round
             round_matches = []
-            for match_id in tournaments["tournaments"][self.tournament_id]["matches"]:
-                if match_id in matches["matches"]:
-                    match = matches["matches"][match_id]
-                    if match["round"] == self.current_round and match["player2_id"] != "BYE":
-                        round_matches.append(match)
+            for match_id in round_index.match_ids(self.tournament_id, self.current_round):
+                match = matches["matches"][match_id]
+                if match["player2_id"] != "BYE":
+                    round_matches.append(match)
             
             if not round_matches:
                 await interaction.followup.send("No valid matches found for this round.", ephemeral=True)
@@ -1279,13 +1800,7 @@ async def tournament_matches_command(interaction: discord.Interaction, tournamen
             created_count = 0
             for match in round_matches:
                 # Skip if ticket already exists
-                ticket_exists = False
-                for ticket_id, ticket in tickets["tickets"].items():
-                    if ticket["match_id"] == match["id"]:
-                        ticket_exists = True
-                        break
-                
-                if not ticket_exists:
+                if not ticket_for_match(match["id"]):
                     channel = await MatchTicketSystem.create_match_ticket(interaction.guild, match["id"])
                     if channel:
                         created_count += 1
@@ -1323,6 +1838,7 @@ async def register_player_command(interaction: discord.Interaction, tournament_i
     
     # Register the player
     tournament["participants"].append(user_id)
+    standings_engine.discard(tournament_id)
     
     # Create or update player profile
     if user_id not in players["players"]:
@@ -1345,10 +1861,11 @@ async def register_player_command(interaction: discord.Interaction, tournament_i
         
         # Update username if changed
         players["players"][user_id]["username"] = interaction.user.display_name
+    leaderboard.update(players["players"][user_id])
     
     # Save data
-    save_data(TOURNAMENTS_FILE, tournaments)
-    save_data(PLAYERS_FILE, players)
+    await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
+    await save_data(PLAYERS_FILE, players, [user_id])
     
     # Create embed
     embed = discord.Embed(
@@ -1390,17 +1907,113 @@ async def unregister_player_command(interaction: discord.Interaction, tournament
     
     # Unregister the player
     tournament["participants"].remove(user_id)
+    standings_engine.discard(tournament_id)
     
     # Update player profile
     if user_id in players["players"] and tournament_id in players["players"][user_id]["tournaments"]:
         players["players"][user_id]["tournaments"].remove(tournament_id)
     
     # Save data
-    save_data(TOURNAMENTS_FILE, tournaments)
-    save_data(PLAYERS_FILE, players)
+    await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
+    await save_data(PLAYERS_FILE, players, [user_id])
     
     await interaction.response.send_message(f"You have been unregistered from tournament '{tournament['name']}'.", ephemeral=True)
 
+# Apply a checked import
+async def apply_import(tournament, plan, reported_by):
+    """Register the plan's players and record its results, then save everything at once"""
+    tournament_id = tournament["id"]
+    for player_id, (name, rating) in plan.players.items():
+        if player_id not in players["players"]:
+            rating = rating or 1200
+            players["players"][player_id] = {
+                "id": player_id,
+                "username": name,
+                "rating": rating,
+                "tier": get_rating_tier(rating),
+                "tournaments": [],
+                "matches": [],
+                "wins": 0,
+                "losses": 0,
+                "draws": 0
+            }
+        player = players["players"][player_id]
+        if tournament_id not in player["tournaments"]:
+            player["tournaments"].append(tournament_id)
+        if player_id not in tournament["participants"]:
+            tournament["participants"].append(player_id)
+        leaderboard.update(player)
+    standings_engine.discard(tournament_id)
+    
+    # Create every match before completing any, so each round is rated
+    # once, when its last imported result is in, and rounds in order
+    results = sorted(plan.results, key=lambda entry: entry[0])
+    match_ids = [create_match(tournament, round_number, white_id, black_id) for round_number, white_id, black_id, _ in results]
+    for match_id, (_, _, _, result) in zip(match_ids, results):
+        await complete_match(match_id, result, reported_by, save=False)
+    
+    player_ids = set(plan.players) | set(tournament["participants"])
+    await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
+    await save_data(MATCHES_FILE, matches, match_ids)
+    await save_data(PLAYERS_FILE, players, [player_id for player_id in player_ids if player_id in players["players"]])
+    return match_ids
+
+# Import Tournament Command
+async def import_tournament_command(interaction: discord.Interaction, tournament_id: str, file: discord.Attachment):
+    """Import players and results into a tournament from a CSV or TRF file"""
+    # Check if user has permission (Tournament Director or Moderator)
+    if not any(role.name in ["Tournament Director", "Moderator"] for role in interaction.user.roles):
+        await interaction.response.send_message("You don't have permission to import tournament data. You need the Tournament Director or Moderator role.", ephemeral=True)
+        return
+    
+    if tournament_id not in tournaments["tournaments"]:
+        await interaction.response.send_message(f"Tournament with ID {tournament_id} not found.", ephemeral=True)
+        return
+    
+    kind = file.filename.rsplit(".", 1)[-1].lower()
+    if kind == "txt":
+        kind = "trf"
+    if kind not in ["csv", "trf"]:
+        await interaction.response.send_message("Please attach a .csv or .trf file.", ephemeral=True)
+        return
+    
+    if file.size > 5 * 1024 * 1024:
+        await interaction.response.send_message("Import files can be at most 5 MB.", ephemeral=True)
+        return
+    
+    await interaction.response.defer()
+    tournament = tournaments["tournaments"][tournament_id]
+    
+    # Throughput covers checking and applying the file, not downloading it
+    data = await file.read()
+    started = time.perf_counter()
+    text = data.decode("utf-8-sig", errors="replace")
+    existing_matches = [matches["matches"][match_id] for match_id in tournament["matches"] if match_id in matches["matches"]]
+    plan = read_import(io.StringIO(text, newline=None), kind, tournament, players["players"], existing_matches)
+    
+    if plan.results and tournament["format"] in ELIMINATION_FORMATS:
+        plan.error(0, "results cannot be imported into an elimination bracket")
+    
+    if plan.errors:
+        lines = [f"Line {line}: {message}" if line else message for line, message in plan.errors]
+        await interaction.followup.send("Nothing was imported. Please fix these problems and try again:\n" + "\n".join(lines))
+        return
+    
+    match_ids = await apply_import(tournament, plan, str(interaction.user.id))
+    elapsed = time.perf_counter() - started
+    
+    embed = discord.Embed(
+        title=f"Import Complete: {tournament['name']}",
+        description=f"Imported {file.filename}.",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Rows", value=str(plan.rows), inline=True)
+    embed.add_field(name="Players", value=str(len(plan.players)), inline=True)
+    embed.add_field(name="Results", value=str(len(match_ids)), inline=True)
+    embed.add_field(name="Throughput", value=f"{plan.rows / max(elapsed, 1e-6):,.0f} rows/sec ({elapsed * 1000:.0f} ms)", inline=False)
+    
+    await interaction.followup.send(embed=embed)
+
 # Player Profile Command
 async def player_profile_command(interaction: discord.Interaction, user: discord.Member = None):
     """View a player's chess profile"""
@@ -1426,6 +2039,20 @@ async def player_profile_command(interaction: discord.Interaction, user: discord
         color=discord.Color.blue()
     )
     
+    # Rating deviation and the last few rating changes
+    history = player.get("rating_history", [])
+    if history:
+        embed.description += f" ±{round(player['glicko'][1])}"
+        changes = []
+        for entry in history[-5:]:
+            change = round(entry["rating"] - entry["before"][0])
+            tournament_id, round_number = entry["period"].rsplit(":", 1)
+            tournament_name = tournaments["tournaments"].get(tournament_id, {}).get("name", tournament_id)
+            changes.append(f"{tournament_name} R{round_number}: {change:+d} → {round(entry['rating'])}")
+        embed.add_field(name="Rating History", value="\n".join(changes), inline=False)
+    
+    embed.add_field(name="Leaderboard Rank", value=f"#{leaderboard.rank(user_id)} of {leaderboard.count()}", inline=True)
+    
     # Set user avatar as thumbnail
     embed.set_thumbnail(url=user.display_avatar.url)
     
@@ -1487,6 +2114,35 @@ async def player_profile_command(interaction: discord.Interaction, user: discord
     
     await interaction.followup.send(embed=embed)
 
+# Leaderboard Command
+async def leaderboard_command(interaction: discord.Interaction, page: int = 1, tier: str = "All"):
+    """Show players ranked by rating"""
+    await interaction.response.defer()
+    
+    tier_filter = None if tier == "All" else tier
+    total = leaderboard.count(tier_filter)
+    if total == 0:
+        await interaction.followup.send("No players found." if tier_filter is None else f"No players found in tier: {tier}")
+        return
+    
+    page_count = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = min(max(page, 1), page_count)
+    
+    embed = discord.Embed(
+        title="Chess Leaderboard" if tier_filter is None else f"Chess Leaderboard: {tier}",
+        description="\n".join(leaderboard.page(page, tier_filter)),
+        color=discord.Color.gold()
+    )
+    
+    # Where the caller stands
+    footer = f"Page {page}/{page_count} - {total} players"
+    rank = leaderboard.rank(str(interaction.user.id), tier_filter)
+    if rank is not None:
+        footer += f" - Your rank: #{rank}"
+    embed.set_footer(text=footer)
+    
+    await interaction.followup.send(embed=embed)
+
 # Start Tournament Command
 async def start_tournament_command(interaction: discord.Interaction, tournament_id: str):
     """Start a chess tournament"""
@@ -1524,11 +2180,17 @@ async def start_tournament_command(interaction: discord.Interaction, tournament_
     tournament["current_round"] = 1
     tournament["started_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    # Round robin tournaments are seeded up front
+    if tournament["format"] == "Round Robin":
+        schedule_round_robin(tournament)
+    elif tournament["format"] in ELIMINATION_FORMATS:
+        build_bracket(tournament)
+    
     # Generate first round pairings
     await generate_pairings(tournament_id, 1)
     
     # Save data
-    save_data(TOURNAMENTS_FILE, tournaments)
+    await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
     
     # Create embed
     embed = discord.Embed(
@@ -1550,6 +2212,73 @@ async def start_tournament_command(interaction: discord.Interaction, tournament_
     
     await interaction.followup.send(embed=embed)
 
+# Seed participants by rating
+def seed_participants(tournament):
+    return sorted(
+        tournament["participants"],
+        key=lambda player_id: players["players"].get(player_id, {}).get("rating", 1200),
+        reverse=True
+    )
+
+# Seed a round robin schedule
+def schedule_round_robin(tournament):
+    """Seed participants by rating; each round's Berger pairings follow from the seed order"""
+    tournament["seeds"] = seed_participants(tournament)
+    tournament["rounds"] = berger_rounds(len(tournament["seeds"]))
+
+# Build an elimination bracket
+def build_bracket(tournament):
+    """Seed participants by rating and store the bracket, its nodes as records of their own"""
+    bracket = Bracket.build(
+        seed_participants(tournament),
+        double=tournament["format"] == "Double Elimination",
+        third_place=tournament.get("third_place", False)
+    )
+    tournament["bracket"] = bracket.data
+    tournament["rounds"] = bracket.rounds()
+    for node_id, node in bracket.nodes.items():
+        node["tournament_id"] = tournament["id"]
+        bracket_nodes["bracket_nodes"][bracket_node_key(tournament["id"], node_id)] = node
+    brackets[tournament["id"]] = bracket
+
+# Create a match for a pairing
+def create_match(tournament, round_number, player1_id, player2_id):
+    """Create a scheduled match and add it to the tournament and its indexes (not saved)"""
+    # Get player names
+    player1_name = "Unknown Player"
+    if player1_id in players["players"]:
+        player1_name = players["players"][player1_id]["username"]
+    
+    player2_name = "BYE"
+    if player2_id != "BYE" and player2_id in players["players"]:
+        player2_name = players["players"][player2_id]["username"]
+    
+    # Match IDs are only unique to the second plus a random suffix
+    match_id = generate_id("M")
+    while match_id in matches["matches"]:
+        match_id = generate_id("M")
+    
+    match = matches["matches"][match_id] = {
+        "id": match_id,
+        "tournament_id": tournament["id"],
+        "round": round_number,
+        "player1_id": player1_id,
+        "player2_id": player2_id,
+        "player1_name": player1_name,
+        "player2_name": player2_name,
+        "status": "Scheduled",
+        "result": None,
+        "packed_moves": "",
+        "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    
+    # Add match to tournament
+    tournament["matches"].append(match_id)
+    round_index.add(match)
+    pairing_history(tournament["id"]).add_match(match)
+    
+    return match_id
+
 # Generate pairings for a tournament round
 async def generate_pairings(tournament_id, round_number):
     """Generate pairings for a tournament round"""
@@ -1565,80 +2294,24 @@ async def generate_pairings(tournament_id, round_number):
         return False
     
     # Calculate standings for pairing purposes
+    table = tournament_standings(tournament_id)
     standings = {}
     
-    # Initialize standings for all participants
     for player_id in participants:
-        player_name = "Unknown Player"
+        row = table.rows[player_id]
         if player_id in players["players"]:
-            player_name = players["players"][player_id]["username"]
             player_rating = players["players"][player_id]["rating"]
         else:
             player_rating = 1200  # Default rating
         
         standings[player_id] = {
             "id": player_id,
-            "name": player_name,
+            "name": row["name"],
             "rating": player_rating,
-            "matches_played": 0,
-            "points": 0,
-            "opponents": []  # Keep track of previous opponents
+            "matches_played": row["matches_played"],
+            "points": row["points"]
         }
     
-    # Process previous matches to calculate standings
-    for match_id in tournament["matches"]:
-        if match_id in matches["matches"]:
-            match = matches["matches"][match_id]
-            
-            # Skip matches from future rounds
-            if match["round"] >= round_number:
-                continue
-            
-            player1_id = match["player1_id"]
-            player2_id = match["player2_id"]
-            
-            # Skip byes
-            if player2_id == "BYE":
-                if player1_id in standings:
-                    standings[player1_id]["matches_played"] += 1
-                    standings[player1_id]["points"] += 1
-                continue
-            
-            # Record that these players have played each other
-            if player1_id in standings and player2_id in standings:
-                standings[player1_id]["opponents"].append(player2_id)
-                standings[player2_id]["opponents"].append(player1_id)
-            
-            # Update standings based on result
-            if match["status"] == "Completed":
-                if match["result"] == "player1":
-                    # Player 1 won
-                    if player1_id in standings:
-                        standings[player1_id]["matches_played"] += 1
-                        standings[player1_id]["points"] += 1
-                    
-                    if player2_id in standings:
-                        standings[player2_id]["matches_played"] += 1
-                    
-                elif match["result"] == "player2":
-                    # Player 2 won
-                    if player2_id in standings:
-                        standings[player2_id]["matches_played"] += 1
-                        standings[player2_id]["points"] += 1
-                    
-                    if player1_id in standings:
-                        standings[player1_id]["matches_played"] += 1
-                    
-                elif match["result"] == "draw":
-                    # Draw
-                    if player1_id in standings:
-                        standings[player1_id]["matches_played"] += 1
-                        standings[player1_id]["points"] += 0.5
-                    
-                    if player2_id in standings:
-                        standings[player2_id]["matches_played"] += 1
-                        standings[player2_id]["points"] += 0.5
-    
     # Sort players by points (descending), then rating
     sorted_players = sorted(
         standings.values(),
@@ -1650,230 +2323,62 @@ async def generate_pairings(tournament_id, round_number):
     pairings = []
     
     if tournament["format"] == "Swiss":
-        # Swiss pairing algorithm
-        # Group players by points
-        point_groups = {}
-        for player in sorted_players:
-            points = player["points"]
-            if points not in point_groups:
-                point_groups[points] = []
-            point_groups[points].append(player)
-        
-        # Sort point groups by points (descending)
-        sorted_point_groups = sorted(point_groups.items(), key=lambda x: x[0], reverse=True)
-        
-        # Create a list of players to be paired
-        players_to_pair = []
-        for points, group in sorted_point_groups:
-            players_to_pair.extend(group)
-        
-        # Create pairings
-        while players_to_pair:
-            if len(players_to_pair) == 1:
-                # Odd number of players, give the last player a bye
-                player = players_to_pair.pop(0)
-                
-                # Check if player already had a bye
-                had_bye = False
-                for match_id in tournament["matches"]:
-                    if match_id in matches["matches"]:
-                        match = matches["matches"][match_id]
-                        if match["player1_id"] == player["id"] and match["player2_id"] == "BYE":
-                            had_bye = True
-                            break
-                
-                if had_bye and len(tournament["participants"]) > 2:
-                    # Try to find another player for a bye
-                    players_to_pair.insert(0, player)  # Put the player back
-                    
-                    # Find a player who hasn't had a bye yet
-                    bye_candidate = None
-                    for i in range(len(players_to_pair) - 1, -1, -1):
-                        candidate = players_to_pair[i]
-                        candidate_had_bye = False
-                        
-                        for match_id in tournament["matches"]:
-                            if match_id in matches["matches"]:
-                                match = matches["matches"][match_id]
-                                if match["player1_id"] == candidate["id"] and match["player2_id"] == "BYE":
-                                    candidate_had_bye = True
-                                    break
-                        
-                        if not candidate_had_bye:
-                            bye_candidate = candidate
-                            players_to_pair.pop(i)
-                            break
-                    
-                    if bye_candidate:
-                        # Create a bye match for this candidate
-                        pairings.append((bye_candidate["id"], "BYE"))
-                    else:
-                        # No suitable candidate found, give the original player a bye
-                        player = players_to_pair.pop(0)
-                        pairings.append((player["id"], "BYE"))
-                else:
-                    # Create a bye match
-                    pairings.append((player["id"], "BYE"))
-            else:
-                # Get the first player
-                player1 = players_to_pair.pop(0)
-                
-                # Find a suitable opponent
-                opponent_found = False
-                for i in range(len(players_to_pair)):
-                    player2 = players_to_pair[i]
-                    
-                    # Check if these players have already played each other
-                    if player2["id"] in player1["opponents"]:
-                        continue
-                    
-                    # Found a suitable opponent
-                    opponent_found = True
-                    players_to_pair.pop(i)
-                    pairings.append((player1["id"], player2["id"]))
-                    break
-                
-                if not opponent_found:
-                    # No suitable opponent found, pair with the next available player
-                    player2 = players_to_pair.pop(0)
-                    pairings.append((player1["id"], player2["id"]))
+        # Maximum weight matching over score groups (see chess_pairing.py)
+        # using previous opponents (including unfinished matches), byes and colours
+        history = pairing_history(tournament_id)
+        pairings = pair_swiss(sorted_players, history.opponents, history.byes, history.colours)
     
     elif tournament["format"] == "Round Robin":
-        # Round Robin pairing algorithm
-        n = len(sorted_players)
-        
-        if n % 2 == 1:
-            # Odd number of players, add a "BYE" player
-            sorted_players.append({"id": "BYE", "name": "BYE"})
-            n += 1
-        
-        # Calculate which pairs to use for this round
-        # For round r, player i plays against player (i + r) % (n-1)
-        # Player n-1 always plays against player (n-1 + r) % (n-1) = r
-        pairings_for_round = []
-        
-        for i in range(n // 2):
-            if i == 0:
-                player1_idx = 0
-                player2_idx = (round_number % (n - 1)) + 1
-            else:
-                player1_idx = i
-                player2_idx = (n - 1 - i + round_number) % (n - 1) + 1
-            
-            if player1_idx >= len(sorted_players) or player2_idx >= len(sorted_players):
-                continue
-            
-            player1 = sorted_players[player1_idx]
-            player2 = sorted_players[player2_idx]
-            
-            if player1["id"] == "BYE":
-                pairings_for_round.append((player2["id"], "BYE"))
-            elif player2["id"] == "BYE":
-                pairings_for_round.append((player1["id"], "BYE"))
+        # Pair this round from the seeding made when the tournament started
+        if "seeds" not in tournament:
+            schedule_round_robin(tournament)
+        
+        seeds = tournament["seeds"]
+        if round_number > berger_rounds(len(seeds)):
+            return False
+        
+        boards = berger_round(len(seeds), round_number)
+        for i in range(0, len(boards), 2):
+            white, black = boards[i], boards[i + 1]
+            # The index past the last seed is the bye
+            if white == len(seeds):
+                pairings.append((seeds[black], "BYE"))
+            elif black == len(seeds):
+                pairings.append((seeds[white], "BYE"))
             else:
-                pairings_for_round.append((player1["id"], player2["id"]))
-        
-        pairings = pairings_for_round
+                pairings.append((seeds[white], seeds[black]))
     
-    elif tournament["format"] == "Single Elimination":
-        # Single Elimination pairing algorithm
-        if round_number == 1:
-            # First round, pair players based on seeding
-            n = len(sorted_players)
-            
-            # If not a power of 2, some players get byes
-            next_power_of_2 = 1
-            while next_power_of_2 < n:
-                next_power_of_2 *= 2
-            
-            byes_needed = next_power_of_2 - n
-            
-            # Create pairings with byes for the lowest seeds
-            for i in range(n // 2):
-                if i < byes_needed:
-                    # Give a bye to the top seed
-                    pairings.append((sorted_players[i]["id"], "BYE"))
-                else:
-                    # Regular pairing
-                    player1_idx = i
-                    player2_idx = n - 1 - i
-                    
-                    if player1_idx >= len(sorted_players) or player2_idx >= len(sorted_players) or player1_idx == player2_idx:
-                        continue
-                    
-                    pairings.append((sorted_players[player1_idx]["id"], sorted_players[player2_idx]["id"]))
-        else:
-            # Subsequent rounds, pair winners of previous round
-            winners = []
-            
-            # Find winners from previous round
-            for match_id in tournament["matches"]:
-                if match_id in matches["matches"]:
-                    match = matches["matches"][match_id]
-                    
-                    if match["round"] == round_number - 1 and match["status"] == "Completed":
-                        if match["result"] == "player1":
-                            winners.append(match["player1_id"])
-                        elif match["result"] == "player2":
-                            winners.append(match["player2_id"])
-                        elif match["result"] == "draw":
-                            # In case of a draw, advance player1 (this should be handled better in a real tournament)
-                            winners.append(match["player1_id"])
-            
-            # Pair winners
-            for i in range(0, len(winners), 2):
-                if i + 1 < len(winners):
-                    pairings.append((winners[i], winners[i + 1]))
-                else:
-                    # Odd number of winners, give a bye
-                    pairings.append((winners[i], "BYE"))
+    elif tournament["format"] in ELIMINATION_FORMATS:
+        # Play every bracket pairing of this round whose players are known
+        if "bracket" not in tournament:
+            build_bracket(tournament)
+        bracket = tournament_bracket(tournament_id)
+        
+        created_match_ids = []
+        for node in bracket.ready_nodes(round_number):
+            match_id = create_match(tournament, round_number, node["slots"][0], node["slots"][1])
+            bracket.assign(node, match_id)
+            created_match_ids.append(match_id)
+        
+        await save_data(MATCHES_FILE, matches, created_match_ids)
+        await save_bracket(tournament_id)
+        return True
     
     # Create match objects for each pairing
+    created_match_ids = []
+    bye_match_ids = []
     for player1_id, player2_id in pairings:
-        # Get player names
-        player1_name = "Unknown Player"
-        if player1_id in players["players"]:
-            player1_name = players["players"][player1_id]["username"]
-        
-        player2_name = "BYE"
-        if player2_id != "BYE" and player2_id in players["players"]:
-            player2_name = players["players"][player2_id]["username"]
-        
-        # Create match
-        match_id = generate_id("M")
-        
-        matches["matches"][match_id] = {
-            "id": match_id,
-            "tournament_id": tournament_id,
-            "round": round_number,
-            "player1_id": player1_id,
-            "player2_id": player2_id,
-            "player1_name": player1_name,
-            "player2_name": player2_name,
-            "status": "Scheduled",
-            "result": None,
-            "moves": [],
-            "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        # Add match to tournament
-        tournament["matches"].append(match_id)
+        match_id = create_match(tournament, round_number, player1_id, player2_id)
+        created_match_ids.append(match_id)
         
         # Auto-complete bye matches
         if player2_id == "BYE":
-            matches["matches"][match_id]["status"] = "Completed"
-            matches["matches"][match_id]["result"] = "player1"
-            matches["matches"][match_id]["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Update player stats
-            if player1_id in players["players"]:
-                players["players"][player1_id]["wins"] += 1
-                if match_id not in players["players"][player1_id]["matches"]:
-                    players["players"][player1_id]["matches"].append(match_id)
+            bye_match_ids.append(match_id)
     
     # Save data
-    save_data(MATCHES_FILE, matches)
-    save_data(PLAYERS_FILE, players)
+    await save_data(MATCHES_FILE, matches, created_match_ids)
+    for match_id in bye_match_ids:
+        await complete_match(match_id, "player1")
     
     return True
 
@@ -1907,13 +2412,7 @@ async def next_round_command(interaction: discord.Interaction, tournament_id: st
     current_round = tournament["current_round"]
     
     # Check if all matches from current round are completed
-    all_completed = True
-    for match_id in tournament["matches"]:
-        if match_id in matches["matches"]:
-            match = matches["matches"][match_id]
-            if match["round"] == current_round and match["status"] != "Completed":
-                all_completed = False
-                break
+    all_completed = round_index.is_round_complete(tournament_id, current_round)
     
     if not all_completed:
         # Create confirmation view
@@ -1949,7 +2448,7 @@ async def start_next_round(interaction: discord.Interaction, tournament_id: str)
         tournament["status"] = "Completed"
         tournament["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        save_data(TOURNAMENTS_FILE, tournaments)
+        await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
         
         # Create final standings
         embed = discord.Embed(
@@ -1980,7 +2479,7 @@ async def start_next_round(interaction: discord.Interaction, tournament_id: str)
         return
     
     # Save data
-    save_data(TOURNAMENTS_FILE, tournaments)
+    await save_data(TOURNAMENTS_FILE, tournaments, [tournament_id])
     
     # Create embed
     embed = discord.Embed(
@@ -2040,8 +2539,8 @@ async def match_info_command(interaction: discord.Interaction, match_id: str):
         embed.add_field(name="Completed", value=match["completed_at"], inline=True)
     
     # Move history
-    if "moves" in match and match["moves"]:
-        move_history = " ".join(match["moves"])
+    move_history = match_movetext(match)
+    if move_history:
         if len(move_history) > 1024:  # Discord field value limit
             move_history = move_history[-1020:] + "..."
         embed.add_field(name="Move History", value=f"```{move_history}```", inline=False)
@@ -2073,20 +2572,17 @@ async def match_info_command(interaction: discord.Interaction, match_id: str):
                 return
             
             # Check if ticket already exists
-            ticket_exists = False
-            for ticket_id, ticket in tickets["tickets"].items():
-                if ticket["match_id"] == self.match_id:
-                    ticket_exists = True
-                    
-                    # Try to get the channel
-                    channel = interaction.guild.get_channel(int(ticket["channel_id"]))
-                    
-                    if channel:
-                        await interaction.response.send_message(f"A match ticket already exists: {channel.mention}", ephemeral=True)
-                    else:
-                        await interaction.response.send_message("A match ticket already exists but the channel could not be found.", ephemeral=True)
-                    
-                    return
+            ticket = ticket_for_match(self.match_id)
+            if ticket:
+                # Try to get the channel
+                channel = interaction.guild.get_channel(int(ticket["channel_id"]))
+                
+                if channel:
+                    await interaction.response.send_message(f"A match ticket already exists: {channel.mention}", ephemeral=True)
+                else:
+                    await interaction.response.send_message("A match ticket already exists but the channel could not be found.", ephemeral=True)
+                
+                return
             
             # Create the ticket
             channel = await MatchTicketSystem.create_match_ticket(interaction.guild, self.match_id)
@@ -2148,48 +2644,15 @@ async def report_match_result(interaction: discord.Interaction, match_id: str, r
         await interaction.response.send_message("Match not found.", ephemeral=True)
         return
     
+    # Once a bracket has moved a result on (or replayed a draw) it cannot be taken back
     match = matches["matches"][match_id]
+    tournament = tournaments["tournaments"].get(match.get("tournament_id"), {})
+    if "bracket" in tournament and match["status"] == "Completed" and match.get("result") != result:
+        await interaction.response.send_message("This elimination match already has a result and the bracket has moved on, so it cannot be changed.", ephemeral=True)
+        return
     
-    # Update match status
-    match["status"] = "Completed"
-    match["result"] = result
-    match["completed_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    match["reported_by"] = str(interaction.user.id)
-    
-
-    # Update player stats
-    player1_id = match["player1_id"]
-    player2_id = match["player2_id"]
-    
-    # Skip updating stats for bye matches
-    if player2_id != "BYE":
-        # Update player1 stats
-        if player1_id in players["players"]:
-            if match_id not in players["players"][player1_id]["matches"]:
-                players["players"][player1_id]["matches"].append(match_id)
-            
-            if result == "player1":
-                players["players"][player1_id]["wins"] += 1
-            elif result == "player2":
-                players["players"][player1_id]["losses"] += 1
-            elif result == "draw":
-                players["players"][player1_id]["draws"] += 1
-        
-        # Update player2 stats
-        if player2_id in players["players"]:
-            if match_id not in players["players"][player2_id]["matches"]:
-                players["players"][player2_id]["matches"].append(match_id)
-            
-            if result == "player2":
-                players["players"][player2_id]["wins"] += 1
-            elif result == "player1":
-                players["players"][player2_id]["losses"] += 1
-            elif result == "draw":
-                players["players"][player2_id]["draws"] += 1
-    
-    # Save data
-    save_data(MATCHES_FILE, matches)
-    save_data(PLAYERS_FILE, players)
+    # Record the result and update player stats
+    match = await complete_match(match_id, result, str(interaction.user.id))
     
     # Create result message
     if result == "player1":
@@ -2206,162 +2669,47 @@ async def report_match_result(interaction: discord.Interaction, match_id: str, r
     await interaction.channel.send(f"📢 Match result reported: {result_text}")
     
     # If this match has a ticket, update it
-    for ticket_id, ticket in tickets["tickets"].items():
-        if ticket["match_id"] == match_id:
-            try:
-                channel = interaction.guild.get_channel(int(ticket["channel_id"]))
-                if channel:
-                    await channel.send(f"📢 Match result reported: {result_text}")
-                    
-                    # Update ticket status
-                    ticket["status"] = "Completed"
-                    save_data(TICKETS_FILE, tickets)
-                    
-                    # Send closing message
-                    await channel.send("This match ticket will be archived in 24 hours.")
-            except:
-                pass
-            break
-
-# Match Ticket System
-class MatchTicketSystem:
-    @staticmethod
-    async def create_match_ticket(guild, match_id):
-        """Create a new match ticket channel"""
-        if match_id not in matches["matches"]:
-            return None
-        
-        match = matches["matches"][match_id]
-        
-        # Check if a ticket already exists for this match
-        for ticket_id, ticket in tickets["tickets"].items():
-            if ticket["match_id"] == match_id:
-                # Try to get the channel
-                try:
-                    channel = guild.get_channel(int(ticket["channel_id"]))
-                    if channel:
-                        return channel
-                except:
-                    pass
-        
-        # Get player information
-        player1_id = match["player1_id"]
-        player2_id = match["player2_id"]
-        
-        # Skip creating tickets for bye matches
-        if player2_id == "BYE":
-            return None
-        
-        player1_name = match["player1_name"]
-        player2_name = match["player2_name"]
-        
-        # Get tournament information
-        tournament_name = "Unknown Tournament"
-        if "tournament_id" in match and match["tournament_id"] in tournaments["tournaments"]:
-            tournament_name = tournaments["tournaments"][match["tournament_id"]]["name"]
-        
-        # Create channel name
-        channel_name = f"match-{player1_name.lower()}-vs-{player2_name.lower()}"
-        channel_name = channel_name.replace(" ", "-")
-        if len(channel_name) > 90:  # Discord channel name limit is 100 chars
-            channel_name = channel_name[:90]
-        
-        # Find or create match tickets category
-        category = None
-        for cat in guild.categories:
-            if cat.name == "Match Tickets":
-                category = cat
-                break
-        
-        if not category:
-            try:
-                # Create the category
-                category = await guild.create_category("Match Tickets")
+    ticket = ticket_for_match(match_id)
+    if ticket:
+        try:
+            channel = interaction.guild.get_channel(int(ticket["channel_id"]))
+            if channel:
+                await channel.send(f"📢 Match result reported: {result_text}")
                 
-                # Set permissions for the category
-                everyone_role = guild.default_role
-                await category.set_permissions(everyone_role, read_messages=False)
+                # Update ticket status
+                ticket["status"] = "Completed"
+                await save_data(TICKETS_FILE, tickets, [ticket["id"]])
                 
-                # Grant access to tournament staff
-                for role in guild.roles:
-                    if role.name in ["Tournament Director", "Moderator", "Arbiter"]:
-                        await category.set_permissions(role, read_messages=True, send_messages=True, manage_messages=True)
-            except Exception as e:
-                print(f"Error creating category: {e}")
-                return None
-        
-        try:
-            # Create the channel
-            channel = await guild.create_text_channel(
-                name=channel_name,
-                category=category,
-                topic=f"Match ticket for {player1_name} vs {player2_name} - Round {match['round']} of {tournament_name}"
-            )
-            
-            # Set permissions for the players
-            try:
-                # Player 1
-                player1_member = await guild.fetch_member(int(player1_id))
-                await channel.set_permissions(player1_member, read_messages=True, send_messages=True)
-            except:
-                pass
-            
-            try:
-                # Player 2
-                player2_member = await guild.fetch_member(int(player2_id))
-                await channel.set_permissions(player2_member, read_messages=True, send_messages=True)
-            except:
-                pass
-            
-            # Create ticket record
-            ticket_id = generate_id("T")
-            
-            tickets["tickets"][ticket_id] = {
-                "id": ticket_id,
-                "match_id": match_id,
-                "channel_id": str(channel.id),
-                "status": "Open",
-                "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            save_data(TICKETS_FILE, tickets)
-            
-            # Send welcome message
-            embed = discord.Embed(
-                title=f"Match: {player1_name} vs {player2_name}",
-                description=f"Welcome to your match ticket for Round {match['round']} of {tournament_name}.",
-                color=discord.Color.blue()
-            )
-            
-            embed.add_field(
-                name="Instructions",
-                value=(
-                    "1. Use this channel to coordinate your match.\n"
-                    "2. Share your chess.com/lichess username if needed.\n"
-                    "3. Agree on a time to play.\n"
-                    "4. After the match, report the result using the buttons below.\n"
-                    "5. If you need assistance, use the 'Call Arbiter' button."
-                ),
-                inline=False
-            )
-            
-            embed.add_field(name="Match ID", value=match_id, inline=True)
-            embed.add_field(name="Round", value=str(match["round"]), inline=True)
-            
-            # Create match control panel
-            match_panel = MatchControlPanel(match_id)
-            
-            await channel.send(
-                f"<@{player1_id}> <@{player2_id}> Welcome to your match ticket!",
-                embed=embed,
-                view=match_panel
-            )
-            
-            return channel
-            
-        except Exception as e:
-            print(f"Error creating match ticket: {e}")
-            return None
+                # Send closing message
+                await channel.send("This match ticket will be archived in 24 hours.")
+        except:
+            pass
+
+# Warm restart hooks for the chess board views
+def dump_board_views(bot):
+    """Describe the live chess boards so they can be re-attached after a restart"""
+    return [
+        {
+            "match_id": view.match_id,
+            "message_id": view.message_id,
+            "fen": view.current_fen,
+            "white_to_move": view.white_to_move,
+            "last_move": view.last_move
+        }
+        for view in board_views.values()
+        if view.message_id and matches["matches"].get(view.match_id, {}).get("status") != "Completed"
+    ]
+
+def restore_board_views(bot, state):
+    """Re-attach persistent chess board views from a warm restart snapshot"""
+    for entry in state:
+        if entry["match_id"] not in matches["matches"]:
+            continue
+        view = ChessBoardView(entry["match_id"], entry["fen"], message_id=entry["message_id"])
+        view.white_to_move = entry["white_to_move"]
+        view.last_move = entry["last_move"]
+        board_views[view.match_id] = view
+        bot.add_view(view, message_id=int(view.message_id))
 
 # Setup function to register commands
 def setup(bot):
@@ -2405,6 +2753,24 @@ def setup(bot):
         callback=tournament_matches_command
     ))
     
+    chess_group.add_command(app_commands.Command(
+        name="tournament_bracket",
+        description="Show the bracket of an elimination tournament",
+        callback=tournament_bracket_command
+    ))
+    
+    chess_group.add_command(app_commands.Command(
+        name="export",
+        description="Export a tournament as PGN or a TRF report",
+        callback=export_tournament_command
+    ))
+    
+    chess_group.add_command(app_commands.Command(
+        name="import",
+        description="Import players and results from a CSV or TRF file",
+        callback=import_tournament_command
+    ))
+    
     chess_group.add_command(app_commands.Command(
         name="start_tournament",
         description="Start a chess tournament",
@@ -2436,6 +2802,12 @@ def setup(bot):
         callback=player_profile_command
     ))
     
+    chess_group.add_command(app_commands.Command(
+        name="leaderboard",
+        description="View the rating leaderboard",
+        callback=leaderboard_command
+    ))
+    
     # Match commands
     chess_group.add_command(app_commands.Command(
         name="match",
@@ -2449,5 +2821,15 @@ def setup(bot):
     # Initialize data files
     load_data()
     
+    # Start folding the journal back into the snapshot files in the background
+    if PERSISTENCE_MODE == "journal":
+        journal.start(data_files)
+    
+    # One task runs every chess clock
+    clocks.start_task(lambda match_id: flag_fall(bot, match_id))
+    
+    # Carry live chess boards across restarts
+    warm_restart.register("chess_board_views", dump_board_views, restore_board_views)
+    
     # Log setup
     print("Chess tournament commands registered as group")
@@ -0,0 +1,629 @@
+# chess_engine.py - Chess rules on a 0x88 board: FEN, SAN/UCI parsing and legal moves
+#
+# Squares are 0x88 indexes: rank * 16 + file, with a1 = 0 and h8 = 119. A
+# square is on the board when (square & 0x88) == 0. Pieces are FEN letters,
+# upper case for white and lower case for black; empty squares are None.
+import base64
+import random
+import re
+import sys
+from array import array
+from collections import namedtuple
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# origin and target are 0x88 squares; promotion is "q", "r", "b", "n" or None
+Move = namedtuple("Move", "origin target promotion")
+
+KNIGHT_STEPS = (-33, -31, -18, -14, 14, 18, 31, 33)
+BISHOP_STEPS = (-17, -15, 15, 17)
+ROOK_STEPS = (-16, -1, 1, 16)
+KING_STEPS = BISHOP_STEPS + ROOK_STEPS
+
+# Castling rights as bits, and the rights that survive a move from or to each square
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_LETTERS = ((WHITE_KINGSIDE, "K"), (WHITE_QUEENSIDE, "Q"), (BLACK_KINGSIDE, "k"), (BLACK_QUEENSIDE, "q"))
+CASTLING_KEEP = [15] * 128
+CASTLING_KEEP[0x00] = 15 & ~WHITE_QUEENSIDE
+CASTLING_KEEP[0x04] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_KEEP[0x07] = 15 & ~WHITE_KINGSIDE
+CASTLING_KEEP[0x70] = 15 & ~BLACK_QUEENSIDE
+CASTLING_KEEP[0x74] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_KEEP[0x77] = 15 & ~BLACK_KINGSIDE
+
+SQUARES = [square for square in range(128) if not square & 0x88]
+
+# Zobrist keys: one random 64-bit number per (piece, square), castling
+# rights value, en passant file and side to move; a position's hash is the
+# XOR of the keys that apply to it
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = {piece: [_zobrist_random.getrandbits(64) for _ in range(128)] for piece in "PNBRQKpnbrqk"}
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]
+ZOBRIST_BLACK = _zobrist_random.getrandbits(64)
+
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQnbrq]))?$")
+UCI_PATTERN = re.compile(r"^([a-h][1-8])([a-h][1-8])([qrbn])?$")
+
+
+class IllegalMoveError(ValueError):
+    """A move that cannot be parsed or is not legal in the position"""
+
+
+def square_name(square):
+    return "abcdefgh"[square & 7] + str((square >> 4) + 1)
+
+
+def parse_square(name):
+    return (int(name[1]) - 1) * 16 + "abcdefgh".index(name[0])
+
+
+def colour_of(piece):
+    return "w" if piece.isupper() else "b"
+
+
+# Packed moves: 16 bits per move, origin and target as 0-63 in bits 0-5 and
+# 6-11, promotion in bits 12-14 (0 for none). Stored as little-endian bytes
+# in base64.
+PROMOTION_CODES = {None: 0, "n": 1, "b": 2, "r": 3, "q": 4}
+PROMOTIONS = {code: piece for piece, code in PROMOTION_CODES.items()}
+
+
+def encode_move(move):
+    origin = (move.origin >> 4) * 8 + (move.origin & 7)
+    target = (move.target >> 4) * 8 + (move.target & 7)
+    return origin | target << 6 | PROMOTION_CODES[move.promotion] << 12
+
+
+def decode_move(code):
+    origin = code & 63
+    target = code >> 6 & 63
+    return Move((origin >> 3) * 16 + (origin & 7), (target >> 3) * 16 + (target & 7), PROMOTIONS[code >> 12 & 7])
+
+
+def pack_codes(codes):
+    """Base64 text for an array('H') of move codes"""
+    if sys.byteorder == "big":
+        codes = array("H", codes)
+        codes.byteswap()
+    return base64.b64encode(codes.tobytes()).decode("ascii")
+
+
+def unpack_codes(text):
+    """array('H') of move codes from pack_codes() text"""
+    codes = array("H")
+    codes.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        codes.byteswap()
+    return codes
+
+
+def pack_moves(moves):
+    """Base64 text for a list of moves"""
+    return pack_codes(array("H", (encode_move(move) for move in moves)))
+
+
+def unpack_moves(text):
+    """Moves from pack_moves() text"""
+    return [decode_move(code) for code in unpack_codes(text)]
+
+
+def pack_hashes(hashes):
+    """Base64 text for an array('Q') (or list) of position hashes"""
+    if sys.byteorder == "big" or not isinstance(hashes, array):
+        hashes = array("Q", hashes)
+        if sys.byteorder == "big":
+            hashes.byteswap()
+    return base64.b64encode(hashes.tobytes()).decode("ascii")
+
+
+def unpack_hashes(text):
+    """array('Q') of position hashes from pack_hashes() text"""
+    hashes = array("Q")
+    hashes.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        hashes.byteswap()
+    return hashes
+
+
+def san_moves(moves, fen=START_FEN):
+    """SAN of each move, replayed from fen"""
+    position = Position(fen)
+    return [position.push(move) for move in moves]
+
+
+def movetext(sans, fen=START_FEN):
+    """Numbered move text like "1. e4 e5 2. Nf3" """
+    fields = fen.split()
+    number = int(fields[5]) if len(fields) > 5 else 1
+    white = fields[1] == "w"
+    parts = []
+    for index, san in enumerate(sans):
+        if white:
+            parts.append(f"{number}. {san}")
+        elif index == 0:
+            parts.append(f"{number}... {san}")
+        else:
+            parts.append(san)
+        if not white:
+            number += 1
+        white = not white
+    return " ".join(parts)
+
+
+class Position:
+    """A chess position that moves are made on in place"""
+
+    def __init__(self, fen=START_FEN):
+        self.set_fen(fen)
+
+    def set_fen(self, fen):
+        """Load a position from FEN; raises ValueError if it is malformed"""
+        fields = fen.split()
+        if len(fields) == 4:
+            fields += ["0", "1"]
+        if len(fields) != 6:
+            raise ValueError(f"Invalid FEN: {fen}")
+        placement, turn, castling, en_passant, halfmove, fullmove = fields
+
+        self.board = [None] * 128
+        self.kings = {}
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"Invalid FEN: {fen}")
+        for rank_index, rank in enumerate(ranks):
+            file = 0
+            for char in rank:
+                if char.isdigit():
+                    file += int(char)
+                elif char in "PNBRQKpnbrqk" and file < 8:
+                    square = (7 - rank_index) * 16 + file
+                    self.board[square] = char
+                    if char in "Kk":
+                        self.kings[colour_of(char)] = square
+                    file += 1
+                else:
+                    raise ValueError(f"Invalid FEN: {fen}")
+            if file != 8:
+                raise ValueError(f"Invalid FEN: {fen}")
+        if set(self.kings) != {"w", "b"} or turn not in ("w", "b"):
+            raise ValueError(f"Invalid FEN: {fen}")
+
+        self.turn = turn
+        self.castling = 0
+        for bit, letter in CASTLING_LETTERS:
+            if letter in castling:
+                self.castling |= bit
+        self.en_passant = parse_square(en_passant) if en_passant != "-" else None
+        self.halfmove = int(halfmove)
+        self.fullmove = int(fullmove)
+        self.undo_stack = []
+        self.hash = self.zobrist_hash()
+
+    def fen(self):
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for file in range(8):
+                piece = self.board[rank * 16 + file]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += piece
+            rows.append(row + (str(empty) if empty else ""))
+        castling = "".join(letter for bit, letter in CASTLING_LETTERS if self.castling & bit) or "-"
+        en_passant = square_name(self.en_passant) if self.en_passant is not None else "-"
+        return f"{'/'.join(rows)} {self.turn} {castling} {en_passant} {self.halfmove} {self.fullmove}"
+
+    def copy(self):
+        return Position(self.fen())
+
+    def zobrist_hash(self):
+        """Hash of the position from scratch (make() keeps self.hash up to date)"""
+        value = ZOBRIST_CASTLING[self.castling] ^ self._en_passant_key()
+        for square in SQUARES:
+            if self.board[square] is not None:
+                value ^= ZOBRIST_PIECES[self.board[square]][square]
+        if self.turn == "b":
+            value ^= ZOBRIST_BLACK
+        return value
+
+    def _en_passant_key(self):
+        """En passant only counts towards the position when a pawn could take"""
+        if self.en_passant is None:
+            return 0
+        if self.turn == "w":
+            pawn, sources = "P", (self.en_passant - 15, self.en_passant - 17)
+        else:
+            pawn, sources = "p", (self.en_passant + 15, self.en_passant + 17)
+        if any(not source & 0x88 and self.board[source] == pawn for source in sources):
+            return ZOBRIST_EN_PASSANT[self.en_passant & 7]
+        return 0
+
+    # Attacks
+
+    def attacked(self, square, by):
+        """True if any piece of colour by attacks square"""
+        board = self.board
+        if by == "w":
+            pawn, knight, bishop, rook, queen, king = "PNBRQK"
+            pawn_sources = (square - 15, square - 17)
+        else:
+            pawn, knight, bishop, rook, queen, king = "pnbrqk"
+            pawn_sources = (square + 15, square + 17)
+
+        for source in pawn_sources:
+            if not source & 0x88 and board[source] == pawn:
+                return True
+        for step in KNIGHT_STEPS:
+            source = square + step
+            if not source & 0x88 and board[source] == knight:
+                return True
+        for step in KING_STEPS:
+            source = square + step
+            if not source & 0x88 and board[source] == king:
+                return True
+        for steps, slider in ((BISHOP_STEPS, bishop), (ROOK_STEPS, rook)):
+            for step in steps:
+                source = square + step
+                while not source & 0x88:
+                    piece = board[source]
+                    if piece is not None:
+                        if piece == slider or piece == queen:
+                            return True
+                        break
+                    source += step
+        return False
+
+    def in_check(self):
+        return self.attacked(self.kings[self.turn], "b" if self.turn == "w" else "w")
+
+    # Move generation
+
+    def pseudo_legal_moves(self):
+        """Moves that follow piece movement rules but may leave the king in check"""
+        board = self.board
+        white = self.turn == "w"
+        them = "b" if white else "w"
+        moves = []
+        for origin in SQUARES:
+            piece = board[origin]
+            if piece is None or piece.isupper() != white:
+                continue
+            kind = piece.upper()
+
+            if kind == "P":
+                forward = 16 if white else -16
+                promotion_rank = 7 if white else 0
+                start_rank = 1 if white else 6
+                target = origin + forward
+                if not target & 0x88 and board[target] is None:
+                    self._add_pawn_move(moves, origin, target, promotion_rank)
+                    double = target + forward
+                    if origin >> 4 == start_rank and board[double] is None:
+                        moves.append(Move(origin, double, None))
+                for target in (origin + forward - 1, origin + forward + 1):
+                    if target & 0x88:
+                        continue
+                    captured = board[target]
+                    if (captured is not None and captured.isupper() != white) or target == self.en_passant:
+                        self._add_pawn_move(moves, origin, target, promotion_rank)
+                continue
+
+            if kind in "NK":
+                for step in KNIGHT_STEPS if kind == "N" else KING_STEPS:
+                    target = origin + step
+                    if not target & 0x88 and (board[target] is None or board[target].isupper() != white):
+                        moves.append(Move(origin, target, None))
+                if kind == "K":
+                    self._add_castling(moves, origin, them)
+                continue
+
+            steps = BISHOP_STEPS if kind == "B" else ROOK_STEPS if kind == "R" else KING_STEPS
+            for step in steps:
+                target = origin + step
+                while not target & 0x88:
+                    captured = board[target]
+                    if captured is None:
+                        moves.append(Move(origin, target, None))
+                    else:
+                        if captured.isupper() != white:
+                            moves.append(Move(origin, target, None))
+                        break
+                    target += step
+        return moves
+
+    def _add_pawn_move(self, moves, origin, target, promotion_rank):
+        if target >> 4 == promotion_rank:
+            for promotion in "qrbn":
+                moves.append(Move(origin, target, promotion))
+        else:
+            moves.append(Move(origin, target, None))
+
+    def _add_castling(self, moves, origin, them):
+        board = self.board
+        if self.turn == "w":
+            home, kingside, queenside, rook = 0x04, WHITE_KINGSIDE, WHITE_QUEENSIDE, "R"
+        else:
+            home, kingside, queenside, rook = 0x74, BLACK_KINGSIDE, BLACK_QUEENSIDE, "r"
+        if origin != home or not self.castling & (kingside | queenside) or self.attacked(home, them):
+            return
+        if (self.castling & kingside and board[home + 3] == rook and board[home + 1] is None and board[home + 2] is None
+                and not self.attacked(home + 1, them) and not self.attacked(home + 2, them)):
+            moves.append(Move(home, home + 2, None))
+        if (self.castling & queenside and board[home - 4] == rook and board[home - 1] is None and board[home - 2] is None
+                and board[home - 3] is None and not self.attacked(home - 1, them) and not self.attacked(home - 2, them)):
+            moves.append(Move(home, home - 2, None))
+
+    def legal_moves(self):
+        moves = []
+        us = self.turn
+        them = "b" if us == "w" else "w"
+        king = self.kings[us]
+
+        # Out of check, only king moves, en passant and moves by the first
+        # piece on a line from the king can expose it; the rest are legal
+        pinnable = None
+        if not self.attacked(king, them):
+            pinnable = set()
+            for step in KING_STEPS:
+                square = king + step
+                while not square & 0x88 and self.board[square] is None:
+                    square += step
+                if not square & 0x88 and colour_of(self.board[square]) == us:
+                    pinnable.add(square)
+
+        for move in self.pseudo_legal_moves():
+            if (pinnable is not None and move.origin != king and move.origin not in pinnable
+                    and not (move.target == self.en_passant and self.board[move.origin] in "Pp")):
+                moves.append(move)
+                continue
+            self.make(move)
+            if not self.attacked(self.kings[us], them):
+                moves.append(move)
+            self.unmake()
+        return moves
+
+    def is_legal(self, move):
+        return move in self.legal_moves()
+
+    # Making moves
+
+    def make(self, move):
+        """Play a move without checking it; undo with unmake()"""
+        board = self.board
+        origin, target, promotion = move
+        piece = board[origin]
+        white = piece.isupper()
+        captured_square = target
+        if piece in "Pp" and target == self.en_passant:
+            captured_square = target - 16 if white else target + 16
+        captured = board[captured_square]
+
+        self.undo_stack.append((move, piece, captured, captured_square, self.castling, self.en_passant, self.halfmove, self.hash))
+
+        placed = (promotion.upper() if white else promotion) if promotion else piece
+        value = self.hash ^ ZOBRIST_CASTLING[self.castling] ^ self._en_passant_key() ^ ZOBRIST_BLACK
+        value ^= ZOBRIST_PIECES[piece][origin] ^ ZOBRIST_PIECES[placed][target]
+        if captured:
+            value ^= ZOBRIST_PIECES[captured][captured_square]
+
+        board[captured_square] = None
+        board[origin] = None
+        board[target] = placed
+
+        if piece in "Kk":
+            self.kings[self.turn] = target
+            rook = "R" if white else "r"
+            if target - origin == 2:
+                board[origin + 1], board[origin + 3] = board[origin + 3], None
+                value ^= ZOBRIST_PIECES[rook][origin + 3] ^ ZOBRIST_PIECES[rook][origin + 1]
+            elif origin - target == 2:
+                board[origin - 1], board[origin - 4] = board[origin - 4], None
+                value ^= ZOBRIST_PIECES[rook][origin - 4] ^ ZOBRIST_PIECES[rook][origin - 1]
+
+        self.castling &= CASTLING_KEEP[origin] & CASTLING_KEEP[target]
+        self.en_passant = (origin + target) // 2 if piece in "Pp" and abs(target - origin) == 32 else None
+        self.halfmove = 0 if piece in "Pp" or captured else self.halfmove + 1
+        if not white:
+            self.fullmove += 1
+        self.turn = "b" if white else "w"
+        self.hash = value ^ ZOBRIST_CASTLING[self.castling] ^ self._en_passant_key()
+
+    def unmake(self):
+        move, piece, captured, captured_square, castling, en_passant, halfmove, self.hash = self.undo_stack.pop()
+        board = self.board
+        origin, target, _ = move
+        white = piece.isupper()
+
+        board[target] = None
+        board[origin] = piece
+        board[captured_square] = captured
+
+        if piece in "Kk":
+            self.kings["w" if white else "b"] = origin
+            if target - origin == 2:
+                board[origin + 3], board[origin + 1] = board[origin + 1], None
+            elif origin - target == 2:
+                board[origin - 4], board[origin - 1] = board[origin - 1], None
+
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmove = halfmove
+        if not white:
+            self.fullmove -= 1
+        self.turn = "w" if white else "b"
+
+    def push(self, move):
+        """Play a legal move and return its SAN"""
+        san = self.san(move)
+        self.make(move)
+        return san
+
+    # Notation
+
+    def parse_uci(self, text):
+        """Move for UCI text like e2e4 or e7e8q; raises IllegalMoveError"""
+        found = UCI_PATTERN.match(text.strip().lower())
+        if not found:
+            raise IllegalMoveError(f"Not a UCI move: {text}")
+        origin, target = parse_square(found.group(1)), parse_square(found.group(2))
+        candidates = [move for move in self.legal_moves() if move.origin == origin and move.target == target]
+        if not candidates:
+            raise IllegalMoveError(f"Illegal move: {text}")
+        # Promote to a queen unless told otherwise
+        promotion = found.group(3) or "q"
+        for move in candidates:
+            if move.promotion in (None, promotion):
+                return move
+        raise IllegalMoveError(f"Illegal move: {text}")
+
+    def parse_san(self, text):
+        """Move for SAN text like Nf3, exd5, e8=Q or O-O; raises IllegalMoveError"""
+        san = text.strip().rstrip("+#!?").replace("0", "O")
+        legal = self.legal_moves()
+
+        if san in ("O-O", "O-O-O"):
+            home = self.kings[self.turn]
+            target = home + 2 if san == "O-O" else home - 2
+            for move in legal:
+                if move.origin == home and move.target == target and self.board[home] in "Kk":
+                    return move
+            raise IllegalMoveError(f"Illegal move: {text}")
+
+        found = SAN_PATTERN.match(san)
+        if not found:
+            raise IllegalMoveError(f"Not a move: {text}")
+        kind, from_file, from_rank, target_name, promotion = found.groups()
+        kind = kind or "P"
+        target = parse_square(target_name)
+        if promotion:
+            promotion = promotion.lower()
+        elif kind == "P" and target >> 4 in (0, 7):
+            promotion = "q"
+
+        candidates = [
+            move for move in legal
+            if move.target == target
+            and self.board[move.origin].upper() == kind
+            and (from_file is None or move.origin & 7 == "abcdefgh".index(from_file))
+            and (from_rank is None or move.origin >> 4 == int(from_rank) - 1)
+            and move.promotion == promotion
+        ]
+        if len(candidates) == 1:
+            return candidates[0]
+        if candidates:
+            raise IllegalMoveError(f"Ambiguous move: {text}")
+        raise IllegalMoveError(f"Illegal move: {text}")
+
+    def parse_move(self, text):
+        """Move for UCI or SAN text; raises IllegalMoveError"""
+        if UCI_PATTERN.match(text.strip().lower()):
+            try:
+                return self.parse_uci(text)
+            except IllegalMoveError:
+                pass
+        return self.parse_san(text)
+
+    def uci(self, move):
+        return square_name(move.origin) + square_name(move.target) + (move.promotion or "")
+
+    def san(self, move, legal=None):
+        """SAN of a legal move, with + or # when it gives check or mate"""
+        origin, target, promotion = move
+        piece = self.board[origin]
+        kind = piece.upper()
+
+        if kind == "K" and abs(target - origin) == 2:
+            san = "O-O" if target > origin else "O-O-O"
+        elif kind == "P":
+            san = ""
+            if origin & 7 != target & 7:
+                san = "abcdefgh"[origin & 7] + "x"
+            san += square_name(target)
+            if promotion:
+                san += "=" + promotion.upper()
+        else:
+            # Disambiguate between identical pieces that can reach the same square
+            legal = legal if legal is not None else self.legal_moves()
+            rivals = [
+                other.origin for other in legal
+                if other.target == target and other.origin != origin and self.board[other.origin] == piece
+            ]
+            prefix = ""
+            if rivals:
+                if all(rival & 7 != origin & 7 for rival in rivals):
+                    prefix = "abcdefgh"[origin & 7]
+                elif all(rival >> 4 != origin >> 4 for rival in rivals):
+                    prefix = str((origin >> 4) + 1)
+                else:
+                    prefix = square_name(origin)
+            capture = "x" if self.board[target] is not None else ""
+            san = kind + prefix + capture + square_name(target)
+
+        self.make(move)
+        if self.in_check():
+            san += "#" if not self.legal_moves() else "+"
+        self.unmake()
+        return san
+
+    # Game state
+
+    def insufficient_material(self):
+        """True when neither side can mate: bare kings, one minor piece, or only same-coloured bishops"""
+        pieces = [(square, self.board[square]) for square in SQUARES if self.board[square] not in (None, "K", "k")]
+        if not pieces:
+            return True
+        if len(pieces) == 1 and pieces[0][1] in "NBnb":
+            return True
+        return all(piece in "Bb" for _, piece in pieces) and len({((square >> 4) + square) % 2 for square, _ in pieces}) == 1
+
+    def has_mating_material(self, colour):
+        """False when a side has only its king, or a king and one minor piece"""
+        pieces = [self.board[square] for square in SQUARES
+                  if self.board[square] not in (None, "K", "k") and colour_of(self.board[square]) == colour]
+        return len(pieces) > 1 or (len(pieces) == 1 and pieces[0] not in "NBnb")
+
+    def outcome(self, repetitions=1):
+        """How the game ends in this position, or None if it goes on.
+
+        repetitions is how often the position has occurred. Checkmate,
+        stalemate, fivefold repetition, the 75-move rule and insufficient
+        material end the game without a claim.
+        """
+        if not self.legal_moves():
+            return "checkmate" if self.in_check() else "stalemate"
+        if repetitions >= 5:
+            return "fivefold repetition"
+        if self.halfmove >= 150:
+            return "seventy-five-move rule"
+        if self.insufficient_material():
+            return "insufficient material"
+        return None
+
+    def claimable_draw(self, repetitions=1):
+        """Draw a player may claim here (threefold repetition or the 50-move rule), or None"""
+        if repetitions >= 3:
+            return "threefold repetition"
+        if self.halfmove >= 100:
+            return "fifty-move rule"
+        return None
+
+
+def perft(position, depth):
+    """Count leaf nodes of the legal move tree (for checking move generation)"""
+    if depth == 0:
+        return 1
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make(move)
+        nodes += perft(position, depth - 1)
+        position.unmake()
+    return nodes
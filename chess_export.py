@@ -0,0 +1,251 @@
+# chess_export.py - Stream whole tournaments out as PGN or a FIDE TRF-16 report
+#
+# The exporters are generators that yield one game (PGN) or one line (TRF)
+# at a time, and write_export() streams them into a file, so memory stays
+# flat however many games a tournament has. They only read the plain
+# tournament, match and player records handed to them.
+from chess_engine import START_FEN, movetext, san_moves, unpack_moves
+
+PGN_RESULTS = {"player1": "1-0", "player2": "0-1", "draw": "1/2-1/2"}
+
+# ECO code and name by SAN move order; classify() uses the longest match
+OPENINGS = {
+    ("e4",): ("B00", "King's Pawn Opening"),
+    ("d4",): ("A40", "Queen's Pawn Game"),
+    ("c4",): ("A10", "English Opening"),
+    ("Nf3",): ("A04", "Zukertort Opening"),
+    ("f4",): ("A02", "Bird's Opening"),
+    ("b3",): ("A01", "Nimzo-Larsen Attack"),
+    ("g3",): ("A00", "Hungarian Opening"),
+    ("b4",): ("A00", "Polish Opening"),
+    ("e3",): ("A00", "Van 't Kruijs Opening"),
+    ("Nc3",): ("A00", "Van Geet Opening"),
+    ("d3",): ("A00", "Mieses Opening"),
+    ("g4",): ("A00", "Grob Opening"),
+    ("e4", "e5"): ("C20", "King's Pawn Game"),
+    ("e4", "e5", "Nf3"): ("C40", "King's Knight Opening"),
+    ("e4", "e5", "Nf3", "Nc6"): ("C44", "King's Knight Opening: Normal Variation"),
+    ("e4", "e5", "Nf3", "Nc6", "Bb5"): ("C60", "Ruy Lopez"),
+    ("e4", "e5", "Nf3", "Nc6", "Bb5", "a6"): ("C70", "Ruy Lopez: Morphy Defense"),
+    ("e4", "e5", "Nf3", "Nc6", "Bb5", "Nf6"): ("C65", "Ruy Lopez: Berlin Defense"),
+    ("e4", "e5", "Nf3", "Nc6", "Bc4"): ("C50", "Italian Game"),
+    ("e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5"): ("C50", "Italian Game: Giuoco Piano"),
+    ("e4", "e5", "Nf3", "Nc6", "Bc4", "Nf6"): ("C55", "Italian Game: Two Knights Defense"),
+    ("e4", "e5", "Nf3", "Nc6", "d4"): ("C44", "Scotch Game"),
+    ("e4", "e5", "Nf3", "Nc6", "d4", "exd4", "Nxd4"): ("C45", "Scotch Game"),
+    ("e4", "e5", "Nf3", "Nc6", "Nc3"): ("C46", "Three Knights Opening"),
+    ("e4", "e5", "Nf3", "Nc6", "Nc3", "Nf6"): ("C47", "Four Knights Game"),
+    ("e4", "e5", "Nf3", "Nf6"): ("C42", "Petrov's Defense"),
+    ("e4", "e5", "Nf3", "d6"): ("C41", "Philidor Defense"),
+    ("e4", "e5", "f4"): ("C30", "King's Gambit"),
+    ("e4", "e5", "f4", "exf4"): ("C33", "King's Gambit Accepted"),
+    ("e4", "e5", "Nc3"): ("C25", "Vienna Game"),
+    ("e4", "e5", "Bc4"): ("C23", "Bishop's Opening"),
+    ("e4", "e5", "d4", "exd4"): ("C21", "Center Game"),
+    ("e4", "c5"): ("B20", "Sicilian Defense"),
+    ("e4", "c5", "c3"): ("B22", "Sicilian Defense: Alapin Variation"),
+    ("e4", "c5", "Nc3"): ("B23", "Sicilian Defense: Closed"),
+    ("e4", "c5", "Nf3", "Nc6"): ("B30", "Sicilian Defense: Old Sicilian"),
+    ("e4", "c5", "Nf3", "e6"): ("B40", "Sicilian Defense: French Variation"),
+    ("e4", "c5", "Nf3", "d6"): ("B50", "Sicilian Defense: Modern Variations"),
+    ("e4", "c5", "Nf3", "d6", "d4", "cxd4", "Nxd4", "Nf6", "Nc3", "g6"): ("B70", "Sicilian Defense: Dragon Variation"),
+    ("e4", "c5", "Nf3", "d6", "d4", "cxd4", "Nxd4", "Nf6", "Nc3", "a6"): ("B90", "Sicilian Defense: Najdorf Variation"),
+    ("e4", "e6"): ("C00", "French Defense"),
+    ("e4", "e6", "d4", "d5", "exd5"): ("C01", "French Defense: Exchange Variation"),
+    ("e4", "e6", "d4", "d5", "e5"): ("C02", "French Defense: Advance Variation"),
+    ("e4", "e6", "d4", "d5", "Nd2"): ("C03", "French Defense: Tarrasch Variation"),
+    ("e4", "e6", "d4", "d5", "Nc3"): ("C10", "French Defense: Paulsen Variation"),
+    ("e4", "c6"): ("B10", "Caro-Kann Defense"),
+    ("e4", "c6", "d4", "d5"): ("B12", "Caro-Kann Defense"),
+    ("e4", "c6", "d4", "d5", "e5"): ("B12", "Caro-Kann Defense: Advance Variation"),
+    ("e4", "c6", "d4", "d5", "exd5", "cxd5"): ("B13", "Caro-Kann Defense: Exchange Variation"),
+    ("e4", "d5"): ("B01", "Scandinavian Defense"),
+    ("e4", "Nf6"): ("B02", "Alekhine Defense"),
+    ("e4", "g6"): ("B06", "Modern Defense"),
+    ("e4", "d6", "d4", "Nf6"): ("B07", "Pirc Defense"),
+    ("d4", "d5"): ("D00", "Queen's Pawn Game"),
+    ("d4", "d5", "Bf4"): ("D00", "Queen's Pawn Game: Accelerated London System"),
+    ("d4", "d5", "Nf3"): ("D02", "Queen's Pawn Game: Zukertort Variation"),
+    ("d4", "d5", "c4"): ("D06", "Queen's Gambit"),
+    ("d4", "d5", "c4", "c6"): ("D10", "Slav Defense"),
+    ("d4", "d5", "c4", "dxc4"): ("D20", "Queen's Gambit Accepted"),
+    ("d4", "d5", "c4", "e6"): ("D30", "Queen's Gambit Declined"),
+    ("d4", "Nf6"): ("A45", "Indian Defense"),
+    ("d4", "Nf6", "Bg5"): ("A45", "Trompowsky Attack"),
+    ("d4", "Nf6", "Nf3"): ("A46", "Indian Defense: Knights Variation"),
+    ("d4", "Nf6", "c4"): ("A50", "Indian Defense: Normal Variation"),
+    ("d4", "Nf6", "c4", "c5"): ("A56", "Benoni Defense"),
+    ("d4", "Nf6", "c4", "e6"): ("E00", "Indian Defense"),
+    ("d4", "Nf6", "c4", "e6", "Nf3", "b6"): ("E12", "Queen's Indian Defense"),
+    ("d4", "Nf6", "c4", "e6", "Nc3", "Bb4"): ("E20", "Nimzo-Indian Defense"),
+    ("d4", "Nf6", "c4", "g6"): ("E60", "King's Indian Defense"),
+    ("d4", "Nf6", "c4", "g6", "Nc3", "d5"): ("D80", "Grünfeld Defense"),
+    ("d4", "f5"): ("A80", "Dutch Defense"),
+    ("c4", "Nf6"): ("A15", "English Opening: Anglo-Indian Defense"),
+    ("c4", "e5"): ("A20", "English Opening: King's English Variation"),
+    ("c4", "c5"): ("A30", "English Opening: Symmetrical Variation"),
+    ("Nf3", "Nf6"): ("A05", "Zukertort Opening"),
+    ("Nf3", "d5"): ("A06", "Zukertort Opening"),
+}
+LONGEST_OPENING = max(len(moves) for moves in OPENINGS)
+
+
+def classify(sans):
+    """(ECO, name) of the longest known opening the moves start with, or None"""
+    moves = tuple(san.rstrip("+#") for san in sans[:LONGEST_OPENING])
+    for length in range(len(moves), 0, -1):
+        if moves[:length] in OPENINGS:
+            return OPENINGS[moves[:length]]
+    return None
+
+
+def _tag(name, value):
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{name} "{value}"]\n'
+
+
+def _pgn_date(timestamp):
+    """PGN date (YYYY.MM.DD) of a stored "YYYY-MM-DD HH:MM:SS" timestamp"""
+    return timestamp[:10].replace("-", ".") if timestamp else "????.??.??"
+
+
+def _pgn_time_control(control):
+    if not control:
+        return None
+    if control["mode"] == "correspondence":
+        return f"1/{control['base']:g}"
+    return f"{control['base']:g}+{control['increment']}"
+
+
+def _wrap(text, width=79):
+    """Break move text into lines of at most width characters"""
+    # Keep move numbers with the move after them
+    tokens = []
+    for token in text.split():
+        if tokens and tokens[-1].endswith("."):
+            tokens[-1] += " " + token
+        else:
+            tokens.append(token)
+
+    lines = []
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > width:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    if line:
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def pgn_game(match, tournament, site="Discord"):
+    """PGN of one game with its headers"""
+    start_fen = match.get("start_fen", START_FEN)
+    result = PGN_RESULTS.get(match.get("result"), "*") if match["status"] == "Completed" else "*"
+    if "packed_moves" in match:
+        sans = san_moves(unpack_moves(match["packed_moves"]), start_fen)
+        moves = movetext(sans, start_fen)
+    else:
+        # Matches recorded before moves were packed keep their own text
+        sans = []
+        moves = " ".join(match.get("moves", []))
+
+    game = [
+        _tag("Event", tournament["name"]),
+        _tag("Site", site),
+        _tag("Date", _pgn_date(match.get("completed_at") or match.get("created_at"))),
+        _tag("Round", match["round"]),
+        _tag("White", match["player1_name"]),
+        _tag("Black", match["player2_name"]),
+        _tag("Result", result),
+    ]
+    opening = classify(sans) if start_fen == START_FEN else None
+    if opening:
+        game.append(_tag("ECO", opening[0]))
+        game.append(_tag("Opening", opening[1]))
+    time_control = _pgn_time_control(tournament.get("time_control"))
+    if time_control:
+        game.append(_tag("TimeControl", time_control))
+    if start_fen != START_FEN:
+        game.append(_tag("SetUp", "1"))
+        game.append(_tag("FEN", start_fen))
+    game.append("\n")
+    game.append(_wrap(f"{moves} {result}" if moves else result))
+    game.append("\n\n")
+    return "".join(game)
+
+
+def pgn_games(tournament, matches, site="Discord"):
+    """Yield the PGN of each game of a tournament, in round order; byes are skipped"""
+    for match_id in tournament["matches"]:
+        match = matches.get(match_id)
+        if match is not None and match["player2_id"] != "BYE":
+            yield pgn_game(match, tournament, site)
+
+
+def _trf_rounds(tournament, matches, numbers):
+    """player_id -> {round: (opponent number, colour, result code)} from completed matches"""
+    rounds = {}
+    for match_id in tournament["matches"]:
+        match = matches.get(match_id)
+        if match is None or match["status"] != "Completed":
+            continue
+        player1_id = match["player1_id"]
+        player2_id = match["player2_id"]
+        if player2_id == "BYE":
+            # Pairing-allocated bye, worth a full point
+            rounds.setdefault(player1_id, {})[match["round"]] = (0, "-", "U")
+            continue
+        codes = {"player1": ("1", "0"), "player2": ("0", "1"), "draw": ("=", "=")}.get(match.get("result"))
+        if codes is None:
+            continue
+        rounds.setdefault(player1_id, {})[match["round"]] = (numbers.get(player2_id, 0), "w", codes[0])
+        rounds.setdefault(player2_id, {})[match["round"]] = (numbers.get(player1_id, 0), "b", codes[1])
+    return rounds
+
+
+def trf_lines(tournament, matches, players, standings):
+    """Yield the lines of a TRF-16 report.
+
+    standings are ranked rows with "id" and "points"; players are numbered
+    by rating, the way they were seeded.
+    """
+    seeded = sorted(tournament["participants"], key=lambda player_id: -players.get(player_id, {}).get("rating", 1200))
+    numbers = {player_id: number for number, player_id in enumerate(seeded, 1)}
+    ranks = {row["id"]: (rank, row["points"]) for rank, row in enumerate(standings, 1)}
+    rounds = _trf_rounds(tournament, matches, numbers)
+
+    yield f"012 {tournament['name']}\n"
+    yield f"042 {tournament['created_at'][:10].replace('-', '/')}\n"
+    yield f"062 {len(seeded)}\n"
+    yield f"092 {tournament['format']}\n"
+    if tournament.get("time_control"):
+        yield f"122 {_pgn_time_control(tournament['time_control'])}\n"
+
+    for player_id in seeded:
+        player = players.get(player_id, {})
+        rank, points = ranks.get(player_id, (numbers[player_id], 0))
+        line = (
+            f"001 {numbers[player_id]:>4}      {player.get('username', 'Unknown Player')[:33]:<33} "
+            f"{int(player.get('rating', 1200)):>4}{'':28}{points:>4.1f} {rank:>4}"
+        )
+        played = rounds.get(player_id, {})
+        last_round = max(played, default=0)
+        for round_number in range(1, last_round + 1):
+            opponent, colour, code = played.get(round_number, (0, "-", "Z"))
+            line += f"  {opponent:0>4} {colour} {code}"
+        yield line + "\n"
+
+    yield f"XXR {tournament['rounds']}\n"
+
+
+def write_export(path, chunks):
+    """Write the chunks of an exporter to path one at a time; returns the bytes written"""
+    size = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk.encode("utf-8"))
+    return size
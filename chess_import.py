@@ -0,0 +1,197 @@
+# chess_import.py - Read bulk player and result imports from CSV or TRF-16
+#
+# read_import() makes one pass over the lines of a file, checking every row
+# against the existing players and the tournament as it goes, and returns
+# an ImportPlan. Nothing is changed here; chess_commands applies a plan
+# only when it has no errors.
+#
+# CSV files have a header row and one of two layouts:
+#   discord_id,name[,rating]         players to register (the rating only
+#                                    applies to players new to the bot)
+#   round,white,black,result         results, by Discord ID (black may be BYE)
+# Results are written 1-0, 0-1 or 1/2-1/2. TRF files are matched to
+# existing players by name and give both the players and their results.
+# Players named in a result who are not yet in the tournament are added to
+# the plan's players, so applying it registers them.
+import csv
+import re
+
+MAX_ERRORS = 20  # Stop collecting errors after this many
+CSV_RESULTS = {"1-0": "player1", "0-1": "player2", "1/2-1/2": "draw", "½-½": "draw", "0.5-0.5": "draw"}
+TRF_RESULTS = {"1": "player1", "+": "player1", "W": "player1", "0": "player2", "-": "player2", "L": "player2", "=": "draw", "D": "draw"}
+TRF_BYES = ("U", "F")  # Full-point byes; half and zero-point byes have no equivalent here
+DISCORD_ID = re.compile(r"^\d{15,20}$")
+
+
+class ImportPlan:
+    """What an import would change, and what is wrong with it"""
+
+    def __init__(self):
+        self.players = {}  # player_id -> (name, rating or None)
+        self.results = []  # (round, white_id, black_id or "BYE", result)
+        self.errors = []  # (line number, message)
+        self.rows = 0
+
+    def error(self, line, message):
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+class _Checker:
+    """Single-pass checks shared by the CSV and TRF readers"""
+
+    def __init__(self, plan, tournament, players, existing_matches):
+        self.plan = plan
+        self.tournament = tournament
+        self.players = players
+        self.participants = set(tournament["participants"])
+        # (round, player_id) already paired in the tournament or earlier in the file
+        self.paired = set()
+        for match in existing_matches:
+            self.paired.add((match["round"], match["player1_id"]))
+            self.paired.add((match["round"], match["player2_id"]))
+
+    def known(self, player_id):
+        return player_id in self.players or player_id in self.plan.players
+
+    def add_result(self, line, round_text, white_id, black_id, result):
+        try:
+            round_number = int(round_text)
+        except ValueError:
+            self.plan.error(line, f"round {round_text!r} is not a number")
+            return
+        if not 1 <= round_number <= self.tournament["rounds"]:
+            self.plan.error(line, f"round {round_number} is outside 1-{self.tournament['rounds']}")
+            return
+        for player_id in (white_id, black_id):
+            if player_id == "BYE":
+                continue
+            if not self.known(player_id):
+                self.plan.error(line, f"unknown player {player_id}")
+                return
+            if (round_number, player_id) in self.paired:
+                self.plan.error(line, f"player {player_id} already has a game in round {round_number}")
+                return
+        if white_id == black_id:
+            self.plan.error(line, "a player cannot play themselves")
+            return
+        self.paired.add((round_number, white_id))
+        self.paired.add((round_number, black_id))
+        self.plan.results.append((round_number, white_id, black_id, result))
+
+        # Standings and pairings only count participants
+        for player_id in (white_id, black_id):
+            if player_id != "BYE" and player_id not in self.participants and player_id not in self.plan.players:
+                self.plan.players[player_id] = (self.players[player_id]["username"], None)
+
+
+def _read_csv(lines, checker):
+    plan = checker.plan
+    reader = csv.DictReader(lines)
+    fields = {name.strip().lower() for name in reader.fieldnames or []}
+    if {"discord_id", "name"} <= fields:
+        layout = "players"
+    elif {"round", "white", "black", "result"} <= fields:
+        layout = "results"
+    else:
+        plan.error(1, "header must be discord_id,name[,rating] or round,white,black,result")
+        return
+
+    for row in reader:
+        line = reader.line_num
+        plan.rows += 1
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        if layout == "players":
+            player_id = row["discord_id"]
+            if not DISCORD_ID.match(player_id):
+                plan.error(line, f"{player_id!r} is not a Discord user ID")
+                continue
+            if player_id in plan.players:
+                plan.error(line, f"player {player_id} is listed twice")
+                continue
+            if not row["name"]:
+                plan.error(line, "name is empty")
+                continue
+            rating = None
+            if row.get("rating"):
+                try:
+                    rating = int(row["rating"])
+                except ValueError:
+                    plan.error(line, f"rating {row['rating']!r} is not a number")
+                    continue
+                if not 100 <= rating <= 3500:
+                    plan.error(line, f"rating {rating} is outside 100-3500")
+                    continue
+            plan.players[player_id] = (row["name"][:32], rating)
+        else:
+            black_id = "BYE" if row["black"].upper() == "BYE" else row["black"]
+            result = "player1" if black_id == "BYE" else CSV_RESULTS.get(row["result"])
+            if result is None:
+                plan.error(line, f"result {row['result']!r} is not 1-0, 0-1 or 1/2-1/2")
+                continue
+            checker.add_result(line, row["round"], row["white"], black_id, result)
+
+
+def _read_trf(lines, checker):
+    plan = checker.plan
+    names = {}
+    for player_id, player in checker.players.items():
+        names.setdefault(player["username"].casefold(), []).append(player_id)
+
+    numbers = {}  # TRF start number -> player_id
+    games = []  # (line, round, white number, black number or None, result)
+    for line, text in enumerate(lines, 1):
+        if not text.startswith("001"):
+            continue
+        plan.rows += 1
+        text = text.rstrip("\r\n")
+        try:
+            number = int(text[4:8])
+        except ValueError:
+            plan.error(line, "start number in columns 5-8 is not a number")
+            continue
+        name = text[14:47].strip()
+        found = names.get(name.casefold(), [])
+        if len(found) != 1:
+            plan.error(line, f"{'no' if not found else 'more than one'} player named {name!r}")
+            continue
+        numbers[number] = found[0]
+        plan.players.setdefault(found[0], (checker.players[found[0]]["username"], None))
+
+        # Round blocks are 10 characters from column 92: opponent, colour, result
+        for round_number, start in enumerate(range(91, len(text), 10), 1):
+            block = text[start:start + 8]
+            if not block.strip():
+                continue
+            opponent, colour, code = block[0:4].strip(), block[5:6], block[7:8]
+            if opponent in ("", "0000"):
+                if code in TRF_BYES:
+                    games.append((line, round_number, number, None, "player1"))
+                continue
+            if not opponent.isdigit() or code not in TRF_RESULTS:
+                plan.error(line, f"cannot read the round {round_number} result {block.strip()!r}")
+                continue
+            # Each game is listed under both players; take it from White's line
+            if colour == "w":
+                games.append((line, round_number, number, int(opponent), TRF_RESULTS[code]))
+
+    for line, round_number, white, black, result in games:
+        if black is not None and black not in numbers:
+            plan.error(line, f"round {round_number} opponent {black} is not in the file")
+            continue
+        checker.add_result(line, str(round_number), numbers[white], numbers[black] if black else "BYE", result)
+
+
+def read_import(lines, kind, tournament, players, existing_matches):
+    """Check an import file in one pass and return its ImportPlan.
+
+    lines is any iterable of text lines, kind "csv" or "trf", players the
+    existing player records and existing_matches the tournament's matches.
+    """
+    plan = ImportPlan()
+    checker = _Checker(plan, tournament, players, existing_matches)
+    if kind == "csv":
+        _read_csv(lines, checker)
+    else:
+        _read_trf(lines, checker)
+    return plan
@@ -0,0 +1,78 @@
+# chess_index.py - In-memory indexes over chess matches and tickets
+from collections import Counter
+
+
+class RoundIndex:
+    """Map (tournament_id, round) to match ids and per-status match counts"""
+
+    def __init__(self):
+        self.rounds = {}  # (tournament_id, round) -> [match_id, ...] in creation order
+        self.counts = {}  # (tournament_id, round) -> Counter of match statuses
+        self.entries = {}  # match_id -> ((tournament_id, round), status)
+
+    def rebuild(self, matches):
+        """Index every tournament match in a {match_id: match} dict"""
+        self.rounds.clear()
+        self.counts.clear()
+        self.entries.clear()
+        for match in matches.values():
+            self.add(match)
+
+    def add(self, match):
+        """Index a newly created match"""
+        if match.get("tournament_id") is None or match["id"] in self.entries:
+            return
+        key = (match["tournament_id"], match["round"])
+        self.rounds.setdefault(key, []).append(match["id"])
+        self.counts.setdefault(key, Counter())[match["status"]] += 1
+        self.entries[match["id"]] = (key, match["status"])
+
+    def set_status(self, match_id, status):
+        """Move a match between status counts after its status changed"""
+        if match_id not in self.entries:
+            return
+        key, old_status = self.entries[match_id]
+        counts = self.counts[key]
+        counts[old_status] -= 1
+        if counts[old_status] <= 0:
+            del counts[old_status]
+        counts[status] += 1
+        self.entries[match_id] = (key, status)
+
+    def match_ids(self, tournament_id, round_number):
+        """Match ids of one round, in pairing order"""
+        return self.rounds.get((tournament_id, round_number), [])
+
+    def status_counts(self, tournament_id, round_number):
+        return self.counts.get((tournament_id, round_number), Counter())
+
+    def is_round_complete(self, tournament_id, round_number):
+        """True once every match of the round is Completed"""
+        counts = self.status_counts(tournament_id, round_number)
+        return sum(counts.values()) == counts["Completed"]
+
+
+class TicketIndex:
+    """Map match ids and channel ids to the id of their ticket"""
+
+    def __init__(self):
+        self.by_match = {}  # match_id -> ticket_id
+        self.by_channel = {}  # channel_id (str) -> ticket_id
+
+    def rebuild(self, tickets):
+        """Index every ticket in a {ticket_id: ticket} dict"""
+        self.by_match.clear()
+        self.by_channel.clear()
+        for ticket_id, ticket in tickets.items():
+            self.add(ticket_id, ticket)
+
+    def add(self, ticket_id, ticket):
+        """Index a new ticket; a newer ticket for the same match replaces the old one"""
+        self.by_match[ticket["match_id"]] = ticket_id
+        self.by_channel[str(ticket["channel_id"])] = ticket_id
+
+    def for_match(self, match_id):
+        return self.by_match.get(match_id)
+
+    def for_channel(self, channel_id):
+        return self.by_channel.get(str(channel_id))
@@ -0,0 +1,124 @@
+# chess_journal.py - Append-only journal with snapshot compaction for chess data files
+import json
+import asyncio
+from persistence import snapshot_json, write_atomic
+
+
+class ChessJournal:
+    """Journal record-level changes next to each JSON snapshot file"""
+
+    # Each data file (e.g. matches.json) is the snapshot. Changes to single
+    # records are appended to "<file>.journal" as one JSON line each, so a
+    # write costs the size of the change rather than the size of the file.
+    # The compactor periodically folds the journal back into the snapshot.
+
+    def __init__(self, compact_threshold=500, compact_interval=60, worker=None):
+        self.worker = worker  # PersistenceWorker that runs compactions, if any
+        self.compact_threshold = compact_threshold  # Records before a file is compacted
+        self.compact_interval = compact_interval  # Seconds between compaction passes
+        self.handles = {}  # Open append handles per journal file
+        self.pending = {}  # Journal records written since the last compaction
+        self._task = None
+
+    @staticmethod
+    def journal_path(file_path):
+        return f"{file_path}.journal"
+
+    def _handle(self, file_path):
+        """Get (or open) the append handle for a file's journal"""
+        handle = self.handles.get(file_path)
+        if handle is None or handle.closed:
+            handle = open(self.journal_path(file_path), 'a')
+            self.handles[file_path] = handle
+        return handle
+
+    def append(self, file_path, collection, keys):
+        """Append the current value of each key in collection to the journal"""
+        lines = []
+        for key in keys:
+            if key in collection:
+                lines.append(json.dumps({"k": key, "v": collection[key]}, separators=(",", ":")))
+            else:
+                lines.append(json.dumps({"k": key, "d": True}, separators=(",", ":")))
+
+        if not lines:
+            return
+
+        handle = self._handle(file_path)
+        handle.write("\n".join(lines) + "\n")
+        handle.flush()
+        self.pending[file_path] = self.pending.get(file_path, 0) + len(lines)
+
+    def replay(self, file_path, collection):
+        """Apply journal records for file_path on top of a loaded snapshot"""
+        try:
+            with open(self.journal_path(file_path), 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+
+        applied = 0
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn write at the end of the journal; everything before it is intact
+                continue
+
+            if record.get("d"):
+                collection.pop(record["k"], None)
+            else:
+                collection[record["k"]] = record["v"]
+            applied += 1
+
+        self.pending[file_path] = applied
+        return applied
+
+    def write_snapshot(self, file_path, data):
+        """Atomically rewrite the snapshot and empty its journal"""
+        write_atomic(file_path, snapshot_json(data, indent=4))
+
+        # The snapshot now contains every journaled record
+        handle = self.handles.pop(file_path, None)
+        if handle is not None:
+            handle.close()
+        open(self.journal_path(file_path), 'w').close()
+        self.pending[file_path] = 0
+
+    def compact(self, files, force=False):
+        """Fold journals into snapshots; files maps file paths to their data"""
+        compacted = []
+        for file_path, data in files.items():
+            pending = self.pending.get(file_path, 0)
+            if pending and (force or pending >= self.compact_threshold):
+                self.write_snapshot(file_path, data)
+                compacted.append(file_path)
+        return compacted
+
+    async def run(self, get_files):
+        """Check every compact_interval seconds for journals that need compacting"""
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                if self.worker is None:
+                    self.compact(get_files())
+                else:
+                    await self.worker.submit_async(self.compact, get_files(), key="chess-journal-compact")
+            except OSError as e:
+                print(f"Failed to compact chess journal: {e}")
+
+    def start(self, get_files):
+        """Start the background compactor"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(get_files))
+        return self._task
+
+    def close(self, files):
+        """Stop the compactor, fold every journal into its snapshot and close handles"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.compact(files, force=True)
+        for handle in self.handles.values():
+            handle.close()
+        self.handles.clear()
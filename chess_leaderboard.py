@@ -0,0 +1,204 @@
+# chess_leaderboard.py - Rating leaderboard over an indexable skip list
+import random
+
+PAGE_SIZE = 10
+MAX_LEVELS = 20  # Plenty for a million players
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels  # Positions skipped by each link
+
+
+class IndexableSkipList:
+    """Sorted keys with O(log n) insert, remove, rank and lookup by position"""
+
+    def __init__(self, seed=None):
+        self.size = 0
+        self.tail = _Node(None, 0)
+        self.head = _Node(None, MAX_LEVELS)
+        self.head.next = [self.tail] * MAX_LEVELS
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_sorted(cls, keys, seed=None):
+        """Build a skip list from already sorted keys in O(n)"""
+        skiplist = cls(seed)
+        last = [skiplist.head] * MAX_LEVELS
+        last_position = [0] * MAX_LEVELS
+        for position, key in enumerate(keys, 1):
+            node = _Node(key, skiplist._height())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        skiplist.size = len(keys)
+        for level in range(MAX_LEVELS):
+            last[level].next[level] = skiplist.tail
+            last[level].width[level] = skiplist.size + 1 - last_position[level]
+        return skiplist
+
+    def __len__(self):
+        return self.size
+
+    def _height(self):
+        height = 1
+        while height < MAX_LEVELS and self.random.random() < 0.5:
+            height += 1
+        return height
+
+    def _find(self, key):
+        """Last node before key on every level, and how far along each one is"""
+        chain = [None] * MAX_LEVELS
+        position = [0] * MAX_LEVELS
+        node = self.head
+        steps = 0
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not self.tail and node.next[level].key < key:
+                steps += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            position[level] = steps
+        return chain, position
+
+    def insert(self, key):
+        chain, position = self._find(key)
+        height = self._height()
+        node = _Node(key, height)
+        index = position[0] + 1  # Position of the new node (the head is 0)
+        for level in range(height):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - (index - position[level]) + 1
+            previous.width[level] = index - position[level]
+        for level in range(height, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._find(key)
+        node = chain[0].next[0]
+        if node is self.tail or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index(self, key):
+        """0-based position of key; raises KeyError if it is missing"""
+        chain, position = self._find(key)
+        node = chain[0].next[0]
+        if node is self.tail or node.key != key:
+            raise KeyError(key)
+        return position[0]
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        node = self.head
+        remaining = i + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not self.tail and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+
+    def slice(self, start, count):
+        """Up to count keys starting at position start"""
+        keys = []
+        if start >= self.size:
+            return keys
+        node = self.head
+        remaining = start + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not self.tail and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not self.tail and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """Players ordered by rating, overall and per tier, with rendered pages cached"""
+
+    def __init__(self, tier_of):
+        self.tier_of = tier_of  # rating -> tier name
+        self.overall = IndexableSkipList()
+        self.tiers = {}  # tier -> IndexableSkipList
+        self.entries = {}  # player_id -> (key, tier, name)
+        self.pages = {}  # (tier, page) -> rendered lines
+
+    def rebuild(self, players):
+        self.entries = {
+            player["id"]: ((-player["rating"], player["id"]), self.tier_of(player["rating"]), player["username"])
+            for player in players.values()
+        }
+        keys = {}
+        for key, tier, _ in self.entries.values():
+            keys.setdefault(tier, []).append(key)
+        for tier_keys in keys.values():
+            tier_keys.sort()
+        self.tiers = {tier: IndexableSkipList.from_sorted(tier_keys) for tier, tier_keys in keys.items()}
+        self.overall = IndexableSkipList.from_sorted(sorted(key for key, _, _ in self.entries.values()))
+        self.pages = {}
+
+    def update(self, player):
+        """Add a player or move them after a rating or name change"""
+        key = (-player["rating"], player["id"])
+        tier = self.tier_of(player["rating"])
+        entry = self.entries.get(player["id"])
+        if entry == (key, tier, player["username"]):
+            return
+        if entry:
+            self._remove(entry)
+        self.overall.insert(key)
+        self.tiers.setdefault(tier, IndexableSkipList()).insert(key)
+        self.entries[player["id"]] = (key, tier, player["username"])
+        self.pages.clear()
+
+    def remove(self, player_id):
+        entry = self.entries.pop(player_id, None)
+        if entry:
+            self._remove(entry)
+            self.pages.clear()
+
+    def _remove(self, entry):
+        key, tier, _ = entry
+        self.overall.remove(key)
+        self.tiers[tier].remove(key)
+
+    def _list(self, tier):
+        return self.tiers.get(tier, IndexableSkipList()) if tier else self.overall
+
+    def count(self, tier=None):
+        return len(self._list(tier))
+
+    def rank(self, player_id, tier=None):
+        """1-based rank of a player, or None if they are not on the board"""
+        entry = self.entries.get(player_id)
+        if entry is None or (tier and entry[1] != tier):
+            return None
+        return self._list(tier).index(entry[0]) + 1
+
+    def page(self, page, tier=None):
+        """Rendered lines of one page (1-based); cached until the next change"""
+        if (tier, page) not in self.pages:
+            start = (page - 1) * PAGE_SIZE
+            lines = []
+            for offset, key in enumerate(self._list(tier).slice(start, PAGE_SIZE)):
+                _, player_tier, name = self.entries[key[1]]
+                lines.append(f"{start + offset + 1}. **{name}** - {-key[0]} ({player_tier})")
+            self.pages[(tier, page)] = lines
+        return self.pages[(tier, page)]
@@ -0,0 +1,623 @@
+# chess_pairing.py - Swiss pairing as a maximum weight matching over score groups
+#
+# The matching solver is a port of Joris van Rantwijk's public domain
+# implementation of Edmonds' blossom algorithm (O(n^3)).
+
+
+def max_weight_matching(edges, maxcardinality=False):
+    """Compute a maximum weight matching of a general graph.
+
+    edges is a list of (i, j, weight) with integer vertex ids starting at 0
+    and integer weights. With maxcardinality the matching has maximum
+    cardinality first and maximum weight among those. Returns mate, where
+    mate[i] is the vertex matched to i or -1.
+    """
+    if not edges:
+        return []
+
+    nedge = len(edges)
+    nvertex = 0
+    for (i, j, w) in edges:
+        if i >= nvertex:
+            nvertex = i + 1
+        if j >= nvertex:
+            nvertex = j + 1
+
+    maxweight = max(0, max(w for (_, _, w) in edges))
+
+    # endpoint[p] is the vertex at endpoint p; edge k has endpoints 2k and 2k+1
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * nedge)]
+
+    # neighbend[v] lists the remote endpoints of the edges attached to v
+    neighbend = [[] for _ in range(nvertex)]
+    for k in range(nedge):
+        (i, j, w) = edges[k]
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    mate = nvertex * [-1]
+
+    # Top-level blossom labels: 0 free, 1 S, 2 T; labelend is the endpoint
+    # through which the label was assigned
+    label = (2 * nvertex) * [0]
+    labelend = (2 * nvertex) * [-1]
+
+    # inblossom[v] is the top-level blossom containing vertex v
+    inblossom = list(range(nvertex))
+
+    # Blossom structure; blossoms are numbered nvertex .. 2*nvertex-1
+    blossomparent = (2 * nvertex) * [-1]
+    blossomchilds = (2 * nvertex) * [None]
+    blossombase = list(range(nvertex)) + nvertex * [-1]
+    blossomendps = (2 * nvertex) * [None]
+
+    # Least-slack edges used to compute dual updates
+    bestedge = (2 * nvertex) * [-1]
+    blossombestedges = (2 * nvertex) * [None]
+
+    unusedblossoms = list(range(nvertex, 2 * nvertex))
+
+    # Dual variables: vertices start at maxweight, blossoms at 0
+    dualvar = nvertex * [maxweight] + nvertex * [0]
+
+    # allowedge[k] is True once edge k is known to have zero slack
+    allowedge = nedge * [False]
+
+    queue = []
+
+    def slack(k):
+        (i, j, wt) = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * wt
+
+    def blossom_leaves(b):
+        if b < nvertex:
+            yield b
+        else:
+            for t in blossomchilds[b]:
+                if t < nvertex:
+                    yield t
+                else:
+                    for v in blossom_leaves(t):
+                        yield v
+
+    def assign_label(w, t, p):
+        b = inblossom[w]
+        label[w] = label[b] = t
+        labelend[w] = labelend[b] = p
+        bestedge[w] = bestedge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            # Label the mate of the base with S
+            base = blossombase[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        """Trace back from v and w; return the base of a new blossom or -1 for an augmenting path"""
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                # Reached a single vertex; stop this path
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        """Construct a new blossom with the given base, closed by edge k"""
+        (v, w, wt) = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                # Former T vertices inside the blossom become S vertices
+                queue.append(v)
+            inblossom[v] = b
+        # Compute the least-slack edges from the new blossom to other S blossoms
+        bestedgeto = (2 * nvertex) * [-1]
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    (i, j, wt) = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if (bj != b and label[bj] == 1 and
+                            (bestedgeto[bj] == -1 or slack(k) < slack(bestedgeto[bj]))):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = [k for k in bestedgeto if k != -1]
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b, endstage):
+        """Expand a top-level blossom into its sub-blossoms"""
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < nvertex:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+        if (not endstage) and label[b] == 2:
+            # Relabel the sub-blossoms on the path from the entry child to the base
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                jstep = -1
+                endptrick = 1
+            p = labelend[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                allowedge[p // 2] = True
+                j += jstep
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                # Sub-blossoms off the path may still be reachable through a T vertex
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    j += jstep
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(v, 2, labelend[v])
+                j += jstep
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b, v):
+        """Swap matched and unmatched edges inside blossom b so that v becomes its base"""
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= nvertex:
+            augment_blossom(t, v)
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k):
+        """Augment the matching along the path through edge k"""
+        (v, w, wt) = edges[k]
+        for (s, p) in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = inblossom[s]
+                if bs >= nvertex:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= nvertex:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    # Each stage finds one augmenting path
+    for _ in range(nvertex):
+        label[:] = (2 * nvertex) * [0]
+        bestedge[:] = (2 * nvertex) * [-1]
+        blossombestedges[nvertex:] = nvertex * [None]
+        allowedge[:] = nedge * [False]
+        queue[:] = []
+
+        for v in range(nvertex):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue
+                    if not allowedge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        if bestedge[w] == -1 or kslack < slack(bestedge[w]):
+                            bestedge[w] = k
+
+            if augmented:
+                break
+
+            # No augmenting path yet; update the dual variables
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+
+            if not maxcardinality:
+                deltatype = 1
+                delta = min(dualvar[:nvertex])
+
+            for v in range(nvertex):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+
+            for b in range(2 * nvertex):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    d = slack(bestedge[b]) // 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+
+            for b in range(nvertex, 2 * nvertex):
+                if (blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2 and
+                        (deltatype == -1 or dualvar[b] < delta)):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+
+            if deltatype == -1:
+                # No further improvement possible; max cardinality reached
+                deltatype = 1
+                delta = max(0, min(dualvar[:nvertex]))
+
+            for v in range(nvertex):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            if deltatype == 1:
+                break
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                (i, j, wt) = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                (i, j, wt) = edges[deltaedge]
+                queue.append(i)
+            elif deltatype == 4:
+                expand_blossom(deltablossom, False)
+
+        if not augmented:
+            break
+
+        # Expand S blossoms whose dual variable dropped to zero
+        for b in range(nvertex, 2 * nvertex):
+            if blossomparent[b] == -1 and blossombase[b] >= 0 and label[b] == 1 and dualvar[b] == 0:
+                expand_blossom(b, True)
+
+    for v in range(nvertex):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+
+    return mate
+
+
+class PairingHistory:
+    """Who played whom, who had a bye and colour balance for one tournament"""
+
+    def __init__(self):
+        self.opponents = {}  # player_id -> set of opponent ids
+        self.byes = set()  # players who received a bye
+        self.colours = {}  # player_id -> whites minus blacks
+
+    def build(self, tournament, matches):
+        """Build the history from a tournament's existing matches"""
+        for match_id in tournament["matches"]:
+            if match_id in matches:
+                self.add_match(matches[match_id])
+        return self
+
+    def add_match(self, match):
+        """Record a newly created match (player1 has white)"""
+        player1_id = match["player1_id"]
+        player2_id = match["player2_id"]
+        if player2_id == "BYE":
+            self.byes.add(player1_id)
+            return
+        self.opponents.setdefault(player1_id, set()).add(player2_id)
+        self.opponents.setdefault(player2_id, set()).add(player1_id)
+        self.colours[player1_id] = self.colours.get(player1_id, 0) + 1
+        self.colours[player2_id] = self.colours.get(player2_id, 0) - 1
+
+    def played(self, player1_id, player2_id):
+        return player2_id in self.opponents.get(player1_id, ())
+
+
+def berger_rounds(player_count):
+    """Number of rounds in a round robin of player_count players"""
+    n = player_count + player_count % 2
+    return n - 1 if n >= 2 else 0
+
+
+def berger_round(player_count, round_number):
+    """Pairings of one round robin round from the Berger tables.
+
+    Returns flat [white, black, white, black, ...] seed indices (0-based)
+    for round_number (1-based). With an odd player_count the extra index
+    player_count stands for the bye. Each round is computed on its own, so
+    the schedule never has to be stored.
+    """
+    n = player_count + player_count % 2
+    half = n // 2
+    last = n - 1  # Seed n in the tables stays put; the others rotate by n/2
+    shift = (round_number - 1) * half
+
+    # Round 1 is 1-n, 2-(n-1), 3-(n-2), ... (0-based here)
+    flat = [shift % last, last]
+    if round_number % 2 == 0:
+        # Seed n alternates colours on the first board
+        flat.reverse()
+    for board in range(1, half):
+        flat.extend(((board + shift) % last, (last - board + shift) % last))
+    return flat
+
+
+# Edge weight components, in order of priority
+BASE_WEIGHT = 10 ** 9
+REMATCH_WEIGHT = 5 * 10 ** 8  # Rematches are only allowed when nothing else works
+BYE_REPEAT_WEIGHT = 2 * 10 ** 8  # Giving a player a second bye
+SCORE_WEIGHT = 10 ** 6  # Per half point of score difference
+BYE_RANK_WEIGHT = 1024  # Per rank; the bye goes to the lowest ranked candidate
+STRONG_COLOUR_WEIGHT = 768  # Both players are two or more games off balance the same way
+COLOUR_WEIGHT = 256  # Both players are due the same colour
+
+# Score groups larger than this are paired in slices of about this size
+MAX_BRACKET = 64
+
+
+def colour_penalty(balance1, balance2):
+    """Cost of pairing two players with the given whites-minus-blacks balances"""
+    if balance1 * balance2 <= 0:
+        return 0
+    if abs(balance1) >= 2 and abs(balance2) >= 2:
+        return STRONG_COLOUR_WEIGHT
+    return COLOUR_WEIGHT
+
+
+def pair_bracket(bracket, opponents, byes, colours, final):
+    """Pair one bracket; returns (pairs, unpaired players)"""
+    unpaired = []
+    if not final and len(bracket) % 2:
+        # The lowest ranked player floats down to the next bracket
+        unpaired.append(bracket[-1])
+        bracket = bracket[:-1]
+
+    n = len(bracket)
+    half = n // 2
+    edges = []
+
+    for a in range(n):
+        player1 = bracket[a]
+        played = opponents.get(player1["id"], ())
+        for b in range(a + 1, n):
+            player2 = bracket[b]
+            rematch = player2["id"] in played
+            if rematch and not final:
+                # Float instead; rematches are a last resort in the last bracket
+                continue
+
+            weight = BASE_WEIGHT - SCORE_WEIGHT * round(abs(player1["points"] - player2["points"]) * 2)
+            if rematch:
+                weight -= REMATCH_WEIGHT
+            weight -= colour_penalty(colours.get(player1["id"], 0), colours.get(player2["id"], 0))
+            # Prefer top half against bottom half
+            weight -= abs(b - a - half)
+            edges.append((a, b, weight))
+
+    if final and n % 2:
+        # Vertex n is the bye, preferably for the lowest ranked player without one
+        for a in range(n):
+            weight = BASE_WEIGHT - SCORE_WEIGHT * round(bracket[a]["points"] * 2)
+            if bracket[a]["id"] in byes:
+                weight -= BYE_REPEAT_WEIGHT
+            weight += BYE_RANK_WEIGHT * a
+            edges.append((a, n, weight))
+
+    mate = max_weight_matching(edges, maxcardinality=True)
+    mate += [-1] * (n + 1 - len(mate))
+
+    pairs = []
+    for a in range(n):
+        if mate[a] == n:
+            pairs.append((bracket[a], None))
+        elif mate[a] == -1:
+            unpaired.append(bracket[a])
+        elif mate[a] > a:
+            pairs.append((bracket[a], bracket[mate[a]]))
+
+    return pairs, unpaired
+
+
+def bracket_slices(group, max_bracket):
+    """Split a score group into slices of at most max_bracket (plus an odd player).
+
+    Slice k holds the k-th part of the group's top half and the k-th part
+    of its bottom half, so pairing inside each slice still matches the top
+    half against the bottom half of the whole group.
+    """
+    if len(group) <= max_bracket:
+        return [group]
+    half = len(group) // 2
+    top, bottom = group[:half], group[half:]
+    size = max_bracket // 2
+    slices = [top[start:start + size] + bottom[start:start + size] for start in range(0, half, size)]
+    # The bottom half has the odd player of an odd group
+    slices[-1] += bottom[len(slices) * size:]
+    return slices
+
+
+def pair_swiss(players, opponents, byes=(), colours=None, max_bracket=MAX_BRACKET):
+    """Pair a Swiss round.
+
+    players are dicts with id, points and rating. opponents maps a player id to
+    the ids they already played, byes holds the players who already had a bye
+    and colours maps a player id to whites minus blacks. Returns
+    (white_id, black_id) tuples; the player sitting out gets "BYE" as opponent.
+    """
+    colours = colours or {}
+    ranked = sorted(players, key=lambda p: (p["points"], p["rating"]), reverse=True)
+
+    # Score groups, highest first
+    groups = []
+    for player in ranked:
+        if groups and groups[-1][0]["points"] == player["points"]:
+            groups[-1].append(player)
+        else:
+            groups.append([player])
+
+    if len(ranked) % 2 and groups:
+        # The bye is decided in the last group; if everyone there already had
+        # one, float the lowest ranked player still without a bye down to it
+        last_group = groups[-1]
+        if all(player["id"] in byes for player in last_group):
+            for group in reversed(groups[:-1]):
+                candidates = [player for player in group if player["id"] not in byes]
+                if candidates:
+                    group.remove(candidates[-1])
+                    last_group.insert(0, candidates[-1])
+                    break
+            groups = [group for group in groups if group]
+
+    pairings = []
+    floaters = []
+    for index, group in enumerate(groups):
+        last = index == len(groups) - 1
+        slices = bracket_slices(group, max_bracket)
+        for number, players_slice in enumerate(slices, 1):
+            # Players left unpaired float into the next slice or score group
+            bracket = floaters + players_slice
+            pairs, floaters = pair_bracket(bracket, opponents, byes, colours, last and number == len(slices))
+
+            for player1, player2 in pairs:
+                if player2 is None:
+                    pairings.append((player1["id"], "BYE"))
+                    continue
+                # White goes to the player who has had it less; alternate boards on a tie
+                balance1 = colours.get(player1["id"], 0)
+                balance2 = colours.get(player2["id"], 0)
+                if balance1 > balance2 or (balance1 == balance2 and len(pairings) % 2):
+                    player1, player2 = player2, player1
+                pairings.append((player1["id"], player2["id"]))
+
+    return pairings
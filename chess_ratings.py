@@ -0,0 +1,155 @@
+# chess_ratings.py - Glicko-2 ratings, updated one rating period at a time
+#
+# A rating period is one tournament round. Every game of the round is rated
+# together against the ratings players had before the round, so results
+# within a round do not feed into each other. Player records keep:
+#   "rating": rounded rating (shown everywhere and used for seeding)
+#   "glicko": [rating, rd, volatility] at full precision
+#   "rating_history": [{"period", "date", "games", "rating", "rd",
+#                       "volatility", "before": [rating, rd, volatility]}]
+import datetime
+import numpy as np
+
+DEFAULT_RATING = 1200
+DEFAULT_RD = 350
+DEFAULT_VOLATILITY = 0.06
+
+TAU = 0.5  # Constrains how fast volatility changes
+SCALE = 173.7178  # Glicko-2 internal scale
+EPSILON = 0.000001
+
+
+def period_id(tournament_id, round_number):
+    return f"{tournament_id}:{round_number}"
+
+
+def rating_state(player):
+    """[rating, rd, volatility] of a player record"""
+    return list(player.get("glicko", [player.get("rating", DEFAULT_RATING), DEFAULT_RD, DEFAULT_VOLATILITY]))
+
+
+def history_entry(player, period):
+    for entry in reversed(player.get("rating_history", [])):
+        if entry["period"] == period:
+            return entry
+    return None
+
+
+def _volatility(delta, phi, variance, sigma):
+    """New volatility for every player at once (Illinois algorithm)"""
+    a = np.log(sigma ** 2)
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - variance - ex) / (2 * (phi ** 2 + variance + ex) ** 2) - (x - a) / TAU ** 2
+
+    upper = np.log(np.maximum(delta ** 2 - phi ** 2 - variance, 1e-300))
+    low = a - TAU
+    pending = delta ** 2 <= phi ** 2 + variance
+    while pending.any():
+        pending &= f(low) < 0
+        low = np.where(pending, low - TAU, low)
+
+    A = a
+    B = np.where(delta ** 2 > phi ** 2 + variance, upper, low)
+    fA = f(A)
+    fB = f(B)
+    for _ in range(100):
+        active = np.abs(B - A) > EPSILON
+        if not active.any():
+            break
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        swap = fC * fB <= 0
+        A = np.where(active & swap, B, A)
+        fA = np.where(active, np.where(swap, fB, fA / 2), fA)
+        B = np.where(active, C, B)
+        fB = np.where(active, fC, fB)
+    return np.exp(A / 2)
+
+
+def glicko2(ratings, rds, volatilities, first, second, first_score):
+    """Rate one period.
+
+    ratings, rds and volatilities are arrays with one entry per player;
+    first, second and first_score describe the games by player index.
+    Players without a game keep their rating and volatility.
+    """
+    mu = (np.asarray(ratings, dtype=float) - 1500) / SCALE
+    phi = np.asarray(rds, dtype=float) / SCALE
+    sigma = np.asarray(volatilities, dtype=float)
+    n = len(mu)
+
+    # Every game twice, once from each side
+    player = np.concatenate([first, second])
+    opponent = np.concatenate([second, first])
+    score = np.concatenate([first_score, 1 - np.asarray(first_score, dtype=float)])
+
+    g = 1 / np.sqrt(1 + 3 * phi[opponent] ** 2 / np.pi ** 2)
+    expected = 1 / (1 + np.exp(-g * (mu[player] - mu[opponent])))
+
+    played = np.bincount(player, minlength=n) > 0
+    information = np.bincount(player, weights=g ** 2 * expected * (1 - expected), minlength=n)
+    improvement = np.bincount(player, weights=g * (score - expected), minlength=n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = np.where(played, 1 / information, np.inf)
+    delta = np.where(played, variance * improvement, 0)
+
+    new_sigma = sigma.copy()
+    if played.any():
+        new_sigma[played] = _volatility(delta[played], phi[played], variance[played], sigma[played])
+
+    phi_star = np.sqrt(phi ** 2 + new_sigma ** 2)
+    new_phi = np.where(played, 1 / np.sqrt(1 / phi_star ** 2 + np.where(played, information, 0)), phi)
+    new_mu = mu + np.where(played, new_phi ** 2 * improvement, 0)
+
+    return new_mu * SCALE + 1500, np.minimum(new_phi * SCALE, DEFAULT_RD), new_sigma
+
+
+def rate_period(period, games, players):
+    """Rate a period's games and update the player records in place.
+
+    games is a list of (player1_id, player2_id, player1_score). Rating the
+    same period again starts from the ratings stored before it, so a
+    re-reported result replaces the period's rating change instead of
+    adding another one. Returns the ids of the updated players.
+    """
+    games = [game for game in games if game[0] in players and game[1] in players]
+    player_ids = list(dict.fromkeys(player_id for game in games for player_id in game[:2]))
+    if not player_ids:
+        return []
+    index = {player_id: i for i, player_id in enumerate(player_ids)}
+
+    # Ratings before the period
+    before = []
+    for player_id in player_ids:
+        entry = history_entry(players[player_id], period)
+        before.append(list(entry["before"]) if entry else rating_state(players[player_id]))
+    before = np.array(before, dtype=float)
+
+    first = np.fromiter((index[game[0]] for game in games), dtype=np.int64, count=len(games))
+    second = np.fromiter((index[game[1]] for game in games), dtype=np.int64, count=len(games))
+    first_score = np.fromiter((game[2] for game in games), dtype=float, count=len(games))
+    ratings, rds, volatilities = glicko2(before[:, 0], before[:, 1], before[:, 2], first, second, first_score)
+    game_counts = np.bincount(np.concatenate([first, second]), minlength=len(player_ids))
+
+    date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for i, player_id in enumerate(player_ids):
+        player = players[player_id]
+        after = [float(ratings[i]), float(rds[i]), float(volatilities[i])]
+        entry = history_entry(player, period)
+        if entry is None:
+            state = after
+            entry = {"period": period, "before": before[i].tolist()}
+            player.setdefault("rating_history", []).append(entry)
+        else:
+            # A correction to an older period shifts the current rating by
+            # the change in that period's result
+            current = rating_state(player)
+            previous = [entry["rating"], entry["rd"], entry["volatility"]]
+            state = [current[k] + after[k] - previous[k] for k in range(3)]
+        entry.update({"date": date, "games": int(game_counts[i]), "rating": after[0], "rd": after[1], "volatility": after[2]})
+        player["glicko"] = state
+        player["rating"] = round(state[0])
+    return player_ids
@@ -0,0 +1,159 @@
+# chess_render.py - Draw chess positions as PNG images with Pillow
+#
+# Rendering runs on a small thread pool so the event loop never waits on
+# Pillow, and finished images are kept in an LRU cache keyed by board
+# placement, orientation, theme and highlighted squares.
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from chess_engine import Position, parse_square
+
+SQUARE_SIZE = 64
+SUPERSAMPLE = 2  # Draw at twice the size and scale down to smooth the edges
+RENDER_CACHE_SIZE = int(os.environ.get('CHESS_RENDER_CACHE_SIZE', 256))
+RENDER_THREADS = int(os.environ.get('CHESS_RENDER_THREADS', 2))
+DEFAULT_THEME = os.environ.get('CHESS_BOARD_THEME', 'brown')
+
+# Theme -> (light square, dark square, last move tint, check tint)
+THEMES = {
+    "brown": ((240, 217, 181), (181, 136, 99), (205, 210, 106), (235, 97, 80)),
+    "blue": ((222, 227, 230), (140, 162, 173), (195, 216, 135), (235, 97, 80)),
+    "green": ((238, 238, 210), (118, 150, 86), (246, 246, 105), (235, 97, 80)),
+}
+
+WHITE_PIECE = ((250, 250, 250), (20, 20, 20))  # (fill, outline)
+BLACK_PIECE = ((35, 35, 35), (210, 210, 210))
+
+# Piece silhouettes in a 100 x 100 box: ("polygon", points) or ("ellipse", box)
+BASE = ("polygon", [(22, 80), (78, 80), (80, 90), (20, 90)])
+PIECE_SHAPES = {
+    "p": [
+        ("polygon", [(38, 50), (62, 50), (72, 82), (28, 82)]),
+        ("ellipse", (36, 16, 64, 44)),
+        ("polygon", [(24, 80), (76, 80), (78, 90), (22, 90)]),
+    ],
+    "r": [
+        ("polygon", [(32, 40), (68, 40), (66, 80), (34, 80)]),
+        ("polygon", [(26, 14), (36, 14), (36, 22), (45, 22), (45, 14), (55, 14), (55, 22), (64, 22), (64, 14),
+                     (74, 14), (74, 40), (26, 40)]),
+        BASE,
+    ],
+    "n": [
+        ("polygon", [(32, 82), (72, 82), (70, 56), (64, 36), (56, 22), (48, 12), (44, 22), (34, 28), (20, 46),
+                     (22, 54), (30, 56), (42, 48), (46, 52), (34, 70)]),
+        ("ellipse", (40, 28, 46, 34)),
+        BASE,
+    ],
+    "b": [
+        ("polygon", [(40, 52), (60, 52), (68, 80), (32, 80)]),
+        ("ellipse", (34, 20, 66, 58)),
+        ("ellipse", (45, 8, 55, 18)),
+        ("polygon", [(32, 52), (68, 52), (68, 60), (32, 60)]),
+        BASE,
+    ],
+    "q": [
+        ("polygon", [(22, 28), (33, 58), (37, 22), (44, 54), (50, 16), (56, 54), (63, 22), (67, 58), (78, 28),
+                     (68, 80), (32, 80)]),
+        ("ellipse", (17, 22, 27, 32)),
+        ("ellipse", (32, 16, 42, 26)),
+        ("ellipse", (45, 9, 55, 19)),
+        ("ellipse", (58, 16, 68, 26)),
+        ("ellipse", (73, 22, 83, 32)),
+        BASE,
+    ],
+    "k": [
+        ("polygon", [(46, 4), (54, 4), (54, 12), (62, 12), (62, 20), (54, 20), (54, 30), (46, 30), (46, 20),
+                     (38, 20), (38, 12), (46, 12)]),
+        ("ellipse", (26, 28, 74, 58)),
+        ("polygon", [(30, 46), (70, 46), (66, 80), (34, 80)]),
+        BASE,
+    ],
+}
+
+executor = ThreadPoolExecutor(max_workers=RENDER_THREADS, thread_name_prefix="board-render")
+
+
+def _draw_piece(draw, piece, left, top, size):
+    fill, outline = WHITE_PIECE if piece.isupper() else BLACK_PIECE
+    scale = size / 100
+    width = max(1, round(2.5 * scale))
+    for kind, shape in PIECE_SHAPES[piece.lower()]:
+        if kind == "polygon":
+            points = [(left + x * scale, top + y * scale) for x, y in shape]
+            draw.polygon(points, fill=fill, outline=outline, width=width)
+        else:
+            x0, y0, x1, y1 = shape
+            draw.ellipse((left + x0 * scale, top + y0 * scale, left + x1 * scale, top + y1 * scale),
+                         fill=fill, outline=outline, width=width)
+    if piece.lower() == "n":
+        # Knight's eye in the outline colour
+        x0, y0, x1, y1 = PIECE_SHAPES["n"][1][1]
+        draw.ellipse((left + x0 * scale, top + y0 * scale, left + x1 * scale, top + y1 * scale), fill=outline)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_png(placement, orientation="w", theme=DEFAULT_THEME, highlights=(), check=None):
+    """PNG bytes of a board placement (the first FEN field).
+
+    orientation is the side shown at the bottom, highlights the 0x88 squares
+    of the last move and check the 0x88 square of a king in check.
+    """
+    light, dark, highlight, check_colour = THEMES.get(theme, THEMES["brown"])
+    size = SQUARE_SIZE * SUPERSAMPLE
+    image = Image.new("RGB", (size * 8, size * 8), light)
+    draw = ImageDraw.Draw(image)
+
+    rows = placement.split("/")
+    for rank in range(8):
+        row = rows[7 - rank]
+        for file in range(8):
+            square = rank * 16 + file
+            column, line = (file, 7 - rank) if orientation == "w" else (7 - file, rank)
+            colour = light if (rank + file) % 2 else dark
+            if square in highlights:
+                colour = tuple((a + b) // 2 for a, b in zip(colour, highlight))
+            if square == check:
+                colour = check_colour
+            draw.rectangle((column * size, line * size, (column + 1) * size - 1, (line + 1) * size - 1), fill=colour)
+
+        file = 0
+        for char in row:
+            if char.isdigit():
+                file += int(char)
+                continue
+            column, line = (file, 7 - rank) if orientation == "w" else (7 - file, rank)
+            _draw_piece(draw, char, column * size, line * size, size)
+            file += 1
+
+    image = image.reduce(SUPERSAMPLE)
+
+    # Coordinates along the left and bottom edges
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for index in range(8):
+        rank_label = str(8 - index) if orientation == "w" else str(index + 1)
+        file_label = "abcdefgh"[index] if orientation == "w" else "hgfedcba"[index]
+        label_colour = dark if index % 2 == 0 else light
+        draw.text((2, index * SQUARE_SIZE + 1), rank_label, fill=label_colour, font=font)
+        draw.text(((index + 1) * SQUARE_SIZE - 8, 8 * SQUARE_SIZE - 12), file_label,
+                  fill=light if index % 2 == 0 else dark, font=font)
+
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=False)
+    return output.getvalue()
+
+
+async def render_board(fen, orientation="w", last_move=None, theme=DEFAULT_THEME):
+    """Render a FEN on the thread pool; last_move is a UCI move to highlight"""
+    highlights = ()
+    if last_move:
+        highlights = (parse_square(last_move[:2]), parse_square(last_move[2:4]))
+    position = Position(fen)
+    check = position.kings[position.turn] if position.in_check() else None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, render_png, fen.split()[0], orientation, theme, highlights, check)
@@ -0,0 +1,144 @@
+# chess_standings.py - Incrementally maintained tournament standings
+import chess_tiebreaks
+
+class TournamentStandings:
+    """Standings of one tournament, updated one match result at a time"""
+
+    def __init__(self, participants, names):
+        self.rows = {
+            player_id: {
+                "id": player_id,
+                "name": names.get(player_id, "Unknown Player"),
+                "matches_played": 0,
+                "wins": 0,
+                "losses": 0,
+                "draws": 0,
+                "points": 0,
+                "opponents": [],  # For tiebreaks
+                "tiebreak": 0  # Buchholz: sum of the opponents' points
+            }
+            for player_id in participants
+        }
+        self.results = {}  # match_id -> (player1_id, player2_id, result, round) already counted
+        self._sorted = None
+        self._ranked = {}  # tuple of tiebreak names -> (ratings used, ranked rows)
+
+    def record(self, match):
+        """Count a match result, replacing what was counted for it before"""
+        previous = self.results.pop(match["id"], None)
+        if previous:
+            self._apply(*previous[:3], sign=-1)
+
+        if match["status"] == "Completed" and match.get("result") in ("player1", "player2", "draw"):
+            current = (match["player1_id"], match["player2_id"], match["result"], match.get("round", 0))
+            self._apply(*current[:3], sign=1)
+            self.results[match["id"]] = current
+
+        self._sorted = None
+        self._ranked = {}
+
+    def _apply(self, player1_id, player2_id, result, sign):
+        """Add (sign=1) or remove (sign=-1) one result"""
+        if player2_id == "BYE":
+            # A bye is a win without an opponent
+            self._update(player1_id, "wins", 1, sign)
+            return
+
+        if result == "draw":
+            outcome = {player1_id: ("draws", 0.5), player2_id: ("draws", 0.5)}
+        elif result == "player1":
+            outcome = {player1_id: ("wins", 1), player2_id: ("losses", 0)}
+        else:
+            outcome = {player1_id: ("losses", 0), player2_id: ("wins", 1)}
+
+        if sign > 0:
+            self._link(player1_id, player2_id, sign)
+        for player_id, (stat, points) in outcome.items():
+            self._update(player_id, stat, points, sign)
+        if sign < 0:
+            self._link(player1_id, player2_id, sign)
+
+    def _update(self, player_id, stat, points, sign):
+        row = self.rows.get(player_id)
+        if row is None:
+            return
+        row[stat] += sign
+        row["matches_played"] += sign
+        if points:
+            row["points"] += sign * points
+            # Everyone who played this player gets the change in their Buchholz
+            for opponent_id in row["opponents"]:
+                if opponent_id in self.rows:
+                    self.rows[opponent_id]["tiebreak"] += sign * points
+
+    def _link(self, player1_id, player2_id, sign):
+        """Add or remove two players from each other's opponent lists"""
+        for player_id, opponent_id in ((player1_id, player2_id), (player2_id, player1_id)):
+            row = self.rows.get(player_id)
+            if row is None:
+                continue
+            if sign > 0:
+                row["opponents"].append(opponent_id)
+            else:
+                row["opponents"].remove(opponent_id)
+            if opponent_id in self.rows:
+                row["tiebreak"] += sign * self.rows[opponent_id]["points"]
+
+    def sorted(self):
+        """Rows by points, then tiebreak; cached until the next result"""
+        if self._sorted is None:
+            self._sorted = sorted(self.rows.values(), key=lambda p: (p["points"], p["tiebreak"]), reverse=True)
+        return self._sorted
+
+    def ranked(self, tiebreaks, ratings):
+        """Rows by points, then the given tiebreak systems; cached until the next result or rating change"""
+        key = tuple(tiebreaks)
+        cached = self._ranked.get(key)
+        # Performance ratings depend on opponents' ratings, which change
+        # after every rated round, so a cached ranking only holds for the
+        # ratings it was computed with
+        if cached is None or cached[0] != ratings:
+            games = []
+            byes = []
+            scores = {"player1": 1, "player2": 0, "draw": 0.5}
+            for player1_id, player2_id, result, round_number in self.results.values():
+                if player2_id == "BYE":
+                    byes.append((player1_id, 1, round_number))
+                else:
+                    games.append((player1_id, player2_id, scores[result], round_number))
+            cached = (dict(ratings), chess_tiebreaks.rank(list(self.rows.values()), games, byes, ratings, list(tiebreaks)))
+            self._ranked[key] = cached
+        return cached[1]
+
+
+class StandingsEngine:
+    """Per-tournament standings, built once from match history and then kept current"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def reset(self):
+        self.tables.clear()
+
+    def build(self, tournament, matches, players):
+        """Build standings for a tournament from its completed matches"""
+        names = {player_id: players[player_id]["username"] for player_id in tournament["participants"] if player_id in players}
+        table = TournamentStandings(tournament["participants"], names)
+        for match_id in tournament["matches"]:
+            if match_id in matches:
+                table.record(matches[match_id])
+        self.tables[tournament["id"]] = table
+        return table
+
+    def get(self, tournament_id):
+        return self.tables.get(tournament_id)
+
+    def discard(self, tournament_id):
+        """Drop a tournament's standings so they are rebuilt on next use"""
+        self.tables.pop(tournament_id, None)
+
+    def record(self, match):
+        """Update the standings of the match's tournament, if they have been built"""
+        table = self.tables.get(match.get("tournament_id"))
+        if table is not None:
+            table.record(match)
@@ -0,0 +1,173 @@
+# chess_storage.py - SQLite storage backend for chess tournaments, matches, players, tickets and bracket nodes
+import os
+import sys
+import json
+import sqlite3
+
+# Default database location
+DB_FILE = 'data/chess/chess.db'
+
+# Each collection is a table holding the full record as JSON plus a few
+# indexed columns for looking at the data with SQL. The bot still loads
+# every record at startup and serves reads from memory; the database only
+# makes writes transactional and record-level.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT,
+    round INTEGER,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    id TEXT PRIMARY KEY,
+    rating REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    id TEXT PRIMARY KEY,
+    match_id TEXT,
+    channel_id TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bracket_nodes (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments (status);
+CREATE INDEX IF NOT EXISTS idx_matches_tournament_round ON matches (tournament_id, round);
+CREATE INDEX IF NOT EXISTS idx_players_rating ON players (rating DESC);
+CREATE INDEX IF NOT EXISTS idx_tickets_match ON tickets (match_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_channel ON tickets (channel_id);
+CREATE INDEX IF NOT EXISTS idx_bracket_nodes_tournament ON bracket_nodes (tournament_id);
+"""
+
+# Indexed columns per collection, filled from the record on every write
+COLUMNS = {
+    "tournaments": ("status", "created_at"),
+    "matches": ("tournament_id", "round", "status"),
+    "players": ("rating",),
+    "tickets": ("match_id", "channel_id", "status"),
+    "bracket_nodes": ("tournament_id",),
+}
+
+
+class ChessRepository:
+    """Durable record storage over a SQLite database in WAL mode"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Writes may come from the persistence worker thread; they are serialized there
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def _row(collection, key, record):
+        """Build the parameter tuple for an upsert"""
+        columns = tuple(record.get(column) for column in COLUMNS[collection])
+        return (key,) + columns + (json.dumps(record, separators=(",", ":")),)
+
+    def _insert(self, collection, records):
+        """Insert or replace records inside the caller's transaction"""
+        columns = ("id",) + COLUMNS[collection] + ("data",)
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO {collection} ({', '.join(columns)}) VALUES ({placeholders})",
+            [self._row(collection, key, record) for key, record in records.items()]
+        )
+
+    def put_many(self, collection, records):
+        """Insert or replace records given as a {key: record} mapping"""
+        with self.conn:
+            self._insert(collection, records)
+
+    def put(self, collection, key, record):
+        self.put_many(collection, {key: record})
+
+    def delete_many(self, collection, keys):
+        with self.conn:
+            self.conn.executemany(f"DELETE FROM {collection} WHERE id = ?", [(key,) for key in keys])
+
+    def save(self, collection, data, keys):
+        """Write the given keys of a collection, deleting the ones no longer present"""
+        present = {key: data[key] for key in keys if key in data}
+        missing = [key for key in keys if key not in data]
+        with self.conn:
+            if present:
+                self._insert(collection, present)
+            if missing:
+                self.conn.executemany(f"DELETE FROM {collection} WHERE id = ?", [(key,) for key in missing])
+
+    def replace_all(self, collection, data):
+        """Replace the whole collection with data in one transaction"""
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {collection}")
+            self._insert(collection, data)
+
+    def load_all(self, collection):
+        """Load a whole collection as a {key: record} dict"""
+        return {key: json.loads(data) for key, data in self.conn.execute(f"SELECT id, data FROM {collection}")}
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+
+def migrate_from_json(repository, files):
+    """One-shot import of the JSON data files; files maps collection names to paths"""
+    # Imported here so the migrator also picks up records still in a journal
+    from chess_journal import ChessJournal
+
+    journal = ChessJournal()
+    counts = {}
+    for collection, file_path in files.items():
+        try:
+            with open(file_path, 'r') as f:
+                data = json.load(f).get(collection, {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+
+        journal.replay(file_path, data)
+        repository.replace_all(collection, data)
+        counts[collection] = len(data)
+
+    repository.checkpoint()
+    return counts
+
+
+if __name__ == "__main__":
+    # Usage: python chess_storage.py migrate [db_path]
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python chess_storage.py migrate [db_path]")
+        sys.exit(1)
+
+    db_path = sys.argv[2] if len(sys.argv) > 2 else DB_FILE
+    repository = ChessRepository(db_path)
+    counts = migrate_from_json(repository, {
+        "tournaments": 'data/chess/tournaments.json',
+        "matches": 'data/chess/matches.json',
+        "players": 'data/chess/players.json',
+        "tickets": 'data/chess/tickets.json',
+        "bracket_nodes": 'data/chess/bracket_nodes.json',
+    })
+    repository.close()
+
+    for collection, count in counts.items():
+        print(f"Migrated {count} {collection}")
+    print(f"Database written to {db_path}. Set CHESS_PERSISTENCE=sqlite to use it.")
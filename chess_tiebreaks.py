@@ -0,0 +1,135 @@
+# chess_tiebreaks.py - FIDE tiebreak systems computed as NumPy array operations
+import numpy as np
+
+# Tiebreak systems: name -> (label, short label)
+TIEBREAKS = {
+    "buchholz": ("Buchholz", "BH"),
+    "buchholz_cut1": ("Buchholz Cut 1", "BH-C1"),
+    "median_buchholz": ("Median Buchholz", "MBH"),
+    "sonneborn_berger": ("Sonneborn-Berger", "SB"),
+    "progressive": ("Progressive Score", "PS"),
+    "direct_encounter": ("Direct Encounter", "DE"),
+    "performance": ("Performance Rating", "TPR"),
+}
+
+DEFAULT_TIEBREAKS = ["buchholz"]
+
+
+def parse_tiebreaks(text):
+    """Turn "buchholz, sonneborn_berger" into a list; raises ValueError on unknown names"""
+    names = [name.strip().lower().replace("-", "_").replace(" ", "_") for name in text.split(",") if name.strip()]
+    unknown = [name for name in names if name not in TIEBREAKS]
+    if unknown:
+        raise ValueError(", ".join(unknown))
+    return names or list(DEFAULT_TIEBREAKS)
+
+
+def performance_offset(fraction):
+    """Rating difference for a score fraction (logistic curve, capped at +/-800)"""
+    fraction = np.clip(fraction, 0.01, 0.99)
+    return np.clip(-400 * np.log10(1 / fraction - 1), -800, 800)
+
+
+def compute(player_ids, points, games, byes, ratings, names=None):
+    """Compute tiebreaks for one tournament.
+
+    player_ids orders the players; points are their total scores. games is a
+    list of (player1_id, player2_id, player1_score, round) for played games and
+    byes a list of (player_id, points, round). ratings maps player ids to
+    ratings. Returns {name: array aligned with player_ids}.
+    """
+    names = names or list(TIEBREAKS)
+    n = len(player_ids)
+    index = {player_id: i for i, player_id in enumerate(player_ids)}
+    total = np.asarray(points, dtype=float)
+
+    # Every game twice, once from each side
+    games = [game for game in games if game[0] in index and game[1] in index]
+    first = np.fromiter((index[game[0]] for game in games), dtype=np.int64, count=len(games))
+    second = np.fromiter((index[game[1]] for game in games), dtype=np.int64, count=len(games))
+    first_score = np.fromiter((game[2] for game in games), dtype=float, count=len(games))
+    game_round = np.fromiter((game[3] for game in games), dtype=float, count=len(games))
+
+    player = np.concatenate([first, second])
+    opponent = np.concatenate([second, first])
+    score = np.concatenate([first_score, 1 - first_score])
+    rounds = np.concatenate([game_round, game_round])
+
+    games_played = np.bincount(player, minlength=n)
+    opponent_total = total[opponent]
+
+    results = {}
+    buchholz = np.bincount(player, weights=opponent_total, minlength=n)
+
+    if "buchholz" in names:
+        results["buchholz"] = buchholz
+
+    if "buchholz_cut1" in names or "median_buchholz" in names:
+        # Opponents' scores per player, sorted ascending, padded with +inf
+        width = max(1, int(games_played.max()) if n and len(player) else 1)
+        order = np.lexsort((opponent_total, player))
+        sorted_player = player[order]
+        starts = np.concatenate([[0], np.cumsum(games_played)[:-1]]) if n else np.zeros(0, dtype=np.int64)
+        position = np.arange(len(order)) - starts[sorted_player]
+        table = np.full((n, width), np.inf)
+        table[sorted_player, position] = opponent_total[order]
+
+        has_games = games_played > 0
+        lowest = np.where(has_games, table[:, 0], 0)
+        highest = np.where(has_games, table[np.arange(n), np.maximum(games_played - 1, 0)], 0)
+
+        if "buchholz_cut1" in names:
+            results["buchholz_cut1"] = buchholz - lowest
+        if "median_buchholz" in names:
+            results["median_buchholz"] = np.where(games_played > 2, buchholz - lowest - highest, buchholz)
+
+    if "sonneborn_berger" in names:
+        results["sonneborn_berger"] = np.bincount(player, weights=score * opponent_total, minlength=n)
+
+    if "progressive" in names:
+        # Sum of the running score after each round: a point in round r counts (last - r + 1) times
+        bye_player = np.fromiter((index[bye[0]] for bye in byes if bye[0] in index), dtype=np.int64)
+        bye_points = np.fromiter((bye[1] for bye in byes if bye[0] in index), dtype=float)
+        bye_round = np.fromiter((bye[2] for bye in byes if bye[0] in index), dtype=float)
+        last = max(rounds.max() if len(rounds) else 0, bye_round.max() if len(bye_round) else 0)
+        results["progressive"] = (
+            np.bincount(player, weights=score * (last - rounds + 1), minlength=n) +
+            np.bincount(bye_player, weights=bye_points * (last - bye_round + 1), minlength=n)
+        )
+
+    if "direct_encounter" in names:
+        # Points scored against players on the same total, taken straight
+        # from the games so no n x n table is needed
+        tied = total[player] == total[opponent]
+        results["direct_encounter"] = np.bincount(player, weights=score * tied, minlength=n)
+
+    if "performance" in names:
+        rating = np.array([ratings.get(player_id, 1200) for player_id in player_ids], dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average = np.bincount(player, weights=rating[opponent], minlength=n) / games_played
+            fraction = np.bincount(player, weights=score, minlength=n) / games_played
+            performance = average + performance_offset(fraction)
+        results["performance"] = np.where(games_played > 0, np.round(performance), 0)
+
+    return results
+
+
+def rank(rows, games, byes, ratings, tiebreaks):
+    """Sort standings rows by points, then each tiebreak in order.
+
+    Each returned row gets a "tiebreaks" dict of {name: value}.
+    """
+    player_ids = [row["id"] for row in rows]
+    points = [row["points"] for row in rows]
+    values = compute(player_ids, points, games, byes, ratings, tiebreaks)
+
+    # np.lexsort sorts by the last key first, ascending
+    keys = [-values[name] for name in reversed(tiebreaks)] + [-np.asarray(points, dtype=float)]
+    order = np.lexsort(keys) if rows else []
+
+    ranked = []
+    for i in order:
+        row = dict(rows[i])
+        row["tiebreaks"] = {name: float(values[name][i]) for name in tiebreaks}
+        ranked.append(row)
+    return ranked
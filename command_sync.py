@@ -0,0 +1,53 @@
+# command_sync.py - Only sync application commands with Discord when they changed
+import json
+import hashlib
+from persistence import write_atomic
+
+# Fingerprint of the command tree as of the last successful sync
+HASH_FILE = 'data/command_hash.json'
+
+
+def command_payload(command, tree):
+    """The JSON payload Discord receives for a command or group"""
+    try:
+        return command.to_dict(tree)
+    except TypeError:
+        # discord.py < 2.4 takes no tree argument
+        return command.to_dict()
+
+
+def command_tree_hash(tree):
+    """Stable hash of every registered global command, group and option"""
+    payloads = sorted((command_payload(command, tree) for command in tree.get_commands()), key=lambda p: p["name"])
+    encoded = json.dumps(payloads, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def load_stored_hash(path=HASH_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def store_hash(fingerprint, application_id, count, path=HASH_FILE):
+    write_atomic(path, json.dumps({
+        "hash": fingerprint,
+        "application_id": str(application_id),
+        "commands": count
+    }, indent=4))
+
+
+async def sync_commands(bot, force=False):
+    """Sync the command tree if its fingerprint changed; returns synced count or None if skipped"""
+    fingerprint = command_tree_hash(bot.tree)
+    stored = load_stored_hash()
+
+    unchanged = stored.get("hash") == fingerprint and stored.get("application_id") == str(bot.application_id)
+    if unchanged and not force:
+        return None
+
+    synced = await bot.tree.sync()
+    store_hash(fingerprint, bot.application_id, len(synced))
+    return len(synced)
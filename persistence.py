@@ -0,0 +1,204 @@
+# persistence.py - Background worker thread for serialization and disk writes
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
+
+
+def snapshot_json(data, indent=None):
+    """Serialize data to JSON without racing the event loop
+
+    json.dumps without indent runs entirely in the C encoder while holding
+    the GIL, so the event loop cannot mutate data halfway through. Pretty
+    printing goes through the pure Python encoder, so it is done on a
+    private copy decoded from that snapshot.
+    """
+    payload = json.dumps(data)
+    if indent is None:
+        return payload
+    return json.dumps(json.loads(payload), indent=indent)
+
+
+def write_atomic(file_path, payload):
+    """Replace file_path with payload in a single rename"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(payload)
+    os.replace(tmp_path, file_path)
+
+
+def append_line(file_path, line):
+    """Append a single line to a text file"""
+    with open(file_path, 'a') as f:
+        f.write(line + "\n")
+
+
+class PersistenceWorker:
+    """Run disk writes on a dedicated thread fed by a bounded queue"""
+
+    def __init__(self, max_queue=1024, name="persistence-worker"):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.name = name
+        self.thread = None
+        self.keyed = {}  # Latest job for each coalescing key still waiting in the queue
+        self.lock = threading.Lock()
+        self.loop_lock = None  # Orders event loop submits waiting for queue space; made on first use
+        self.stopped = False  # Set by stop(); later jobs run synchronously
+
+        # Metrics
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.blocked_submits = 0  # Submits that had to wait for queue space
+        self.max_depth = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def start(self):
+        """Start the worker thread if it is not running"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self.thread.start()
+
+    def submit(self, func, *args, key=None):
+        """Queue func(*args) to run on the worker thread
+
+        Jobs sharing a key are coalesced: if one is still waiting, it is
+        replaced instead of queueing another write. When the queue is full
+        the caller blocks until there is room, which slows producers down
+        to the speed of the disk instead of letting memory grow. Coroutines
+        on the event loop use submit_async() instead.
+        """
+        job = self._prepare(func, args, key)
+        if job is None:
+            return
+
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.blocked_submits += 1
+            self.queue.put(job)
+
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def submit_async(self, func, *args, key=None):
+        """Queue func(*args) from a coroutine without blocking the event loop
+
+        Same as submit(), but a full queue is waited on in an executor
+        thread, so only the calling coroutine is held back. Submits made
+        while one is waiting line up behind it, which keeps jobs in order.
+        """
+        job = self._prepare(func, args, key)
+        if job is None:
+            return
+
+        if self.loop_lock is None:
+            self.loop_lock = asyncio.Lock()
+
+        if not self.loop_lock.locked():
+            try:
+                self.queue.put_nowait(job)
+                self.max_depth = max(self.max_depth, self.queue.qsize())
+                return
+            except queue.Full:
+                pass
+
+        async with self.loop_lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                self.blocked_submits += 1
+                await asyncio.get_running_loop().run_in_executor(None, self.queue.put, job)
+
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def _prepare(self, func, args, key):
+        """Start the worker and count a submit; returns the job to queue, or None if it was coalesced or already run"""
+        self.submitted += 1
+        if self.stopped:
+            self._execute(func, args)
+            return None
+        self.start()
+
+        if key is not None:
+            with self.lock:
+                if key in self.keyed:
+                    self.keyed[key] = (func, args)
+                    self.coalesced += 1
+                    return None
+                self.keyed[key] = (func, args)
+
+        return (key, func, args)
+
+    def _run(self):
+        while True:
+            key, func, args = self.queue.get()
+            try:
+                if func is None:
+                    return
+
+                if key is not None:
+                    # Run the most recent job submitted under this key
+                    with self.lock:
+                        func, args = self.keyed.pop(key)
+
+                self._execute(func, args)
+            finally:
+                self.queue.task_done()
+
+    def _execute(self, func, args):
+        """Run one job and record its latency"""
+        started = time.perf_counter()
+        try:
+            func(*args)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Persistence job {getattr(func, '__name__', func)} failed: {e}")
+
+        latency = time.perf_counter() - started
+        self.last_latency = latency
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def drain(self):
+        """Block until every queued job has been written"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def stop(self):
+        """Write everything still queued and stop the thread
+
+        Jobs submitted after this run straight away on the caller's thread,
+        so writes made while the bot shuts down are not lost with a thread
+        nobody waits for.
+        """
+        self.stopped = True
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put((None, None, ()))
+            self.thread.join()
+        self.thread = None
+
+    def metrics(self):
+        """Return queue depth and write latency metrics"""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_depth,
+            'queue_capacity': self.queue.maxsize,
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'completed': self.completed,
+            'failed': self.failed,
+            'blocked_submits': self.blocked_submits,
+            'last_write_ms': self.last_latency * 1000,
+            'avg_write_ms': (self.total_latency / (self.completed + self.failed) * 1000) if (self.completed + self.failed) else 0.0,
+            'max_write_ms': self.max_latency * 1000,
+        }
+
+
+# Shared worker used by the settings store, chess data and the bot log
+worker = PersistenceWorker(max_queue=int(os.environ.get('PERSISTENCE_QUEUE_SIZE', 1024)))
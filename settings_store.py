@@ -0,0 +1,158 @@
+# settings_store.py - Write-behind store for per-guild settings and usage counters
+import json
+import time
+import asyncio
+from persistence import snapshot_json, write_atomic
+
+
+class SettingsStore:
+    """Keep settings in memory and write them back in coalesced, atomic flushes"""
+
+    def __init__(self, path, flush_interval=30, worker=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.worker = worker  # PersistenceWorker that performs the writes, if any
+        self.dirty_guilds = set()
+        self.dirty = False
+        self._task = None
+
+        # Metrics
+        self.mutations = 0  # Mutations since the last flush
+        self.total_mutations = 0
+        self.flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+        self.data = self.load()
+
+    def load(self):
+        """Load settings from disk, falling back to defaults"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Default settings, written on the next flush
+            data = {'guilds': {}}
+            self.dirty = True
+
+        data.setdefault('guilds', {})
+        return data
+
+    def guild(self, guild_id, create=False):
+        """Get the settings dict for a guild, optionally creating it"""
+        guild_id = str(guild_id)
+        if guild_id not in self.data['guilds']:
+            if not create:
+                return None
+            self.data['guilds'][guild_id] = {}
+            self.mark_dirty(guild_id)
+        return self.data['guilds'][guild_id]
+
+    def increment(self, guild_id, key, amount=1):
+        """Bump a usage counter for a known guild"""
+        guild_settings = self.guild(guild_id)
+        if guild_settings is None:
+            return None
+        guild_settings[key] = guild_settings.get(key, 0) + amount
+        self.mark_dirty(guild_id)
+        return guild_settings[key]
+
+    def set(self, guild_id, key, value):
+        """Set a value for a guild, creating the guild entry if needed"""
+        self.guild(guild_id, create=True)[key] = value
+        self.mark_dirty(guild_id)
+
+    def mark_dirty(self, guild_id=None):
+        """Record that in-memory settings differ from disk"""
+        if guild_id is not None:
+            self.dirty_guilds.add(str(guild_id))
+        self.dirty = True
+        self.mutations += 1
+        self.total_mutations += 1
+
+    def write(self):
+        """Serialize the settings and atomically replace the settings file"""
+        started = time.perf_counter()
+        write_atomic(self.path, snapshot_json(self.data, indent=4))
+        self._record_flush(time.perf_counter() - started)
+
+    def flush(self):
+        """Write all pending changes in a single atomic write
+
+        Blocks while the worker queue is full; coroutines use flush_async().
+        """
+        if not self._take_pending():
+            return False
+
+        if self.worker is None:
+            self.write()
+        else:
+            self.worker.submit(self.write, key=self.path)
+        return True
+
+    async def flush_async(self):
+        """flush() without blocking the event loop on a full worker queue"""
+        if not self._take_pending():
+            return False
+
+        if self.worker is None:
+            self.write()
+        else:
+            await self.worker.submit_async(self.write, key=self.path)
+        return True
+
+    def _take_pending(self):
+        """Mark pending changes as flushed; returns False if there are none"""
+        if not self.dirty:
+            return False
+
+        # Changes made after this point mark the store dirty again
+        self.dirty = False
+        self.dirty_guilds.clear()
+        self.mutations = 0
+        return True
+
+    def _record_flush(self, latency):
+        """Update flush metrics"""
+        self.flushes += 1
+        self.last_flush_latency = latency
+        self.total_flush_latency += latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    async def run(self):
+        """Flush pending changes every flush_interval seconds"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_async()
+            except OSError as e:
+                print(f"Failed to flush settings: {e}")
+
+    def start(self):
+        """Start the background flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def close(self):
+        """Stop the background task and flush anything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush_async()
+
+    def metrics(self):
+        """Return flush latency and coalescing metrics"""
+        flushed_mutations = self.total_mutations - self.mutations
+        return {
+            'flushes': self.flushes,
+            'pending_mutations': self.mutations,
+            'dirty_guilds': len(self.dirty_guilds),
+            'total_mutations': self.total_mutations,
+            # Mutations absorbed by each write; 1.0 means no coalescing
+            'coalescing_ratio': flushed_mutations / self.flushes if self.flushes else 0.0,
+            'last_flush_ms': self.last_flush_latency * 1000,
+            'avg_flush_ms': (self.total_flush_latency / self.flushes * 1000) if self.flushes else 0.0,
+            'max_flush_ms': self.max_flush_latency * 1000,
+        }
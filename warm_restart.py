@@ -0,0 +1,66 @@
+# warm_restart.py - Snapshot runtime state at shutdown and restore it on the next start
+import os
+import json
+import time
+from persistence import write_atomic
+
+# Snapshot location and how old a snapshot may be before it is ignored
+SNAPSHOT_FILE = 'data/runtime_snapshot.json'
+SNAPSHOT_VERSION = 1
+MAX_SNAPSHOT_AGE = int(os.environ.get('WARM_RESTART_MAX_AGE', 24 * 3600))
+
+# Registered sections: name -> (dump(bot), restore(bot, state))
+providers = {}
+
+
+def register(name, dump, restore):
+    """Register a piece of runtime state to carry across restarts"""
+    providers[name] = (dump, restore)
+
+
+def save_snapshot(bot, path=SNAPSHOT_FILE):
+    """Serialize every registered section into a compact snapshot file"""
+    sections = {}
+    for name, (dump, _) in providers.items():
+        try:
+            sections[name] = dump(bot)
+        except Exception as e:
+            print(f"Warm restart: failed to snapshot {name}: {e}")
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "sections": sections
+    }
+    write_atomic(path, json.dumps(snapshot, separators=(",", ":")))
+    return len(sections)
+
+
+def restore_snapshot(bot, path=SNAPSHOT_FILE):
+    """Restore registered sections from the snapshot left by the previous run"""
+    try:
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+
+    # A snapshot is only good for the restart right after it was taken
+    os.remove(path)
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return 0
+    if time.time() - snapshot.get("saved_at", 0) > MAX_SNAPSHOT_AGE:
+        print("Warm restart: snapshot is too old, starting cold")
+        return 0
+
+    restored = 0
+    for name, state in snapshot.get("sections", {}).items():
+        if name not in providers:
+            continue
+        try:
+            providers[name][1](bot, state)
+            restored += 1
+        except Exception as e:
+            print(f"Warm restart: failed to restore {name}: {e}")
+
+    return restored